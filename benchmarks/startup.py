@@ -0,0 +1,82 @@
+"""
+Cold-start benchmark for the `tp` CLI.
+
+Imports `tp.app` in fresh interpreters under `python -X importtime`, reports the best cumulative
+import time and fails when it exceeds the budget configured in pyproject.toml
+([tool.tp.benchmarks] startup_budget_ms) or when a heavy module is imported eagerly.
+
+    python benchmarks/startup.py [--runs N] [--budget-ms MS]
+"""
+
+import argparse
+import os
+import subprocess  # nosec: B404
+import sys
+import tomllib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported by the commands that need them.
+DEFERRED_MODULES = ("escpos", "mistune", "jinja2", "requests", "unidecode", "packaging", "yaml", "flask")
+
+
+def load_budget_ms() -> float:
+    with open(os.path.join(ROOT, "pyproject.toml"), "rb") as file:
+        return float(tomllib.load(file)["tool"]["tp"]["benchmarks"]["startup_budget_ms"])
+
+
+def measure_import_ms() -> tuple[float, set[str]]:
+    """
+    Import tp.app in a fresh interpreter; return its cumulative import time and the top-level modules loaded.
+    """
+    result = subprocess.run(  # nosec: B603
+        [sys.executable, "-X", "importtime", "-c", "import tp.app"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = None
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line.removeprefix("import time:").split("|"))
+        if not cumulative.isdigit():
+            continue
+        modules.add(name.split(".")[0])
+        if name == "tp.app":
+            cumulative_us = int(cumulative)
+    if cumulative_us is None:
+        raise RuntimeError("tp.app did not appear in the import time report.")
+    return cumulative_us / 1000, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to measure")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Override the configured budget")
+    args = parser.parse_args()
+
+    budget_ms = args.budget_ms if args.budget_ms is not None else load_budget_ms()
+    samples = []
+    eager = set()
+    for _ in range(args.runs):
+        elapsed_ms, modules = measure_import_ms()
+        samples.append(elapsed_ms)
+        eager |= modules.intersection(DEFERRED_MODULES)
+
+    best = min(samples)
+    sys.stdout.write(f"tp.app import: best {best:.1f} ms, worst {max(samples):.1f} ms, budget {budget_ms:.1f} ms\n")
+    failed = False
+    if eager:
+        sys.stdout.write(f"FAIL: heavy modules imported at startup: {', '.join(sorted(eager))}\n")
+        failed = True
+    if best > budget_ms:
+        sys.stdout.write("FAIL: cold start is over budget\n")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Throughput and allocation benchmarks for the rendering and encoding hot paths.
+
+Each benchmark runs against a generated corpus (short tickets, a 10k-character Markdown note,
+Unicode-heavy Polish text, a directory of many templates) and reports operations per second and
+the peak memory allocated by one operation. Results can be saved as a local baseline; later runs
+are compared against it and fail when throughput drops by more than the threshold configured in
+pyproject.toml ([tool.tp.benchmarks] regression_threshold).
+
+    python benchmarks/suite.py [--filter NAME] [--save-baseline] [--baseline PATH] [--threshold RATIO]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tomllib
+import tracemalloc
+from collections.abc import Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+MARKDOWN_PARAGRAPH = (
+    "Replace the **toner cartridge** in the *second floor* printer, then run `selftest` and check "
+    "that the queue drains.  \nIf it does not, restart the spooler and note the error code.\n"
+)
+POLISH_PARAGRAPH = (
+    "Zażółć gęślą jaźń. Źdźbło trawy wyrosło przy łące, a pchnąć w tę łódź jeża lub ośm skrzyń fig. "
+    "Żółw ćmę śledzi; są też **ważne** sprawy do załatwienia przed świętami.\n"
+)
+TEMPLATE_COUNT = 200
+
+Benchmark = Callable[[], object]
+
+
+def load_threshold() -> float:
+    with open(os.path.join(ROOT, "pyproject.toml"), "rb") as file:
+        return float(tomllib.load(file)["tool"]["tp"]["benchmarks"]["regression_threshold"])
+
+
+def markdown_note(size: int = 10_000, paragraph: str = MARKDOWN_PARAGRAPH) -> str:
+    return (paragraph * (size // len(paragraph) + 1))[:size]
+
+
+def write_templates(directory: str, count: int) -> None:
+    for index in range(count):
+        with open(os.path.join(directory, f"template_{index}.yaml"), "w", encoding="utf-8") as file:
+            file.write(
+                f"name: Template {index}\n"
+                "variables:\n  - name: title\n    description: Title\n"
+                "segments:\n"
+                '  - text: "{{ title }}\\n"\n    styles: {bold: true, align: center}\n'
+                '  - text: "-----------------------\\n"\n'
+                '  - text: "{{ text }}\\n"\n    markdown: true\n'
+            )
+
+
+def build_benchmarks(workdir: str) -> dict[str, Benchmark]:
+    from escpos.printer import Dummy
+
+    from tp import config
+    from tp.config import PRINT_TEMPLATE_FOLDER
+    from tp.markdown_renderer import PrinterRenderer
+    from tp.printer import ThermalPrinter, encode_segments
+    from tp.template_manager import TemplateManager
+    from tp.text_wrap import LineWrapper
+    from tp.utils import TemplateRenderer
+
+    config.update(chars_per_line=32, enable_special_letters=True, codepage="cp852")
+    template_manager = TemplateManager(PRINT_TEMPLATE_FOLDER)
+    renderer = TemplateRenderer(template_manager)
+    note = markdown_note()
+    polish = markdown_note(paragraph=POLISH_PARAGRAPH)
+    ticket = {"title": "Printer jam", "ticket_number": "#1042", "text": "Check the *paper* guide."}
+    markdown_segments = PrinterRenderer(32).render(note)
+    note_segments = renderer.render_from_template("task", {"title": "Notes", "text": note})
+
+    many_dir = os.path.join(workdir, "many")
+    os.makedirs(many_dir)
+    write_templates(many_dir, TEMPLATE_COUNT)
+    cache_dir = os.path.join(workdir, "cache")
+    TemplateManager(many_dir, cache_dir=cache_dir)
+
+    printer = ThermalPrinter("127.0.0.1", template_manager, template_renderer=renderer)
+
+    def print_segments() -> None:
+        printer.printer = Dummy()
+        printer.print_segments(note_segments)
+
+    transliterating = TemplateRenderer(template_manager)
+    transliterating.enable_special_letters = False
+
+    return {
+        "render_ticket": lambda: renderer.render_from_template("ticket", ticket),
+        "render_markdown_note": lambda: renderer.render_from_template("task", {"title": "Notes", "text": note}),
+        "render_polish_note": lambda: renderer.render_from_template("task", {"title": "Zażółć", "text": polish}),
+        "render_polish_transliterated": lambda: transliterating.render_from_template(
+            "task", {"title": "Zażółć", "text": polish}
+        ),
+        "markdown_renderer": lambda: PrinterRenderer(32).render(note),
+        "line_wrapper": lambda: LineWrapper(32).wrap(markdown_segments),
+        "load_templates_cold": lambda: TemplateManager(many_dir),
+        "load_templates_indexed": lambda: TemplateManager(many_dir, cache_dir=cache_dir),
+        "encode_segments": lambda: encode_segments(note_segments, encoder=renderer.encoder),
+        "print_segments": print_segments,
+    }
+
+
+def measure(benchmark: Benchmark, min_time: float = 0.2, repeat: int = 5) -> dict[str, float]:
+    """
+    Best-of-`repeat` throughput over batches of at least `min_time` seconds, plus the peak
+    memory allocated by a single call.
+    """
+    benchmark()
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            benchmark()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        number *= 2
+    best = elapsed
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            benchmark()
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    benchmark()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ops_per_sec": number / best, "mean_ms": best / number * 1000, "peak_kib": peak / 1024}
+
+
+def compare(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], threshold: float) -> list[str]:
+    """
+    Names of benchmarks whose throughput fell below the baseline by more than `threshold`.
+    """
+    return [
+        name
+        for name, result in results.items()
+        if name in baseline and result["ops_per_sec"] < baseline[name]["ops_per_sec"] * (1 - threshold)
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=None, help="Override the configured regression ratio")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per measured batch")
+    args = parser.parse_args()
+
+    threshold = args.threshold if args.threshold is not None else load_threshold()
+    baseline_path = os.path.abspath(args.baseline)
+    baseline = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path, encoding="utf-8") as file:
+            baseline = json.load(file)
+
+    # Run against a scratch configuration so results do not depend on local settings.
+    workdir = tempfile.mkdtemp(prefix="tp-bench-")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        benchmarks = build_benchmarks(workdir)
+        results = {}
+        sys.stdout.write(f"{'benchmark':<30}{'ops/s':>12}{'ms/op':>10}{'peak KiB':>10}{'vs base':>9}\n")
+        for name, benchmark in benchmarks.items():
+            if args.filter not in name:
+                continue
+            result = results[name] = measure(benchmark, args.min_time)
+            change = ""
+            if name in baseline:
+                change = f"{result['ops_per_sec'] / baseline[name]['ops_per_sec'] - 1:+.0%}"
+            sys.stdout.write(
+                f"{name:<30}{result['ops_per_sec']:>12.1f}{result['mean_ms']:>10.3f}"
+                f"{result['peak_kib']:>10.1f}{change:>9}\n"
+            )
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.save_baseline:
+        with open(baseline_path, "w", encoding="utf-8") as file:
+            json.dump({**baseline, **results}, file, indent=2, sort_keys=True)
+        sys.stdout.write(f"Saved baseline to {baseline_path}\n")
+        return 0
+
+    regressions = compare(results, baseline, threshold)
+    if regressions:
+        sys.stdout.write(f"FAIL: throughput regressed by more than {threshold:.0%}: {', '.join(regressions)}\n")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""
+Compares LineWrapper with per-segment textwrap.fill on multi-kilobyte markdown bodies.
+
+    python benchmarks/wrap.py [--size CHARS] [--repeat N]
+"""
+
+import argparse
+import sys
+import textwrap
+import timeit
+
+from tp.markdown_renderer import PrinterRenderer
+from tp.text_wrap import LineWrapper
+
+PARAGRAPH = (
+    "Replace the **toner cartridge** in the *second floor* printer, then run `selftest` and check "
+    "that the queue drains.  \nIf it does not, restart the spooler and note the error code.\n"
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=10_000, help="Approximate markdown size in characters")
+    parser.add_argument("--repeat", type=int, default=50, help="Iterations per measurement")
+    parser.add_argument("--chars-per-line", type=int, default=32)
+    args = parser.parse_args()
+
+    text = PARAGRAPH * (args.size // len(PARAGRAPH) + 1)
+    segments = PrinterRenderer(args.chars_per_line).render(text)
+    wrapper = LineWrapper(args.chars_per_line)
+
+    def wrap_textwrap() -> None:
+        for segment in segments:
+            textwrap.fill(segment.text, width=args.chars_per_line, replace_whitespace=False, drop_whitespace=False)
+
+    def wrap_line_wrapper() -> None:
+        wrapper.wrap(segments)
+
+    baseline = min(timeit.repeat(wrap_textwrap, number=args.repeat, repeat=5)) / args.repeat
+    current = min(timeit.repeat(wrap_line_wrapper, number=args.repeat, repeat=5)) / args.repeat
+    sys.stdout.write(f"{len(text)} chars in {len(segments)} segments\n")
+    sys.stdout.write(f"textwrap.fill: {baseline * 1000:.2f} ms\n")
+    sys.stdout.write(f"LineWrapper:   {current * 1000:.2f} ms ({baseline / current:.1f}x)\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -38,19 +38,19 @@ def template_manager(tmp_path: Path) -> TemplateManager:
 
 @pytest.fixture
 def mock_printer() -> Generator[MagicMock, None, None]:
-    with patch("tp.app.ThermalPrinter") as mock_printer_class:
+    with patch("tp.printer.ThermalPrinter") as mock_printer_class:
         yield mock_printer_class
 
 
 @pytest.fixture
 def mock_get_printer_ip() -> Generator[None, None, None]:
-    with patch("tp.app.get_printer_ip", return_value="192.168.1.100"):
+    with patch("tp.printers.get_printer_address", return_value="192.168.1.100"):
         yield
 
 
 @pytest.fixture
 def mock_template_manager(tmp_path: Path) -> TemplateManager:
-    with patch("tp.app.TemplateManager") as mock_manager_class:
+    with patch("tp.template_manager.TemplateManager") as mock_manager_class:
         mock_manager = mock_manager_class.return_value
         mock_manager.template_dir = str(tmp_path)
         return mock_manager
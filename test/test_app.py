@@ -1,4 +1,9 @@
+import socket
+import subprocess
+import sys
+import threading
 from collections.abc import Generator
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -11,18 +16,18 @@ runner = CliRunner()
 
 @pytest.fixture
 def mock_printer() -> Generator[MagicMock, None, None]:
-    with patch("tp.app.ThermalPrinter") as mock_printer_class:
+    with patch("tp.printer.ThermalPrinter") as mock_printer_class:
         yield mock_printer_class
 
 
 @pytest.fixture
 def mock_get_printer_ip() -> Generator[None, None, None]:
-    with patch("tp.app.get_printer_ip", return_value="192.168.1.100"):
+    with patch("tp.printers.get_printer_address", return_value="192.168.1.100"):
         yield
 
 
 def test_print_template_command(mock_printer: MagicMock, mock_get_printer_ip: None) -> None:
-    with patch("tp.app.TemplateManager") as mock_template_manager:
+    with patch("tp.template_manager.TemplateManager") as mock_template_manager:
         mock_template_manager.return_value.get_template.return_value = {
             "name": "Sample",
             "variables": [{"name": "title", "description": "Title"}],
@@ -48,3 +53,165 @@ def test_set_check_for_updates_command() -> None:
     result = runner.invoke(app, ["settings", "set-check-for-updates", "False"])
     assert result.exit_code == 0
     assert "Check for updates set to False" in result.output
+
+
+def test_cli_import_defers_heavy_modules() -> None:
+    code = "import sys, tp.app; print(','.join(m for m in ('escpos', 'mistune', 'jinja2', 'requests') if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
+
+
+def test_print_batch_command(mock_printer: MagicMock, mock_get_printer_ip: None, tmp_path: Path) -> None:
+    from tp.printer import JobResult
+
+    jobs_file = tmp_path / "jobs.csv"
+    jobs_file.write_text("ticket_number\n100\n101\n", encoding="utf-8")
+    printer = mock_printer.return_value.__enter__.return_value
+    printer.print_many.side_effect = lambda jobs: [
+        JobResult(index, name) if context["ticket_number"] == "100" else JobResult(index, name, "boom")
+        for index, (name, context) in enumerate(jobs, start=1)
+    ]
+    with patch("tp.template_manager.TemplateManager"):
+        result = runner.invoke(app, ["print-batch", str(jobs_file), "--template", "ticket"])
+
+    assert result.exit_code == 1
+    assert "Job 1: printed using template 'ticket'." in result.output
+    assert "Job 2: failed: boom" in result.output
+    assert "Printed 1 of 2 jobs." in result.output
+    mock_printer.assert_called_once()
+
+
+def test_print_batch_command_from_stdin(mock_printer: MagicMock, mock_get_printer_ip: None) -> None:
+    printer = mock_printer.return_value.__enter__.return_value
+    printer.print_many.side_effect = lambda jobs: [
+        MagicMock(ok=True, spooled=False, index=1, template_name=name) for name, _ in jobs
+    ]
+    with patch("tp.template_manager.TemplateManager"):
+        result = runner.invoke(app, ["print-batch", "-"], input='{"template": "task", "title": "A"}\n')
+    assert result.exit_code == 0
+    assert "Printed 1 of 1 jobs." in result.output
+
+
+def test_print_template_profile(mock_printer: MagicMock, mock_get_printer_ip: None) -> None:
+    with patch("tp.template_manager.TemplateManager") as mock_template_manager:
+        mock_template_manager.return_value.get_template.return_value = {"variables": [], "segments": []}
+        result = runner.invoke(app, ["print-template", "sample", "--profile"])
+    assert result.exit_code == 0
+    assert "Stage" in result.output
+    assert "total" in result.output
+
+
+def test_print_template_forwards_to_daemon(mocker: MagicMock) -> None:
+    client = mocker.patch("tp.daemon.DaemonClient").return_value
+    client.request.side_effect = [
+        {"ok": True, "templates": {"sample": {"variables": [{"name": "title", "description": "Title"}]}}},
+        {"ok": True, "profile": {"job": "sample", "seconds": 0.01, "stages": {}}},
+    ]
+    template_manager = mocker.patch("tp.template_manager.TemplateManager")
+    result = runner.invoke(app, ["print-template", "sample"], input="Hello\n")
+    assert result.exit_code == 0
+    assert "Printed using template 'sample'." in result.output
+    client.request.assert_called_with("print", template="sample", context={"title": "Hello"}, printer=None)
+    assert not template_manager.called
+
+
+def test_print_template_falls_back_when_the_daemon_hangs_up(mocker: MagicMock, tmp_path: Path) -> None:
+    socket_path = str(tmp_path / "daemon.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen()
+
+    def hang_up() -> None:
+        connection, _ = server.accept()
+        connection.close()
+
+    thread = threading.Thread(target=hang_up, daemon=True)
+    thread.start()
+    mocker.patch("tp.app.get_daemon_socket", return_value=socket_path)
+    mocker.patch("tp.template_manager.TemplateManager").return_value.get_template.return_value = {"variables": []}
+    print_with_failover = mocker.patch("tp.printer.print_with_failover", return_value=(None, True))
+    mocker.patch("tp.printers.PrinterRouter")
+    try:
+        result = runner.invoke(app, ["print-template", "sample"])
+    finally:
+        thread.join(timeout=5)
+        server.close()
+    assert result.exit_code == 0, result.output
+    assert "Printed using template 'sample'." in result.output
+    assert print_with_failover.called
+
+
+def test_print_template_prints_on_addresses_in_process(
+    mocker: MagicMock, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    from tp import config
+
+    path = tmp_path / "tp_config.ini"
+    path.write_text("[Printer:kitchen]\naddress = 10.0.0.2\n", encoding="utf-8")
+    monkeypatch.setattr(config, "CONFIG_FILE", str(path))
+    daemon_client = mocker.patch("tp.daemon.DaemonClient")
+    mocker.patch("tp.template_manager.TemplateManager").return_value.get_template.return_value = {"variables": []}
+    print_with_failover = mocker.patch("tp.printer.print_with_failover", return_value=(None, True))
+    result = runner.invoke(app, ["print-template", "sample", "--printer", "10.0.0.5:9100"])
+    assert result.exit_code == 0
+    # Only configured printers are sent to the daemon.
+    assert not daemon_client.called
+    assert print_with_failover.call_args.args[0][0].address == "10.0.0.5:9100"
+
+
+def test_spool_commands(mocker: MagicMock, tmp_path: Path) -> None:
+    from tp.spool import Spool
+
+    mocker.patch("tp.spool.get_spool_path", return_value=str(tmp_path / "spool.sqlite3"))
+    spool = Spool(str(tmp_path / "spool.sqlite3"))
+    job = spool.append("192.168.1.100", "ticket", b"payload")
+
+    result = runner.invoke(app, ["spool", "list"])
+    assert result.exit_code == 0
+    assert f"{job.id}: 'ticket' for 192.168.1.100, 7 bytes" in result.output
+
+    result = runner.invoke(app, ["spool", "remove", str(job.id)])
+    assert result.exit_code == 0
+    assert len(spool) == 0
+    assert "The spool is empty." in runner.invoke(app, ["spool", "list"]).output
+
+
+def test_status_command_probes_printers(mocker: MagicMock) -> None:
+    from tp.health import PrinterHealth, PrinterState
+
+    mocker.patch("tp.daemon.DaemonClient").return_value.request.return_value = None
+    mocker.patch("tp.health.configured_printers", return_value=["192.168.1.100", "192.168.1.101"])
+    mocker.patch(
+        "tp.health.probe",
+        side_effect=[
+            PrinterHealth("192.168.1.100", PrinterState.UP, latency=0.002, paper="near_end"),
+            PrinterHealth("192.168.1.101", PrinterState.DOWN, error="timed out"),
+        ],
+    )
+    result = runner.invoke(app, ["status"])
+    assert result.exit_code == 1
+    assert "192.168.1.100: up, connected in 2.0 ms, paper near end" in result.output
+    assert "192.168.1.101: down (timed out)" in result.output
+
+
+def test_printers_command(mocker: MagicMock) -> None:
+    from tp.printers import PrinterGroup, PrinterProfile, PrinterRegistry, Strategy
+
+    profiles = {
+        "bar": PrinterProfile("bar", "10.0.0.2", 42, "cp437", capabilities=frozenset({"cutter"})),
+        "patio": PrinterProfile("patio", "10.0.0.3"),
+    }
+    groups = {"outside": PrinterGroup("outside", ("bar", "patio"), Strategy.LEAST_QUEUED)}
+    mocker.patch("tp.printers.load_printers", return_value=PrinterRegistry(profiles, groups, "outside"))
+    result = runner.invoke(app, ["printers"])
+    assert result.exit_code == 0
+    assert "bar: 10.0.0.2, 42 chars per line, cp437, cutter" in result.output
+    assert "outside (default): least_queued over bar, patio" in result.output
+
+
+def test_set_codepage_command_rejects_unsupported_codepages(mocker: MagicMock) -> None:
+    set_codepage = mocker.patch("tp.config.update")
+    result = runner.invoke(app, ["settings", "set-codepage", "utf-8"])
+    assert result.exit_code == 1
+    assert "Unsupported codepage 'utf-8'. Use one of: cp437" in result.output
+    assert not set_codepage.called
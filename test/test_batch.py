@@ -0,0 +1,42 @@
+import io
+
+import pytest
+
+from tp.batch import detect_format, read_jobs
+
+
+def test_detect_format() -> None:
+    assert detect_format("jobs.csv") == "csv"
+    assert detect_format("jobs.jsonl") == "jsonl"
+    assert detect_format("-") == "jsonl"
+
+
+def test_read_jobs_jsonl() -> None:
+    lines = io.StringIO('{"title": "A"}\n\n{"template": "task", "title": "B"}\n')
+    assert list(read_jobs(lines, "jsonl", "ticket")) == [("ticket", {"title": "A"}), ("task", {"title": "B"})]
+
+
+def test_read_jobs_csv() -> None:
+    lines = io.StringIO("ticket_number,title\n100,First\n101,Second\n")
+    assert list(read_jobs(lines, "csv", "ticket")) == [
+        ("ticket", {"ticket_number": "100", "title": "First"}),
+        ("ticket", {"ticket_number": "101", "title": "Second"}),
+    ]
+
+
+def test_read_jobs_is_lazy() -> None:
+    lines = iter(['{"title": "A"}\n', "not json\n"])
+    jobs = read_jobs(lines, "jsonl", "ticket")
+    assert next(jobs) == ("ticket", {"title": "A"})
+    with pytest.raises(ValueError, match="Line 2: invalid JSON"):
+        next(jobs)
+
+
+def test_read_jobs_requires_template() -> None:
+    with pytest.raises(ValueError, match="Line 1: no template given."):
+        list(read_jobs(['{"title": "A"}'], "jsonl"))
+
+
+def test_read_jobs_unknown_format() -> None:
+    with pytest.raises(ValueError, match="Unknown job format 'xml'"):
+        list(read_jobs([], "xml", "ticket"))
@@ -2,7 +2,10 @@
 
 import configparser
 import os
+import threading
 from collections.abc import Generator
+from pathlib import Path
+from unittest.mock import MagicMock
 
 import pytest
 
@@ -79,3 +82,86 @@ def test_corrupted_config_file() -> None:
         config.get_chars_per_line()
     with pytest.raises(configparser.Error):
         config.get_enable_special_letters()
+
+
+def test_config_is_parsed_once_while_unchanged(mocker: MagicMock) -> None:
+    config.set_chars_per_line(48)
+    read = mocker.spy(configparser.ConfigParser, "read")
+    assert config.get_chars_per_line() == 48
+    assert config.get_enable_special_letters() is False
+    assert config.get_config() is config.get_config()
+    assert read.call_count == 1
+
+
+def test_config_refreshes_when_file_changes() -> None:
+    config.set_chars_per_line(48)
+    snapshot = config.get_config()
+    with open(CONFIG_FILE, "a") as f:
+        f.write("enable_special_letters = True\n")
+    assert config.get_config() is not snapshot
+    assert config.get_enable_special_letters() is True
+
+
+def test_update_applies_settings_in_one_write(mocker: MagicMock) -> None:
+    replace = mocker.spy(os, "replace")
+    config.update(printer_ip="192.168.1.100", chars_per_line=48, check_for_updates=False)
+    assert replace.call_count == 1
+    assert config.get_printer_ip() == "192.168.1.100"
+    assert config.get_chars_per_line() == 48
+    assert config.get_check_for_updates() is False
+
+
+def test_update_rejects_unknown_settings() -> None:
+    with pytest.raises(ValueError, match="Unknown settings: colour"):
+        config.update(colour="red")
+    assert not os.path.exists(CONFIG_FILE)
+
+
+def test_concurrent_updates_do_not_clobber_each_other() -> None:
+    threads = [
+        threading.Thread(target=config.update, kwargs={"printer_ip": "192.168.1.100"}),
+        threading.Thread(target=config.update, kwargs={"chars_per_line": 48}),
+        threading.Thread(target=config.update, kwargs={"enable_special_letters": True}),
+        threading.Thread(target=config.update, kwargs={"check_for_updates": False}),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert config.get_printer_ip() == "192.168.1.100"
+    assert config.get_chars_per_line() == 48
+    assert config.get_enable_special_letters() is True
+    assert config.get_check_for_updates() is False
+
+
+def test_printer_address_uses_virtual_printer_when_enabled() -> None:
+    config.set_printer_ip("192.168.1.100")
+    assert config.get_printer_address() == "192.168.1.100"
+    config.set_virtual_printer_enabled(True)
+    assert config.get_printer_address() == "127.0.0.1:9100"
+
+
+def test_set_codepage_rejects_unsupported_codepages() -> None:
+    config.set_codepage("CP437")
+    assert config.get_codepage() == "cp437"
+    with pytest.raises(ValueError, match="Unsupported codepage 'cp999'. Use one of: cp437, cp850"):
+        config.set_codepage("cp999")
+    assert config.get_codepage() == "cp437"
+
+
+def test_cache_dir_defaults_to_a_per_user_directory(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert config.get_cache_dir() == str(tmp_path / "tp")
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="ownership checks need POSIX")
+def test_ensure_private_dir_refuses_directories_others_can_write(tmp_path: Path) -> None:
+    private = tmp_path / "private"
+    config.ensure_private_dir(str(private))
+    assert private.stat().st_mode & 0o777 == 0o700
+
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(PermissionError, match="only you can write to"):
+        config.ensure_private_dir(str(shared))
@@ -0,0 +1,82 @@
+import socket
+from collections.abc import Generator
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from tp.connection_pool import PrinterConnectionPool, split_address
+
+
+@pytest.fixture
+def mock_network_printer() -> Generator[MagicMock, None, None]:
+    with patch("tp.connection_pool.Network") as mock_network:
+        mock_network.side_effect = lambda *args, **kwargs: MagicMock()
+        yield mock_network
+
+
+@pytest.fixture
+def pool() -> PrinterConnectionPool:
+    pool = PrinterConnectionPool(max_idle=60.0)
+    pool.is_alive = MagicMock(return_value=True)  # type: ignore[method-assign]
+    return pool
+
+
+def test_acquire_dials_new_connection(mock_network_printer: MagicMock, pool: PrinterConnectionPool) -> None:
+    printer = pool.acquire("192.168.1.100")
+    mock_network_printer.assert_called_once_with("192.168.1.100", port=9100, timeout=10)
+    assert printer.open.called
+
+
+def test_released_connection_is_reused(mock_network_printer: MagicMock, pool: PrinterConnectionPool) -> None:
+    printer = pool.acquire("192.168.1.100")
+    pool.release("192.168.1.100", printer)
+    assert pool.acquire("192.168.1.100") is printer
+    assert mock_network_printer.call_count == 1
+
+
+def test_connections_are_keyed_by_address(mock_network_printer: MagicMock, pool: PrinterConnectionPool) -> None:
+    printer = pool.acquire("192.168.1.100")
+    pool.release("192.168.1.100", printer)
+    assert pool.acquire("192.168.1.101") is not printer
+
+
+def test_dead_connection_is_replaced(mock_network_printer: MagicMock, pool: PrinterConnectionPool) -> None:
+    printer = pool.acquire("192.168.1.100")
+    pool.release("192.168.1.100", printer)
+    pool.is_alive.return_value = False  # type: ignore[attr-defined]
+    assert pool.acquire("192.168.1.100") is not printer
+    assert printer.close.called
+
+
+def test_idle_connection_expires(mock_network_printer: MagicMock, pool: PrinterConnectionPool) -> None:
+    pool.max_idle = 0
+    printer = pool.acquire("192.168.1.100")
+    pool.release("192.168.1.100", printer)
+    with patch("tp.connection_pool.time.monotonic", return_value=1e12):
+        pool.prune()
+    assert printer.close.called
+    assert pool.acquire("192.168.1.100") is not printer
+
+
+def test_connection_discarded_on_error(mock_network_printer: MagicMock, pool: PrinterConnectionPool) -> None:
+    with pytest.raises(BrokenPipeError), pool.connection("192.168.1.100") as printer:
+        raise BrokenPipeError
+    assert printer.close.called
+    assert pool.acquire("192.168.1.100") is not printer
+
+
+def test_is_alive_detects_closed_peer() -> None:
+    left, right = socket.socketpair()
+    printer = MagicMock(_device=left)
+    try:
+        assert PrinterConnectionPool.is_alive(printer)
+        right.close()
+        assert not PrinterConnectionPool.is_alive(printer)
+    finally:
+        left.close()
+
+
+def test_split_address() -> None:
+    assert split_address("192.168.1.100") == ("192.168.1.100", 9100)
+    assert split_address("127.0.0.1:9101") == ("127.0.0.1", 9101)
+    assert split_address("fe80::1") == ("fe80::1", 9100)
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+
+from tp import config
+from tp.daemon import DaemonClient, PrintDaemon
+from tp.virtual_printer import VirtualPrinter
+
+
+@pytest.fixture
+def socket_path(tmp_path: Path) -> str:
+    return str(tmp_path / "daemon.sock")
+
+
+@pytest.fixture
+def daemon(socket_path: str) -> Generator[PrintDaemon, None, None]:
+    daemon = PrintDaemon(socket_path)
+    daemon.bind()
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    yield daemon
+    daemon.shutdown()
+    thread.join(timeout=5)
+
+
+def test_client_without_daemon(socket_path: str) -> None:
+    assert DaemonClient(socket_path).request("ping") is None
+
+
+def test_daemon_answers_commands(daemon: PrintDaemon, socket_path: str) -> None:
+    client = DaemonClient(socket_path)
+    assert client.request("ping")["ok"] is True  # type: ignore[index]
+    templates = client.request("templates")
+    assert templates is not None
+    assert "ticket" in templates["templates"]
+    assert client.request("reboot") == {"ok": False, "error": "Unknown command 'reboot'."}
+
+
+def write_config(monkeypatch: pytest.MonkeyPatch, tmp_path: Path, text: str) -> None:
+    path = tmp_path / "tp_config.ini"
+    path.write_text(text, encoding="utf-8")
+    monkeypatch.setattr(config, "CONFIG_FILE", str(path))
+
+
+def test_daemon_prints_over_warm_connections(
+    daemon: PrintDaemon, socket_path: str, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    printer = VirtualPrinter("127.0.0.1:0")
+    printer.start()
+    try:
+        write_config(monkeypatch, tmp_path, f"[Printer:virtual]\naddress = {printer.address}\n")
+        client = DaemonClient(socket_path)
+        for number in ("1", "2"):
+            reply = client.request(
+                "print", template="ticket", context={"ticket_number": number, "text": "Hi"}, printer="virtual"
+            )
+            assert reply is not None
+            assert reply["ok"] is True
+            assert "send" in reply["profile"]["stages"]
+        deadline = time.monotonic() + 5
+        while printer.receipts < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert printer.receipts == 2
+        # Both jobs went over the same pooled connection.
+        assert len({event["peer"] for event in printer.events}) == 1
+    finally:
+        printer.stop()
+
+
+def test_daemon_reports_print_errors(daemon: PrintDaemon, socket_path: str) -> None:
+    reply = DaemonClient(socket_path).request("print", template="missing", context={}, printer="127.0.0.1:1")
+    assert reply is not None
+    assert reply["ok"] is False
+
+
+def test_daemon_only_prints_on_configured_printers(
+    daemon: PrintDaemon, socket_path: str, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    write_config(monkeypatch, tmp_path, "[Printer:kitchen]\naddress = 127.0.0.1:1\n")
+    reply = DaemonClient(socket_path).request("print", template="ticket", context={}, printer="10.0.0.5:22")
+    assert reply == {"ok": False, "error": "Unknown printer '10.0.0.5:22'. Use one of: kitchen"}
+
+
+def test_jobs_for_one_printer_take_turns_in_arrival_order(daemon: PrintDaemon) -> None:
+    order: list[int] = []
+
+    def job(number: int) -> None:
+        with daemon._printer_turn("10.0.0.1"):
+            order.append(number)
+
+    threads = []
+    with daemon._printer_turn("10.0.0.1"):
+        for number in range(10):
+            thread = threading.Thread(target=job, args=(number,))
+            thread.start()
+            threads.append(thread)
+            # Let each job start waiting before the next one arrives.
+            deadline = time.monotonic() + 5
+            while daemon._pending["10.0.0.1"] < number + 2 and time.monotonic() < deadline:
+                time.sleep(0.001)
+        # Another printer does not wait for this one.
+        with daemon._printer_turn("10.0.0.2"):
+            pass
+    for thread in threads:
+        thread.join(timeout=5)
+    assert order == list(range(10))
+    assert daemon._pending["10.0.0.1"] == 0
+
+
+def test_daemon_refuses_to_start_twice(daemon: PrintDaemon, socket_path: str) -> None:
+    with pytest.raises(RuntimeError, match="already listening"):
+        PrintDaemon(socket_path).bind()
+
+
+def test_daemon_replaces_stale_socket(socket_path: str) -> None:
+    Path(socket_path).write_text("", encoding="utf-8")
+    daemon = PrintDaemon(socket_path)
+    try:
+        daemon.bind()
+    finally:
+        daemon.bind().server_close()
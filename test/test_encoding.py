@@ -0,0 +1,25 @@
+import pytest
+
+from tp.encoding import CodepageEncoder, transliterate
+
+
+def test_transliterate() -> None:
+    assert transliterate("Zażółć gęślą jaźń") == "Zazolc gesla jazn"
+    assert transliterate("plain ascii") == "plain ascii"
+
+
+def test_encoder_uses_codepage_characters() -> None:
+    encoder = CodepageEncoder("cp852")
+    assert encoder.select_command == b"\x1bt\x12"
+    assert encoder.encode("Zażółć") == "Zażółć".encode("cp852")
+
+
+def test_encoder_transliterates_unmapped_characters() -> None:
+    encoder = CodepageEncoder("cp437")
+    assert encoder.select_command == b"\x1bt\x00"
+    assert encoder.encode("gęślą “quoted” ü") == b'gesla "quoted" \x81'
+
+
+def test_encoder_rejects_unknown_codepage() -> None:
+    with pytest.raises(ValueError, match="Unsupported codepage 'cp999'"):
+        CodepageEncoder("cp999")
@@ -0,0 +1,134 @@
+import socket
+import time
+from collections.abc import Generator
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from tp.health import HealthMonitor, PrinterDownError, PrinterState, paper_status, probe
+from tp.printer import ThermalPrinter
+from tp.spool import Spool
+from tp.template_manager import TemplateManager
+from tp.virtual_printer import VirtualPrinter
+
+
+@pytest.fixture
+def virtual_printer() -> Generator[VirtualPrinter, None, None]:
+    printer = VirtualPrinter("127.0.0.1:0")
+    printer.start()
+    yield printer
+    printer.stop()
+
+
+@pytest.fixture
+def free_address() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"127.0.0.1:{sock.getsockname()[1]}"
+
+
+@pytest.fixture
+def template_manager(tmp_path: Path) -> TemplateManager:
+    templates_path = tmp_path / "print_templates"
+    templates_path.mkdir()
+    (templates_path / "note.yaml").write_text('segments:\n  - text: "Hi\\n"\n', encoding="utf-8")
+    return TemplateManager(str(templates_path))
+
+
+def test_paper_status() -> None:
+    assert paper_status(0x12) == "ok"
+    assert paper_status(0x12 | 0x0C) == "near_end"
+    assert paper_status(0x12 | 0x60) == "out"
+
+
+def test_probe_reachable_printer(virtual_printer: VirtualPrinter) -> None:
+    health = probe(virtual_printer.address)
+    assert health.state == PrinterState.UP
+    assert health.paper == "ok"
+    assert health.latency is not None
+    # The status query is answered, not printed.
+    assert not [event for event in virtual_printer.events if event["type"] == "text"]
+
+
+def test_probe_unreachable_printer(free_address: str) -> None:
+    health = probe(free_address, timeout=0.5)
+    assert health.state == PrinterState.DOWN
+    assert health.error
+
+
+def test_monitor_marks_printer_down_after_repeated_failures(free_address: str) -> None:
+    monitor = HealthMonitor(lambda: [free_address], timeout=0.5, failures_before_down=2)
+    assert monitor.status(free_address).state == PrinterState.UNKNOWN
+    assert monitor.check(free_address).state == PrinterState.UNKNOWN
+    assert monitor.check(free_address).state == PrinterState.DOWN
+    with pytest.raises(PrinterDownError):
+        monitor.ensure_up(free_address)
+
+    monitor.record(free_address)
+    assert monitor.status(free_address).state == PrinterState.UP
+    assert monitor.status(free_address).failures == 0
+
+
+def test_printer_fails_fast_when_known_down(template_manager: TemplateManager, tmp_path: Path) -> None:
+    monitor = HealthMonitor(lambda: [], failures_before_down=1)
+    monitor.record("192.168.1.100", "timed out")
+    with patch("tp.printer.Network") as mock_network:
+        with pytest.raises(PrinterDownError), ThermalPrinter("192.168.1.100", template_manager, health=monitor):
+            pass
+        spool = Spool(str(tmp_path / "spool.sqlite3"))
+        with ThermalPrinter("192.168.1.100", template_manager, spool=spool, health=monitor) as printer:
+            assert printer.print_template("note", {}) is False
+        assert not mock_network.called
+    assert len(spool) == 1
+    spool.close()
+
+
+def test_sends_update_the_monitor(template_manager: TemplateManager, mocker: MagicMock) -> None:
+    monitor = HealthMonitor(lambda: [], failures_before_down=1)
+    network = mocker.patch("tp.printer.Network").return_value
+    with ThermalPrinter("192.168.1.100", template_manager, health=monitor) as printer:
+        printer.print_template("note", {})
+    assert monitor.status("192.168.1.100").state == PrinterState.UP
+
+    network._raw.side_effect = ConnectionRefusedError("refused")
+    with (
+        pytest.raises(ConnectionRefusedError),
+        ThermalPrinter("192.168.1.100", template_manager, health=monitor) as printer,
+    ):
+        printer.print_template("note", {})
+    assert monitor.status("192.168.1.100").state == PrinterState.DOWN
+
+
+def test_unreachable_printer_is_detected_on_connect(
+    free_address: str, template_manager: TemplateManager, tmp_path: Path
+) -> None:
+    monitor = HealthMonitor(addresses=lambda: [], failures_before_down=1, query_status=False)
+    spool = Spool(str(tmp_path / "spool.sqlite3"))
+    try:
+        with ThermalPrinter(free_address, template_manager, spool=spool, health=monitor) as printer:
+            # Nothing was dialled lazily: the refused connection is already known before the job.
+            assert printer.printer is None
+            assert monitor.is_down(free_address)
+            assert printer.print_template("note", {}) is False
+        assert len(spool) == 1
+    finally:
+        spool.close()
+
+
+def test_monitor_reprobes_printers_it_only_saw_in_jobs(free_address: str) -> None:
+    monitor = HealthMonitor(addresses=lambda: [], interval=0.01, failures_before_down=1, query_status=False)
+    monitor.record(free_address, "refused")
+    assert monitor.is_down(free_address)
+
+    printer = VirtualPrinter(free_address)
+    printer.start()
+    monitor.start()
+    try:
+        deadline = time.monotonic() + 5
+        while monitor.is_down(free_address) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert monitor.status(free_address).state == PrinterState.UP
+    finally:
+        monitor.stop()
+        printer.stop()
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import pytest
+
+from tp.instrumentation import (
+    Histogram,
+    HistogramStore,
+    JobProfile,
+    add_observer,
+    profile_job,
+    remove_observer,
+    stage,
+)
+from tp.template_manager import TemplateManager
+from tp.utils import TemplateRenderer
+
+
+def test_stages_are_recorded_into_the_current_profile() -> None:
+    with stage("outside"):
+        pass
+    with profile_job("ticket") as profile:
+        for size in (3, 4):
+            with stage("render") as timing:
+                timing.add_bytes(size)
+        with profile_job("nested") as nested, stage("send"):
+            pass
+
+    assert nested is profile
+    assert list(profile.stages) == ["render", "send"]
+    assert profile.stages["render"].bytes == 7
+    assert profile.stages["render"].calls == 2
+    assert profile.seconds >= profile.stages["render"].seconds
+    assert "render" in profile.format()
+
+
+def test_existing_profile_collects_several_spans() -> None:
+    profile = JobProfile("task")
+    with profile_job("task", profile), stage("load_templates"):
+        pass
+    with profile_job("task", profile), stage("send"):
+        pass
+    assert list(profile.stages) == ["load_templates", "send"]
+
+
+def test_histogram_snapshot_is_cumulative() -> None:
+    histogram = Histogram(buckets=(0.01, 0.1))
+    for value in (0.005, 0.05, 0.05, 3.0):
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {0.01: 1, 0.1: 3, float("inf"): 4}
+    assert snapshot["count"] == 4
+    assert snapshot["sum"] == 3.105
+
+
+def test_histogram_store_observes_finished_jobs(tmp_path: Path) -> None:
+    (tmp_path / "note.yaml").write_text('segments:\n  - text: "Hi {{ name }}"\n', encoding="utf-8")
+    renderer = TemplateRenderer(TemplateManager(str(tmp_path)))
+    store = HistogramStore()
+    add_observer(store)
+    try:
+        with profile_job("note"):
+            renderer.render_from_template("note", {"name": "Alice"})
+    finally:
+        remove_observer(store)
+
+    assert store.histogram("job").count == 1
+    assert store.histogram("render").count == 1
+    assert store.histogram("wrap").count == 1
+
+
+def test_failed_job_records_error() -> None:
+    profiles: list[JobProfile] = []
+    add_observer(profiles.append)
+    try:
+        with pytest.raises(ConnectionRefusedError), profile_job("ticket"):
+            raise ConnectionRefusedError
+    finally:
+        remove_observer(profiles.append)
+    assert profiles[0].error == "ConnectionRefusedError"
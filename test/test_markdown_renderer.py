@@ -0,0 +1,37 @@
+from tp.markdown_renderer import PrinterRenderer
+from tp.segments import Segment, Style
+
+
+def test_render_inline_styles() -> None:
+    renderer = PrinterRenderer(32)
+    segments = renderer.render("**Bold**, *italic* and `code`\nnext line  \nhard break")
+    assert segments == [
+        Segment("Bold", Style(bold=True)),
+        Segment(", "),
+        Segment("italic", Style(italic=True)),
+        Segment(" and "),
+        Segment("code", Style(font="b")),
+        Segment("\n"),
+        Segment("next line"),
+        Segment("\n\n"),
+        Segment("hard break"),
+    ]
+
+
+def test_render_nested_emphasis_as_plain_bold() -> None:
+    renderer = PrinterRenderer(32)
+    assert renderer.render("**bold *nested***") == [Segment("bold nested", Style(bold=True))]
+
+
+def test_render_block_children() -> None:
+    renderer = PrinterRenderer(32)
+    assert renderer.render("# Heading\n- item") == [
+        Segment("Heading"),
+        Segment("item"),
+    ]
+
+
+def test_renderer_is_reusable() -> None:
+    renderer = PrinterRenderer(32)
+    assert renderer.render("first") == [Segment("first")]
+    assert renderer.render("second") == [Segment("second")]
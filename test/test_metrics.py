@@ -0,0 +1,48 @@
+from tp.instrumentation import JobProfile
+from tp.metrics import Counter, LabeledHistogram, MetricsRegistry
+
+
+def test_counter_samples_escape_label_values() -> None:
+    counter = Counter("tp_test_total", "Test.", ("template",))
+    counter.inc(1, 'say "hi"')
+    counter.inc(2, 'say "hi"')
+    assert counter.samples() == ['tp_test_total{template="say \\"hi\\""} 3.0']
+
+
+def test_histogram_samples() -> None:
+    histogram = LabeledHistogram("tp_test_seconds", "Test.", ("stage",), buckets=(0.1,))
+    histogram.observe(0.05, "render")
+    histogram.observe(0.5, "render")
+    assert histogram.samples() == [
+        'tp_test_seconds_bucket{stage="render",le="0.1"} 1',
+        'tp_test_seconds_bucket{stage="render",le="+Inf"} 2',
+        'tp_test_seconds_sum{stage="render"} 0.55',
+        'tp_test_seconds_count{stage="render"} 2',
+    ]
+
+
+def test_registry_aggregates_job_profiles() -> None:
+    registry = MetricsRegistry()
+    registry.gauge("tp_queue_depth", "Queued jobs.", lambda: 3)
+
+    done = JobProfile("ticket")
+    done.record("render", 0.002)
+    done.record("send", 0.001, 120)
+    failed = JobProfile("ticket")
+    failed.error = "ConnectionRefusedError"
+    spooled = JobProfile("ticket")
+    spooled.spooled = True
+    registry.observe_job(done)
+    registry.observe_job(failed)
+    registry.observe_job(spooled)
+
+    assert registry.jobs.value("ticket", "done") == 1
+    assert registry.jobs.value("ticket", "failed") == 1
+    assert registry.jobs.value("ticket", "spooled") == 1
+    assert registry.errors.value("ConnectionRefusedError") == 1
+    assert registry.bytes_sent.value() == 120
+    output = registry.render()
+    assert "# TYPE tp_jobs_total counter" in output
+    assert 'tp_jobs_total{template="ticket",status="done"} 1.0' in output
+    assert 'tp_stage_duration_seconds_count{stage="render"} 1' in output
+    assert "tp_queue_depth 3.0" in output
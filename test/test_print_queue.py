@@ -0,0 +1,76 @@
+import threading
+from collections.abc import Generator
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from tp.print_queue import JobStatus, PrintQueue
+from tp.template_manager import TemplateManager
+
+
+@pytest.fixture
+def template_manager(tmp_path: Path) -> TemplateManager:
+    templates_path = tmp_path / "print_templates"
+    templates_path.mkdir()
+    return TemplateManager(str(templates_path))
+
+
+@pytest.fixture
+def mock_printer() -> Generator[MagicMock, None, None]:
+    with patch("tp.print_queue.ThermalPrinter") as mock_printer_class:
+        yield mock_printer_class
+
+
+def test_submit_returns_queued_job_and_prints_in_background(
+    mock_printer: MagicMock, template_manager: TemplateManager
+) -> None:
+    release = threading.Event()
+    mock_printer.return_value.__enter__.return_value.print_template.side_effect = lambda *args: release.wait(5)
+    print_queue = PrintQueue(template_manager, pool=MagicMock())
+
+    job = print_queue.submit("192.168.1.100", "sample", {"title": "Test"})
+    # Read via to_dict so the status is not narrowed; the worker changes it later.
+    assert job.to_dict()["status"] in (JobStatus.QUEUED, JobStatus.PRINTING)
+    assert print_queue.get(job.id) is job
+
+    release.set()
+    print_queue.join()
+    assert job.status == JobStatus.DONE
+    assert job.finished_at is not None
+    mock_printer.return_value.__enter__.return_value.print_template.assert_called_once_with("sample", {"title": "Test"})
+
+
+def test_failed_job_records_error(mock_printer: MagicMock, template_manager: TemplateManager) -> None:
+    mock_printer.return_value.__enter__.side_effect = OSError("Printer offline")
+    print_queue = PrintQueue(template_manager, pool=MagicMock())
+
+    job = print_queue.submit("192.168.1.100", "sample", {})
+    print_queue.join()
+    assert job.status == JobStatus.FAILED
+    assert job.error == "Printer offline"
+
+
+def test_jobs_for_one_printer_run_in_order(mock_printer: MagicMock, template_manager: TemplateManager) -> None:
+    printed: list[int] = []
+    mock_printer.return_value.__enter__.return_value.print_template.side_effect = lambda name, context: printed.append(
+        context["n"]
+    )
+    print_queue = PrintQueue(template_manager, pool=MagicMock())
+
+    for n in range(20):
+        print_queue.submit("192.168.1.100", "sample", {"n": n})
+    print_queue.join()
+    assert printed == list(range(20))
+
+
+def test_finished_jobs_are_trimmed(mock_printer: MagicMock, template_manager: TemplateManager) -> None:
+    print_queue = PrintQueue(template_manager, pool=MagicMock(), max_finished=2)
+    first = print_queue.submit("192.168.1.100", "sample", {})
+    print_queue.join()
+    for _ in range(3):
+        print_queue.submit("192.168.1.100", "sample", {})
+        print_queue.join()
+    assert print_queue.get(first.id) is None
+    assert len(print_queue.jobs()) <= 3
+    assert print_queue.depth() == 0
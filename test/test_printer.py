@@ -4,8 +4,11 @@ from unittest.mock import MagicMock, call, patch
 
 import pytest
 
-from tp.printer import ThermalPrinter
+from tp.encoding import CodepageEncoder
+from tp.printer import ThermalPrinter, coalesce_segments, encode_segments, printer_styles, write_segments
+from tp.segments import DEFAULT_STYLE, Segment, Style
 from tp.template_manager import TemplateManager
+from tp.virtual_printer import EscPosParser
 
 
 @pytest.fixture
@@ -47,7 +50,7 @@ segments:
         f.write(template_content)
     template_manager.templates = template_manager.load_templates()
 
-    with ThermalPrinter("192.168.1.100", template_manager) as printer:
+    with ThermalPrinter("192.168.1.100", template_manager, buffered=False) as printer:
         printer.print_template("test_template", {})
         # Ensure print_segments is called with correct segments
         mock_printer_instance = mock_network_printer.return_value
@@ -61,25 +64,178 @@ segments:
                     invert=False,
                     double_width=False,
                     double_height=False,
+                    normal_textsize=True,
                 ),
-                call(
-                    align="left",
-                    font="a",
-                    bold=False,
-                    underline=False,
-                    invert=False,
-                    double_width=False,
-                    double_height=False,
-                ),
+                call(bold=False),
             ]
         )
-        mock_printer_instance.text.assert_called_with("Hello, World!")
+        mock_printer_instance._raw.assert_any_call(b"Hello, World!")
         assert mock_printer_instance.cut.called
 
 
+def test_print_template_buffered(mock_network_printer: MagicMock, template_manager: TemplateManager) -> None:
+    with open(template_manager.template_dir + "/test_template.yaml", "w", encoding="utf-8") as f:
+        f.write('segments:\n  - text: "Hello, World!"\n    styles:\n      bold: true\n')
+    template_manager.templates = template_manager.load_templates()
+
+    with ThermalPrinter("192.168.1.100", template_manager) as printer:
+        printer.print_template("test_template", {})
+        mock_printer_instance = mock_network_printer.return_value
+        mock_printer_instance._raw.assert_called_once()
+        payload = mock_printer_instance._raw.call_args.args[0]
+        assert payload.index(b"\x1bE\x01") < payload.index(b"Hello, World!")
+        assert payload.endswith(b"\x1dV\x00")
+        assert not mock_printer_instance.text.called
+        assert not mock_printer_instance.cut.called
+
+
+def test_encode_segments_without_cut() -> None:
+    payload = encode_segments([Segment("Hi")], cut=False)
+    assert b"Hi" in payload
+    assert b"\x1dV" not in payload
+
+
+def test_write_segments_sends_only_style_changes() -> None:
+    printer = MagicMock()
+    segments = [
+        Segment("Title\n", Style(align="center", bold=True)),
+        Segment("Body"),
+        Segment("", Style(underline=True)),
+        Segment(" more", Style(align="left")),
+        Segment("Big", Style(double_width=True, double_height=True)),
+    ]
+    write_segments(printer, segments)
+    assert printer.method_calls == [
+        call.set(
+            align="center",
+            font="a",
+            bold=True,
+            underline=False,
+            invert=False,
+            double_width=False,
+            double_height=False,
+            normal_textsize=True,
+        ),
+        call.text("Title\n"),
+        call.set(align="left", bold=False),
+        call.text("Body more"),
+        call.set(double_width=True, double_height=True, normal_textsize=False, bold=False, underline=False, font="a"),
+        call.text("Big"),
+        call.set(double_width=False, double_height=False, normal_textsize=True, bold=False, underline=False, font="a"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "styles",
+    [
+        [Style(bold=True, double_width=True, double_height=True), Style(bold=True)],
+        [Style(font="b"), Style(font="b", double_height=True)],
+        [Style(underline=True), Style(underline=True, double_width=True), Style(bold=True)],
+    ],
+)
+def test_size_changes_keep_the_other_styles(styles: list[Style]) -> None:
+    # Changing the text size resets bold, underline and the font on the printer.
+    segments = [Segment(f"{index}\n", style) for index, style in enumerate(styles)]
+    parser = EscPosParser()
+    events = parser.feed(encode_segments(segments, cut=False)) + parser.close()
+    printed = [event for event in events if event["type"] == "text"]
+    assert [event["text"] for event in printed] == [segment.text for segment in segments]
+    for event, style in zip(printed, styles, strict=True):
+        assert event["styles"] == printer_styles(style)
+
+
+def test_coalesce_segments_merges_equal_styles() -> None:
+    runs = coalesce_segments(
+        [
+            Segment("a"),
+            Segment("b", Style(font="a", bold=False)),
+            Segment("c", Style(bold=True)),
+        ]
+    )
+    assert [text for _, text in runs] == ["ab", "c"]
+
+
+def test_encode_segments_selects_codepage_once() -> None:
+    encoder = CodepageEncoder("cp852")
+    payload = encode_segments([Segment("Zażółć "), Segment("gęślą", Style(bold=True))], cut=False, encoder=encoder)
+    assert payload.startswith(b"\x1bt\x12")
+    assert payload.count(b"\x1bt") == 1
+    assert "Zażółć ".encode("cp852") in payload
+    assert "gęślą".encode("cp852") in payload
+
+
 def test_printer_connection_error(template_manager: TemplateManager) -> None:
     # Simulate a connection error
-    with patch("tp.printer.Network", side_effect=Exception("Connection error")), pytest.raises(
-        Exception, match="Connection error"
-    ), ThermalPrinter("192.168.1.100", template_manager):
+    with (
+        patch("tp.printer.Network", side_effect=Exception("Connection error")),
+        pytest.raises(Exception, match="Connection error"),
+        ThermalPrinter("192.168.1.100", template_manager),
+    ):
         pass
+
+
+def test_printer_borrows_from_pool(template_manager: TemplateManager) -> None:
+    pool = MagicMock()
+    with ThermalPrinter("192.168.1.100", template_manager, pool=pool) as printer:
+        assert printer.printer is pool.acquire.return_value
+    pool.acquire.assert_called_once_with("192.168.1.100")
+    pool.release.assert_called_once_with("192.168.1.100", pool.acquire.return_value, discard=False)
+
+
+def test_printer_reconnects_dropped_connections_before_sending(template_manager: TemplateManager) -> None:
+    with open(template_manager.template_dir + "/test_template.yaml", "w", encoding="utf-8") as f:
+        f.write('segments:\n  - text: "Hello"\n')
+    template_manager.templates = template_manager.load_templates()
+    pool = MagicMock()
+    pool.is_alive.return_value = False
+    with ThermalPrinter("192.168.1.100", template_manager, pool=pool) as printer:
+        printer.print_template("test_template", {})
+    pool.reconnect.assert_called_once_with("192.168.1.100", pool.acquire.return_value)
+    assert not pool.acquire.return_value._raw.called
+    assert pool.reconnect.return_value._raw.called
+
+
+def test_printer_does_not_resend_after_a_failed_write(template_manager: TemplateManager) -> None:
+    with open(template_manager.template_dir + "/test_template.yaml", "w", encoding="utf-8") as f:
+        f.write('segments:\n  - text: "Hello"\n')
+    template_manager.templates = template_manager.load_templates()
+    pool = MagicMock()
+    pool.is_alive.return_value = True
+    pool.acquire.return_value._raw.side_effect = BrokenPipeError
+    with pytest.raises(BrokenPipeError), ThermalPrinter("192.168.1.100", template_manager, pool=pool) as printer:
+        printer.print_template("test_template", {})
+    # Part of the job may have printed, so it is not sent again.
+    pool.acquire.return_value._raw.assert_called_once()
+    assert not pool.reconnect.called
+    pool.release.assert_called_once_with("192.168.1.100", pool.acquire.return_value, discard=True)
+
+
+def test_encode_segments_splices_pre_encoded_data() -> None:
+    encoder = CodepageEncoder("cp852")
+    segments = [
+        Segment("ignored\n", data=b"CACHED\n"),
+        Segment("fresh"),
+    ]
+    assert coalesce_segments(segments, encoder) == [(DEFAULT_STYLE, b"CACHED\nfresh")]
+    assert b"CACHED\nfresh" in encode_segments(segments, cut=False, encoder=encoder)
+
+
+def test_print_many_streams_jobs_over_one_connection(
+    mock_network_printer: MagicMock, template_manager: TemplateManager
+) -> None:
+    with open(template_manager.template_dir + "/ticket.yaml", "w", encoding="utf-8") as f:
+        f.write('segments:\n  - text: "No. {{ number }}\\n"\n')
+    template_manager.templates = template_manager.load_templates()
+    jobs = [("ticket", {"number": 100}), ("missing", {}), ("ticket", {"number": 101})]
+
+    with ThermalPrinter("192.168.1.100", template_manager) as printer:
+        results = list(printer.print_many(jobs))
+
+    assert [(result.index, result.ok) for result in results] == [(1, True), (2, False), (3, True)]
+    assert results[1].error == "Template 'missing' not found."
+    mock_network_printer.assert_called_once()
+    payloads = [c.args[0] for c in mock_network_printer.return_value._raw.call_args_list]
+    assert len(payloads) == 2
+    assert b"No. 100\n" in payloads[0]
+    assert b"No. 101\n" in payloads[1]
+    assert all(payload.endswith(b"\x1dV\x00") for payload in payloads)
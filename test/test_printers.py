@@ -0,0 +1,243 @@
+import socket
+import time
+from pathlib import Path
+
+import pytest
+
+from tp import config
+from tp.instrumentation import JobProfile, add_observer, remove_observer
+from tp.print_queue import JobStatus, PrintQueue
+from tp.printer import connect_with_failover, print_with_failover
+from tp.printers import NoPrinterError, PrinterRouter, Strategy, load_printers
+from tp.spool import Spool
+from tp.template_manager import TemplateManager
+from tp.utils import TemplateRenderer
+from tp.virtual_printer import VirtualPrinter
+
+
+def write_config(monkeypatch: pytest.MonkeyPatch, tmp_path: Path, text: str) -> None:
+    path = tmp_path / "tp_config.ini"
+    path.write_text(text, encoding="utf-8")
+    monkeypatch.setattr(config, "CONFIG_FILE", str(path))
+
+
+@pytest.fixture
+def free_address() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"127.0.0.1:{sock.getsockname()[1]}"
+
+
+@pytest.fixture
+def template_manager(tmp_path: Path) -> TemplateManager:
+    templates_path = tmp_path / "print_templates"
+    templates_path.mkdir()
+    (templates_path / "note.yaml").write_text('segments:\n  - text: "{{ text }}\\n"\n', encoding="utf-8")
+    return TemplateManager(str(templates_path))
+
+
+def test_load_printers(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    write_config(
+        monkeypatch,
+        tmp_path,
+        "[Printer]\nip_address = 10.0.0.1\nchars_per_line = 48\n"
+        "[Printer:kitchen-1]\naddress = 10.0.0.2\ncapabilities = cutter, logo\n"
+        "[Printer:kitchen-2]\naddress = 10.0.0.3:9101\nchars_per_line = 42\ncodepage = cp437\n"
+        "[Group:kitchen]\nmembers = kitchen-1, kitchen-2\nstrategy = least_queued\n"
+        "[Printers]\ndefault = kitchen\n",
+    )
+    registry = load_printers()
+    assert list(registry.profiles) == ["default", "kitchen-1", "kitchen-2"]
+    assert registry.profiles["default"].address == "10.0.0.1"
+    # Options a profile leaves out come from [Printer].
+    assert registry.profiles["kitchen-1"].chars_per_line == 48
+    assert registry.profiles["kitchen-1"].capabilities == {"cutter", "logo"}
+    assert (registry.profiles["kitchen-2"].chars_per_line, registry.profiles["kitchen-2"].codepage) == (42, "cp437")
+    assert registry.groups["kitchen"].members == ("kitchen-1", "kitchen-2")
+    assert registry.groups["kitchen"].strategy == Strategy.LEAST_QUEUED
+    assert registry.default == "kitchen"
+
+
+@pytest.mark.parametrize(
+    ("text", "error"),
+    [
+        ("[Printer:bar]\nchars_per_line = 42\n", "has no address"),
+        ("[Printer:bar]\naddress = 10.0.0.2\n[Group:all]\nmembers = bar, patio\n", "unknown members: patio"),
+        ("[Printer:bar]\naddress = 10.0.0.2\n[Group:all]\nmembers = bar\nstrategy = random\n", "unknown strategy"),
+        ("[Printer:bar]\naddress = 10.0.0.2\n[Printers]\ndefault = patio\n", "'patio' is not a configured"),
+        ("[Printer:bar]\naddress = 10.0.0.2\ncodepage = utf-8\n", "Printer 'bar': Unsupported codepage 'utf-8'"),
+    ],
+)
+def test_invalid_printer_configuration(monkeypatch: pytest.MonkeyPatch, tmp_path: Path, text: str, error: str) -> None:
+    write_config(monkeypatch, tmp_path, text)
+    with pytest.raises(ValueError, match=error):
+        load_printers()
+
+
+def test_router_balances_groups_and_skips_printers_that_are_down(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    write_config(
+        monkeypatch,
+        tmp_path,
+        "[Printer:a]\naddress = 10.0.0.1\n[Printer:b]\naddress = 10.0.0.2\n[Printer:c]\naddress = 10.0.0.3\n"
+        "[Group:rr]\nmembers = a, b, c\n"
+        "[Group:lq]\nmembers = a, b, c\nstrategy = least_queued\n",
+    )
+    down: set[str] = set()
+    depths = {"10.0.0.1": 3, "10.0.0.2": 0, "10.0.0.3": 1}
+    router = PrinterRouter(is_down=down.__contains__, depth=depths.__getitem__)
+
+    def names(target: str) -> list[str]:
+        return [profile.name for profile in router.resolve(target)]
+
+    assert [names("rr")[0] for _ in range(4)] == ["a", "b", "c", "a"]
+    assert names("lq") == ["b", "c", "a"]
+    down.add("10.0.0.2")
+    # A printer that is down is only tried after the others.
+    assert names("lq") == ["c", "a", "b"]
+    assert names("rr")[-1] == "b"
+    # Names that are not configured are printer addresses.
+    assert names("10.0.0.9:9100") == ["10.0.0.9:9100"]
+
+
+def test_router_filters_on_capabilities(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    write_config(
+        monkeypatch,
+        tmp_path,
+        "[Printer:a]\naddress = 10.0.0.1\n[Printer:b]\naddress = 10.0.0.2\ncapabilities = cutter\n"
+        "[Group:all]\nmembers = a, b\n",
+    )
+    router = PrinterRouter()
+    assert [profile.name for profile in router.resolve("all", ["cutter"])] == ["b"]
+    with pytest.raises(NoPrinterError, match="No printer in group 'all' has logo"):
+        router.resolve("all", ["logo"])
+    with pytest.raises(NoPrinterError, match="'a' does not have cutter"):
+        router.resolve("a", ["cutter"])
+    # Without [Printer] or a default there is nothing to print on.
+    with pytest.raises(NoPrinterError, match="Printer IP address not set"):
+        router.resolve()
+
+
+def test_print_queue_fails_over_to_the_next_group_member(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, free_address: str, template_manager: TemplateManager
+) -> None:
+    printer = VirtualPrinter("127.0.0.1:0")
+    printer.start()
+    try:
+        write_config(
+            monkeypatch,
+            tmp_path,
+            f"[Printer:dead]\naddress = {free_address}\n[Printer:live]\naddress = {printer.address}\n"
+            "[Group:counter]\nmembers = dead, live\n",
+        )
+        print_queue = PrintQueue(template_manager)
+        reported: list[JobProfile] = []
+        add_observer(reported.append)
+        try:
+            job = print_queue.submit("counter", "note", {"text": "Hello"})
+            assert job.printer == free_address
+            print_queue.join()
+        finally:
+            remove_observer(reported.append)
+        # The job is reported once, when it finishes, and the handled failover is not an error.
+        assert [(profile.error, profile.spooled) for profile in reported] == [(None, False)]
+        assert job.status == JobStatus.DONE
+        assert job.printer == printer.address
+        assert job.to_dict()["profiles"] == ["live"]
+        deadline = time.monotonic() + 5
+        while printer.receipts < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert printer.receipts == 1
+    finally:
+        printer.stop()
+
+
+def test_job_is_spooled_only_when_every_member_is_unreachable(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, free_address: str, template_manager: TemplateManager
+) -> None:
+    write_config(
+        monkeypatch,
+        tmp_path,
+        f"[Printer:a]\naddress = {free_address}\n[Printer:b]\naddress = 127.0.0.1:1\n[Group:all]\nmembers = a, b\n",
+    )
+    spool = Spool(str(tmp_path / "spool.sqlite3"))
+    try:
+        profiles = PrinterRouter().resolve("all")
+        printed_on, printed = print_with_failover(profiles, "note", {"text": "Hi"}, template_manager, spool=spool)
+        assert (printed_on.name, printed) == ("b", False)
+        assert [job.printer for job in spool.jobs()] == ["127.0.0.1:1"]
+    finally:
+        spool.close()
+
+
+def test_batch_fails_over_past_a_refused_printer(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, template_manager: TemplateManager
+) -> None:
+    printer = VirtualPrinter("127.0.0.1:0")
+    printer.start()
+    try:
+        write_config(
+            monkeypatch,
+            tmp_path,
+            f"[Printer:dead]\naddress = 127.0.0.1:1\n[Printer:live]\naddress = {printer.address}\n"
+            "[Group:counter]\nmembers = dead, live\n",
+        )
+        profiles = PrinterRouter().resolve("counter")
+        with connect_with_failover(profiles, template_manager) as connected:
+            assert connected.ip_address == printer.address
+            results = list(connected.print_many([("note", {"text": "One"}), ("note", {"text": "Two"})]))
+        assert [result.ok for result in results] == [True, True]
+        deadline = time.monotonic() + 5
+        while printer.receipts < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert printer.receipts == 2
+    finally:
+        printer.stop()
+
+
+def test_print_queue_reports_spooled_jobs_once(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, free_address: str, template_manager: TemplateManager
+) -> None:
+    write_config(
+        monkeypatch,
+        tmp_path,
+        f"[Printer:a]\naddress = {free_address}\n[Printer:b]\naddress = 127.0.0.1:1\n[Group:all]\nmembers = a, b\n",
+    )
+    spool = Spool(str(tmp_path / "spool.sqlite3"))
+    reported: list[JobProfile] = []
+    add_observer(reported.append)
+    try:
+        print_queue = PrintQueue(template_manager, spool=spool)
+        job = print_queue.submit("all", "note", {"text": "Hi"})
+        print_queue.join()
+        assert job.status == JobStatus.SPOOLED
+    finally:
+        remove_observer(reported.append)
+        spool.close()
+    assert [(profile.error, profile.spooled) for profile in reported] == [(None, True)]
+
+
+def test_renderer_uses_the_profile_settings(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, template_manager: TemplateManager
+) -> None:
+    write_config(
+        monkeypatch,
+        tmp_path,
+        "[Printer]\nip_address = 10.0.0.1\nchars_per_line = 32\n"
+        "[Printer:wide]\naddress = 10.0.0.2\nchars_per_line = 48\ncodepage = cp437\n",
+    )
+    renderer = TemplateRenderer(template_manager)
+    registry = load_printers()
+    assert renderer.for_profile(registry.profiles["default"]) is renderer
+    wide = renderer.for_profile(registry.profiles["wide"])
+    assert wide is renderer.for_profile(registry.profiles["wide"])
+    assert (wide.chars_per_line, wide.encoder.codepage) == (48, "cp437")
+    # Compiled templates are shared between the renderers.
+    assert wide.env is renderer.env
+
+    def lines(renderer: TemplateRenderer) -> int:
+        segments = renderer.render_from_template("note", {"text": "word " * 18})
+        return "".join(segment.text for segment in segments).count("\n")
+
+    assert lines(wide) < lines(renderer)
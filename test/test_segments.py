@@ -0,0 +1,43 @@
+import copy
+import pickle
+
+import pytest
+
+from tp.segments import DEFAULT_STYLE, Segment, Style
+
+
+def test_styles_are_interned() -> None:
+    assert Style() is DEFAULT_STYLE
+    assert Style(bold=True, font="b") is Style(font="b", bold=True)
+    assert Style(bold=1) is Style(bold=True)  # type: ignore[arg-type]
+    assert Style(bold=True) is not Style(italic=True)
+
+
+def test_style_is_immutable() -> None:
+    style = Style(bold=True)
+    with pytest.raises(AttributeError):
+        style.bold = False
+    assert style.replace(bold=False) is DEFAULT_STYLE
+    assert copy.deepcopy(style) is style
+
+
+def test_style_from_dict_ignores_unknown_properties() -> None:
+    style = Style.from_dict({"align": "center", "bold": True, "colour": "red"})
+    assert style is Style(align="center", bold=True)
+    assert style.to_dict() == {"align": "center", "bold": True}
+    assert Style.from_dict({}) is DEFAULT_STYLE
+
+
+def test_pickled_styles_stay_interned() -> None:
+    segment = Segment("Hi\n", Style(underline=True), b"Hi\n")
+    restored = pickle.loads(pickle.dumps(segment))  # nosec B301
+    assert restored == segment
+    assert restored.style is segment.style
+
+
+def test_segments_are_slotted() -> None:
+    segment = Segment("Hi")
+    assert segment.style is DEFAULT_STYLE
+    assert segment.data is None
+    with pytest.raises(AttributeError):
+        segment.extra = 1  # type: ignore[attr-defined]
@@ -0,0 +1,176 @@
+import socket
+import time
+from collections.abc import Generator
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from tp.printer import ThermalPrinter, encode_segments
+from tp.segments import Segment
+from tp.spool import Spool, SpoolWorker, drain, send_jobs
+from tp.template_manager import TemplateManager
+from tp.virtual_printer import VirtualPrinter
+
+
+@pytest.fixture
+def spool(tmp_path: Path) -> Generator[Spool, None, None]:
+    spool = Spool(str(tmp_path / "spool.sqlite3"), retry_delay=1.0, max_retry_delay=4.0)
+    yield spool
+    spool.close()
+
+
+@pytest.fixture
+def free_address() -> str:
+    # Nothing listens on this port until a test starts a virtual printer there.
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"127.0.0.1:{sock.getsockname()[1]}"
+
+
+@pytest.fixture
+def template_manager(tmp_path: Path) -> TemplateManager:
+    templates_path = tmp_path / "print_templates"
+    templates_path.mkdir()
+    (templates_path / "note.yaml").write_text('segments:\n  - text: "{{ text }}\\n"\n', encoding="utf-8")
+    return TemplateManager(str(templates_path))
+
+
+def wait_for_receipts(printer: VirtualPrinter, count: int) -> None:
+    deadline = time.monotonic() + 5
+    while printer.receipts < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert printer.receipts == count
+
+
+def test_spooled_jobs_survive_reopening(spool: Spool) -> None:
+    first = spool.append("printer:9100", "note", b"one")
+    spool.append("printer:9100", "note", b"two")
+    spool.ack(first.id)
+
+    reopened = Spool(spool.path)
+    assert [job.payload for job in reopened.jobs()] == [b"two"]
+    assert len(reopened) == 1
+    reopened.close()
+
+
+def test_retry_backoff_doubles_up_to_the_limit(spool: Spool) -> None:
+    job = spool.append("printer:9100", "note", b"data")
+    delays = [spool.retry_later(job.id, "offline", now=100.0) - 100.0 for _ in range(5)]
+    assert delays == [1.0, 2.0, 4.0, 4.0, 4.0]
+    stored = spool.get(job.id)
+    assert stored is not None
+    assert stored.attempts == 5
+    assert stored.last_error == "offline"
+
+
+def test_claims_keep_jobs_in_order(spool: Spool) -> None:
+    first = spool.append("printer:9100", "note", b"one")
+    second = spool.append("printer:9100", "note", b"two")
+    spool.append("other:9100", "note", b"three")
+
+    # The oldest job is backing off, so the newer one must wait for it.
+    spool.retry_later(first.id, "offline", now=time.time())
+    assert spool.claim("printer:9100") == []
+    assert sorted(spool.printers()) == ["other:9100", "printer:9100"]
+
+    claimed = spool.claim("printer:9100", due_only=False)
+    assert [job.id for job in claimed] == [first.id, second.id]
+    # Claimed jobs are not handed to a second sender.
+    assert spool.claim("printer:9100", due_only=False) == []
+    spool.release(claimed)
+    assert len(spool.claim("printer:9100", due_only=False)) == 2
+
+
+def test_drain_retries_until_the_printer_is_back(spool: Spool, free_address: str) -> None:
+    payload = encode_segments([Segment("Hello\n")])
+    spool.append(free_address, "note", payload)
+    spool.append(free_address, "note", payload)
+
+    result = drain(spool)
+    assert (result.sent, result.remaining) == (0, 2)
+    assert [job.attempts for job in spool.jobs()] == [1, 0]
+    # The failed job is backing off, so a regular drain leaves the printer alone.
+    assert spool.printers() == [free_address]
+    assert drain(spool).sent == 0
+
+    printer = VirtualPrinter(free_address)
+    printer.start()
+    try:
+        result = drain(spool, force=True)
+        assert (result.sent, result.remaining) == (2, 0)
+        wait_for_receipts(printer, 2)
+    finally:
+        printer.stop()
+    assert len(spool) == 0
+
+
+def test_jobs_are_retried_only_when_nothing_was_written(spool: Spool) -> None:
+    first = spool.append("printer:9100", "note", b"one")
+    second = spool.append("printer:9100", "note", b"two")
+
+    def unreachable() -> None:
+        raise ConnectionRefusedError("refused")
+
+    sent = send_jobs(spool, spool.claim("printer:9100"), lambda payload: None, unreachable)
+    assert sent == 0
+    assert [job.attempts for job in spool.jobs()] == [1, 0]
+
+    written: list[bytes] = []
+
+    def send(payload: bytes) -> None:
+        written.append(payload)
+        raise BrokenPipeError("broken pipe")
+
+    with pytest.raises(BrokenPipeError):
+        send_jobs(spool, spool.claim("printer:9100", due_only=False), send, lambda: None)
+    # The first job may have partly printed, so it is dropped instead of being sent again.
+    assert written == [b"one"]
+    assert spool.get(first.id) is None
+    assert [job.id for job in spool.claim("printer:9100", due_only=False)] == [second.id]
+
+
+def test_drain_counts_jobs_that_failed_part_way(spool: Spool) -> None:
+    spool.append("printer:9100", "note", b"one")
+    spool.append("printer:9100", "note", b"two")
+    pool = MagicMock()
+    pool.acquire.return_value._raw.side_effect = BrokenPipeError("broken pipe")
+
+    result = drain(spool, pool)
+    assert (result.sent, result.failed, result.remaining) == (0, 1, 1)
+    assert [job.payload for job in spool.jobs()] == [b"two"]
+    pool.release.assert_called_once_with("printer:9100", pool.acquire.return_value, discard=True)
+
+
+def test_printer_spools_jobs_while_unreachable(
+    spool: Spool, free_address: str, template_manager: TemplateManager
+) -> None:
+    with ThermalPrinter(free_address, template_manager, spool=spool) as printer:
+        assert printer.print_template("note", {"text": "first"}) is False
+    assert [job.template_name for job in spool.jobs()] == ["note"]
+
+    virtual_printer = VirtualPrinter(free_address)
+    virtual_printer.start()
+    try:
+        with ThermalPrinter(free_address, template_manager, spool=spool) as printer:
+            assert printer.print_template("note", {"text": "second"}) is True
+        wait_for_receipts(virtual_printer, 2)
+        texts = [event["text"] for event in virtual_printer.events if event["type"] == "text"]
+        # The spooled job is printed before the new one.
+        assert texts == ["first\n", "second\n"]
+    finally:
+        virtual_printer.stop()
+    assert len(spool) == 0
+
+
+def test_spool_worker_drains_in_the_background(spool: Spool, free_address: str) -> None:
+    spool.append(free_address, "note", encode_segments([Segment("Hi\n")]))
+    printer = VirtualPrinter(free_address)
+    printer.start()
+    worker = SpoolWorker(spool, interval=0.01)
+    worker.start()
+    try:
+        wait_for_receipts(printer, 1)
+    finally:
+        worker.stop()
+        printer.stop()
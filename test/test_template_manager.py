@@ -1,6 +1,8 @@
+import json
 import os
 from collections.abc import Generator
 from pathlib import Path
+from unittest.mock import MagicMock
 
 import pytest
 
@@ -72,3 +74,99 @@ def test_list_templates(template_dir: str) -> None:
     assert len(templates_list) == 2
     assert "template1" in templates_list
     assert "template2" in templates_list
+
+
+def test_template_index_is_reused_across_instances(template_dir: str, tmp_path: Path, mocker: MagicMock) -> None:
+    for name in ("template1", "template2"):
+        with open(os.path.join(template_dir, f"{name}.yaml"), "w", encoding="utf-8") as f:
+            f.write(f"name: {name}\n")
+    cache_dir = str(tmp_path / "cache")
+    TemplateManager(template_dir, cache_dir=cache_dir)
+
+    parse = mocker.spy(TemplateManager, "_parse")
+    manager = TemplateManager(template_dir, cache_dir=cache_dir)
+    assert not parse.called
+    assert manager.get_template("template1")["name"] == "template1"
+    assert manager.get_template("template2")["name"] == "template2"
+
+
+def test_template_index_reparses_only_changed_files(template_dir: str, tmp_path: Path, mocker: MagicMock) -> None:
+    for name in ("template1", "template2"):
+        with open(os.path.join(template_dir, f"{name}.yaml"), "w", encoding="utf-8") as f:
+            f.write(f"name: {name}\n")
+    cache_dir = str(tmp_path / "cache")
+    TemplateManager(template_dir, cache_dir=cache_dir)
+
+    with open(os.path.join(template_dir, "template2.yaml"), "w", encoding="utf-8") as f:
+        f.write("name: Changed template\n")
+    with open(os.path.join(template_dir, "template3.yaml"), "w", encoding="utf-8") as f:
+        f.write("name: template3\n")
+    os.remove(os.path.join(template_dir, "template1.yaml"))
+
+    parse = mocker.spy(TemplateManager, "_parse")
+    manager = TemplateManager(template_dir, cache_dir=cache_dir)
+    assert sorted(call.args[0] for call in parse.call_args_list) == [
+        os.path.join(template_dir, "template2.yaml"),
+        os.path.join(template_dir, "template3.yaml"),
+    ]
+    assert sorted(manager.list_templates()) == ["template2", "template3"]
+    assert manager.get_template("template2")["name"] == "Changed template"
+
+
+def test_unreadable_template_index_is_ignored(template_dir: str, tmp_path: Path) -> None:
+    with open(os.path.join(template_dir, "template1.yaml"), "w", encoding="utf-8") as f:
+        f.write("name: template1\n")
+    manager = TemplateManager(template_dir, cache_dir=str(tmp_path / "cache"))
+    assert manager.index_path is not None
+    with open(manager.index_path, "wb") as f:
+        f.write(b"not a pickle")
+
+    manager = TemplateManager(template_dir, cache_dir=str(tmp_path / "cache"))
+    assert manager.list_templates() == ["template1"]
+
+
+def test_template_index_is_plain_validated_json(template_dir: str, tmp_path: Path, mocker: MagicMock) -> None:
+    with open(os.path.join(template_dir, "template1.yaml"), "w", encoding="utf-8") as f:
+        f.write("name: template1\n")
+    manager = TemplateManager(template_dir, cache_dir=str(tmp_path / "cache"))
+    assert manager.index_path is not None
+    with open(manager.index_path, encoding="utf-8") as f:
+        data = json.load(f)
+    (entry,) = data["files"].values()
+    assert entry[2] == {"name": "template1"}
+
+    # A malformed entry makes the whole index unusable, so every template is parsed again.
+    entry[2] = "not a template"
+    with open(manager.index_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    parse = mocker.spy(TemplateManager, "_parse")
+    manager = TemplateManager(template_dir, cache_dir=str(tmp_path / "cache"))
+    assert parse.call_count == 1
+    assert manager.get_template("template1") == {"name": "template1"}
+
+
+def test_templates_json_cannot_hold_are_not_indexed(template_dir: str, tmp_path: Path, mocker: MagicMock) -> None:
+    with open(os.path.join(template_dir, "dated.yaml"), "w", encoding="utf-8") as f:
+        f.write("name: dated\ncreated: 2024-01-01\n")
+    TemplateManager(template_dir, cache_dir=str(tmp_path / "cache"))
+
+    parse = mocker.spy(TemplateManager, "_parse")
+    manager = TemplateManager(template_dir, cache_dir=str(tmp_path / "cache"))
+    assert parse.call_count == 1
+    assert str(manager.get_template("dated")["created"]) == "2024-01-01"
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="ownership checks need POSIX")
+def test_template_index_is_not_read_from_a_shared_directory(
+    template_dir: str, tmp_path: Path, mocker: MagicMock
+) -> None:
+    with open(os.path.join(template_dir, "template1.yaml"), "w", encoding="utf-8") as f:
+        f.write("name: template1\n")
+    cache_dir = tmp_path / "cache"
+    TemplateManager(template_dir, cache_dir=str(cache_dir))
+    cache_dir.chmod(0o777)
+
+    parse = mocker.spy(TemplateManager, "_parse")
+    manager = TemplateManager(template_dir, cache_dir=str(cache_dir))
+    assert parse.call_count == 1
+    assert manager.get_template("template1") == {"name": "template1"}
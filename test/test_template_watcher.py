@@ -0,0 +1,68 @@
+import os
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from tp.template_manager import TemplateManager
+from tp.template_watcher import TemplateWatcher
+
+
+@pytest.fixture
+def template_manager(tmp_path: Path) -> TemplateManager:
+    templates_path = tmp_path / "print_templates"
+    templates_path.mkdir()
+    for name in ("template1", "template2"):
+        (templates_path / f"{name}.yaml").write_text(f"name: {name}\n", encoding="utf-8")
+    return TemplateManager(str(templates_path))
+
+
+def test_refresh_swaps_only_changed_templates(template_manager: TemplateManager) -> None:
+    previous = template_manager.templates
+    with open(os.path.join(template_manager.template_dir, "template2.yaml"), "w", encoding="utf-8") as f:
+        f.write("name: Changed template with a longer name\n")
+
+    assert template_manager.refresh() == {"template2"}
+    assert template_manager.templates is not previous
+    assert template_manager.templates["template1"] is previous["template1"]
+    assert template_manager.get_template("template2")["name"] == "Changed template with a longer name"
+
+
+def test_refresh_without_changes_keeps_templates(template_manager: TemplateManager) -> None:
+    previous = template_manager.templates
+    assert template_manager.refresh() == set()
+    assert template_manager.templates is previous
+
+
+def test_watcher_check_keeps_templates_on_invalid_yaml(template_manager: TemplateManager) -> None:
+    previous = template_manager.templates
+    with open(os.path.join(template_manager.template_dir, "template2.yaml"), "w", encoding="utf-8") as f:
+        f.write("name: [unclosed\n")
+
+    assert TemplateWatcher(template_manager).check() == set()
+    assert template_manager.templates is previous
+
+
+def test_polling_watcher_picks_up_new_template(template_manager: TemplateManager) -> None:
+    with patch("tp.template_watcher.INotify", None):
+        watcher = TemplateWatcher(template_manager, interval=0.01)
+        watcher.start()
+    try:
+        with open(os.path.join(template_manager.template_dir, "template3.yaml"), "w", encoding="utf-8") as f:
+            f.write("name: template3\n")
+        deadline = time.monotonic() + 2
+        while "template3" not in template_manager.templates and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert "template3" in template_manager.templates
+    finally:
+        watcher.stop()
+
+
+def test_watcher_start_is_idempotent(template_manager: TemplateManager) -> None:
+    with patch("tp.template_watcher.threading.Thread") as thread:
+        thread.return_value = MagicMock(is_alive=MagicMock(return_value=True))
+        watcher = TemplateWatcher(template_manager)
+        watcher.start()
+        watcher.start()
+        assert thread.call_count == 1
@@ -0,0 +1,61 @@
+from tp.segments import DEFAULT_STYLE, Segment, Style
+from tp.text_wrap import LineWrapper
+
+
+def test_wrap_breaks_at_whitespace() -> None:
+    wrapper = LineWrapper(10)
+    assert wrapper.wrap([Segment("hello world foo bar baz")]) == [Segment("hello\nworld foo\nbar baz")]
+
+
+def test_wrap_keeps_short_text_unchanged() -> None:
+    wrapper = LineWrapper(32)
+    segments = [Segment("Hello there", Style(bold=True)), Segment(", Alice!\n")]
+    assert wrapper.wrap(segments) == segments
+
+
+def test_wrap_resets_column_on_newline() -> None:
+    wrapper = LineWrapper(10)
+    assert wrapper.wrap([Segment("line one\nline two is long")]) == [Segment("line one\nline two\nis long")]
+
+
+def test_wrap_uses_style_widths() -> None:
+    wrapper = LineWrapper(10)
+    assert wrapper.columns(DEFAULT_STYLE) == 10
+    assert wrapper.columns(Style(double_width=True)) == 5
+    assert wrapper.columns(Style(font="b")) == 13
+    assert wrapper.wrap([Segment("abcdefghijk", Style(double_width=True))]) == [
+        Segment("abcde\nfghij\nk", Style(double_width=True))
+    ]
+    assert wrapper.wrap([Segment("one two three four", Style(font="b"))]) == [
+        Segment("one two three\nfour", Style(font="b"))
+    ]
+
+
+def test_wrap_breaks_in_earlier_segment_for_styled_word() -> None:
+    wrapper = LineWrapper(10)
+    segments = [
+        Segment("aaaa bbbbb"),
+        Segment("cc", Style(bold=True)),
+        Segment(" d"),
+    ]
+    assert wrapper.wrap(segments) == [
+        Segment("aaaa\nbbbbb"),
+        Segment("cc", Style(bold=True)),
+        Segment(" d"),
+    ]
+
+
+def test_wrap_splits_long_words() -> None:
+    wrapper = LineWrapper(10)
+    assert wrapper.wrap([Segment("abcdefghijklmnopqrstuvwxyz")]) == [Segment("abcdefghij\nklmnopqrst\nuvwxyz")]
+    assert LineWrapper(1).wrap([Segment("ab c", Style(double_width=True))]) == [
+        Segment("a\nb\nc", Style(double_width=True))
+    ]
+
+
+def test_wrap_passes_pre_encoded_segments_through() -> None:
+    wrapper = LineWrapper(8)
+    static = Segment("-----------\n", data=b"cached")
+    wrapped = wrapper.wrap([Segment("title\n"), static, Segment("x")])
+    assert wrapped[1] is static
+    assert wrapped[2] == Segment("x")
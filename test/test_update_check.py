@@ -0,0 +1,100 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Generator
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from tp import update_check
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path: Path) -> Generator[Path, None, None]:
+    with patch("tp.update_check.get_cache_dir", return_value=str(tmp_path)):
+        yield tmp_path
+
+
+def write_state(cache_dir: Path, **state: object) -> None:
+    (cache_dir / update_check.STATE_FILENAME).write_text(json.dumps(state), encoding="utf-8")
+
+
+def test_fresh_cached_answer_does_not_refresh(cache_dir: Path, mocker: MagicMock) -> None:
+    start_refresh = mocker.patch("tp.update_check.start_refresh")
+    write_state(cache_dir, latest_version="1.2.3", checked_at=time.time())
+    assert update_check.is_update_available("1.0.0") is True
+    assert update_check.is_update_available("1.2.3") is False
+    assert not start_refresh.called
+
+
+def test_stale_answer_starts_background_refresh(cache_dir: Path, mocker: MagicMock) -> None:
+    start_refresh = mocker.patch("tp.update_check.start_refresh")
+    write_state(cache_dir, latest_version="1.2.3", checked_at=time.time() - update_check.CHECK_INTERVAL - 1)
+    assert update_check.is_update_available("1.0.0") is True
+    start_refresh.assert_called_once_with()
+
+
+def test_missing_state_answers_no_update(mocker: MagicMock) -> None:
+    start_refresh = mocker.patch("tp.update_check.start_refresh")
+    assert update_check.is_update_available("1.0.0") is False
+    assert start_refresh.called
+
+
+def test_refresh_stores_latest_version(cache_dir: Path, mocker: MagicMock) -> None:
+    get_latest_version = mocker.patch("tp.utils.get_latest_version", return_value="2.0.0")
+    update_check.start_refresh("http://127.0.0.1:8000/releases/latest").join()
+    get_latest_version.assert_called_once_with("http://127.0.0.1:8000/releases/latest")
+    state = update_check.read_state()
+    assert state["latest_version"] == "2.0.0"
+    assert state["checked_at"] <= time.time()
+
+
+def test_failed_refresh_is_remembered(cache_dir: Path, mocker: MagicMock) -> None:
+    write_state(cache_dir, latest_version="1.2.3", checked_at=0)
+    mocker.patch("tp.utils.get_latest_version", side_effect=RuntimeWarning("offline"))
+    update_check.refresh()
+    state = update_check.read_state()
+    assert state["latest_version"] == "1.2.3"
+    assert state["error"] == "offline"
+    assert state["checked_at"] > 0
+
+
+def test_refresh_finishes_when_the_process_exits_first(tmp_path: Path) -> None:
+    class Releases(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            body = json.dumps({"tag_name": "v9.9.9"}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Releases)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        (tmp_path / "tp_config.ini").write_text(
+            f"[Cache]\ndirectory = {tmp_path / 'cache'}\n"
+            f"[Updates]\nreleases_url = http://127.0.0.1:{server.server_port}/releases/latest\n",
+            encoding="utf-8",
+        )
+        # The process exits right after starting the refresh, as a quick CLI command does.
+        code = "from tp.update_check import is_update_available; print(is_update_available('1.0.0'))"
+        env = {**os.environ, "PYTHONPATH": str(Path(__file__).resolve().parents[1])}
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=tmp_path, env=env, capture_output=True, text=True, check=True, timeout=30
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert result.stdout.strip() == "False"
+    state = json.loads((tmp_path / "cache" / update_check.STATE_FILENAME).read_text(encoding="utf-8"))
+    assert state["latest_version"] == "9.9.9"
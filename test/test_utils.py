@@ -1,8 +1,10 @@
+import os
 from pathlib import Path
 from unittest.mock import MagicMock
 
 import pytest
 
+from tp.segments import Segment, Style
 from tp.template_manager import TemplateManager
 from tp.utils import TemplateRenderer, compute_agenda_variables, get_latest_version, is_new_version_available
 
@@ -43,10 +45,10 @@ def test_template_renderer_markdown_parsing(template_manager: TemplateManager) -
     segments = renderer.render_from_template("test_template", context)
 
     assert segments == [
-        {"styles": {"bold": True}, "text": "Hello there"},
-        {"styles": {}, "text": ", Alice!"},
-        {"styles": {}, "text": "\n"},
-        {"styles": {}, "text": "Nice to meet you."},
+        Segment("Hello there", Style(bold=True)),
+        Segment(", Alice!"),
+        Segment("\n"),
+        Segment("Nice to meet you."),
     ]
 
 
@@ -57,10 +59,10 @@ def test_template_renderer_special_letters_disabled(template_manager: TemplateMa
     segments = renderer.render_from_template("test_template", context)
 
     assert segments == [
-        {"styles": {"bold": True}, "text": "Hello there"},
-        {"styles": {}, "text": ", Zazolc gesla jazn!"},
-        {"styles": {}, "text": "\n"},
-        {"styles": {}, "text": "Nice to meet you."},
+        Segment("Hello there", Style(bold=True)),
+        Segment(", Zazolc gesla jazn!"),
+        Segment("\n"),
+        Segment("Nice to meet you."),
     ]
 
 
@@ -93,3 +95,103 @@ def test_template_renderer_missing_template(template_manager: TemplateManager) -
     renderer = TemplateRenderer(template_manager)
     with pytest.raises(ValueError, match="Template 'nonexistent' not found."):
         renderer.render_from_template("nonexistent", {})
+
+
+def test_template_renderer_reuses_compiled_segments(template_manager: TemplateManager) -> None:
+    renderer = TemplateRenderer(template_manager)
+    renderer.render_from_template("test_template", {"name": "Alice"})
+    compiled = renderer.env.get_template("test_template/0")
+    renderer.render_from_template("test_template", {"name": "Bob"})
+    assert renderer.env.get_template("test_template/0") is compiled
+
+
+def test_template_renderer_recompiles_after_reload(template_manager: TemplateManager) -> None:
+    renderer = TemplateRenderer(template_manager)
+    compiled = renderer.env.get_template("test_template/0")
+    template_file = Path(template_manager.template_dir) / "test_template.yaml"
+    template_file.write_text('segments:\n  - text: "Bye {{ name }}"\n', encoding="utf-8")
+    template_manager.templates = template_manager.load_templates()
+
+    assert renderer.env.get_template("test_template/0") is not compiled
+    segments = renderer.render_from_template("test_template", {"name": "Alice"})
+    assert segments == [Segment("Bye Alice")]
+
+
+def test_template_renderer_bytecode_cache(template_manager: TemplateManager, tmp_path: Path, mocker: MagicMock) -> None:
+    mocker.patch("tp.utils.get_template_bytecode_cache", return_value=True)
+    mocker.patch("tp.utils.get_cache_dir", return_value=str(tmp_path / "cache"))
+    renderer = TemplateRenderer(template_manager)
+    renderer.render_from_template("test_template", {"name": "Alice"})
+    assert list((tmp_path / "cache" / "jinja").iterdir())
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="ownership checks need POSIX")
+def test_template_renderer_skips_a_shared_bytecode_cache(
+    template_manager: TemplateManager, tmp_path: Path, mocker: MagicMock
+) -> None:
+    mocker.patch("tp.utils.get_template_bytecode_cache", return_value=True)
+    mocker.patch("tp.utils.get_cache_dir", return_value=str(tmp_path / "cache"))
+    shared = tmp_path / "cache" / "jinja"
+    shared.mkdir(parents=True)
+    shared.chmod(0o777)
+    renderer = TemplateRenderer(template_manager)
+    assert renderer.env.bytecode_cache is None
+    assert renderer.render_from_template("test_template", {"name": "Alice"})
+
+
+def test_get_latest_version_from_custom_url(mocker: MagicMock) -> None:
+    mock_response = mocker.Mock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {"tag_name": "2.0.0"}
+    mock_get = mocker.patch("tp.utils.requests.get", return_value=mock_response)
+    assert get_latest_version("http://127.0.0.1:8000/releases/latest") == "2.0.0"
+    mock_get.assert_called_once_with("http://127.0.0.1:8000/releases/latest", timeout=5)
+
+
+@pytest.fixture
+def divider_manager(tmp_path: Path) -> TemplateManager:
+    templates_path = tmp_path / "divider_templates"
+    templates_path.mkdir()
+    (templates_path / "note.yaml").write_text(
+        """
+segments:
+  - text: "{{ title }}\\n"
+    styles: {bold: true}
+  - text: "----------\\n"
+    styles: {align: center}
+  - text: "{{ text }}"
+  - text: "Zażółć\\n"
+""",
+        encoding="utf-8",
+    )
+    return TemplateManager(str(templates_path))
+
+
+def test_template_renderer_prerenders_static_segments(divider_manager: TemplateManager, mocker: MagicMock) -> None:
+    mocker.patch("tp.utils.get_enable_special_letters", return_value=True)
+    renderer = TemplateRenderer(divider_manager)
+    segments = renderer.render_from_template("note", {"title": "Hi", "text": "Body"})
+
+    divider = segments[1]
+    assert divider.text == "----------\n"
+    assert divider.data == renderer.encoder.encode("----------\n")
+    # The last static segment follows text without a line break, so it is rendered in place.
+    assert segments[3].data is None
+    assert segments[3].text == "Zażółć\n"
+
+    again = renderer.render_from_template("note", {"title": "Bye", "text": "Body\n"})
+    assert again[1] is divider
+    assert again[3].data == renderer.encoder.encode("Zażółć\n")
+
+
+def test_template_renderer_static_segments_follow_settings(divider_manager: TemplateManager, mocker: MagicMock) -> None:
+    mocker.patch("tp.utils.get_enable_special_letters", return_value=True)
+    renderer = TemplateRenderer(divider_manager)
+    template = divider_manager.templates["note"]
+    static = renderer.static_segments("note", template)
+    assert sorted(static) == [1, 3]
+    assert renderer.static_segments("note", template) is static
+
+    mocker.patch("tp.utils.get_enable_special_letters", return_value=False)
+    renderer.reload_settings()
+    assert renderer.static_segments("note", template)[3].text == "Zazolc\n"
@@ -0,0 +1,86 @@
+import json
+import time
+from collections.abc import Generator
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from tp.encoding import CodepageEncoder
+from tp.printer import ThermalPrinter, encode_segments
+from tp.segments import Segment, Style
+from tp.template_manager import TemplateManager
+from tp.virtual_printer import EscPosParser, VirtualPrinter
+
+
+@pytest.fixture
+def virtual_printer(tmp_path: Path) -> Generator[VirtualPrinter, None, None]:
+    printer = VirtualPrinter("127.0.0.1:0", log_file=str(tmp_path / "events.jsonl"))
+    printer.start()
+    yield printer
+    printer.stop()
+
+
+def wait_for_receipts(printer: VirtualPrinter, count: int) -> None:
+    deadline = time.monotonic() + 5
+    while printer.receipts < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert printer.receipts == count
+
+
+def test_parser_decodes_text_styles_and_cuts() -> None:
+    payload = encode_segments(
+        [
+            Segment("Title\n", Style(align="center", bold=True, double_width=True)),
+            Segment("Zażółć\n", Style(font="b", italic=True)),
+        ],
+        encoder=CodepageEncoder("cp852"),
+    )
+    events = EscPosParser().feed(payload)
+    texts = [event for event in events if event["type"] == "text"]
+
+    assert [event["text"] for event in texts] == ["Title\n", "Zażółć\n"]
+    assert texts[0]["styles"]["align"] == "center"
+    assert texts[0]["styles"]["bold"] is True
+    assert texts[0]["styles"]["double_width"] is True
+    assert texts[0]["styles"]["double_height"] is False
+    assert texts[1]["styles"]["font"] == "b"
+    assert texts[1]["styles"]["invert"] is True
+    assert texts[1]["styles"]["bold"] is False
+    assert events[-1] == {"type": "cut", "partial": False}
+
+
+def test_parser_handles_commands_split_across_chunks() -> None:
+    parser = EscPosParser()
+    payload = b"\x1bE\x01bold\x1bE\x00plain\x1dV\x00"
+    events = [event for byte in payload for event in parser.feed(bytes([byte]))]
+    assert [(event["type"], event.get("text")) for event in events] == [
+        ("text", "bold"),
+        ("text", "plain"),
+        ("cut", None),
+    ]
+    assert events[0]["styles"]["bold"] is True
+
+
+def test_virtual_printer_records_print_jobs(virtual_printer: VirtualPrinter, tmp_path: Path) -> None:
+    templates_path = tmp_path / "print_templates"
+    templates_path.mkdir()
+    (templates_path / "note.yaml").write_text('segments:\n  - text: "Hello {{ name }}\\n"\n', encoding="utf-8")
+    template_manager = TemplateManager(str(templates_path))
+
+    with ThermalPrinter(virtual_printer.address, template_manager) as printer:
+        printer.print_template("note", {"name": "Alice"})
+        printer.print_template("note", {"name": "Bob"})
+    wait_for_receipts(virtual_printer, 2)
+
+    texts = [event["text"] for event in virtual_printer.events if event["type"] == "text"]
+    assert texts == ["Hello Alice\n", "Hello Bob\n"]
+    logged = [json.loads(line) for line in (tmp_path / "events.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert [event["type"] for event in logged].count("cut") == 2
+
+
+def test_virtual_printer_simulates_line_rate(mocker: MagicMock) -> None:
+    sleep = mocker.patch("tp.virtual_printer.time.sleep")
+    printer = VirtualPrinter(line_rate=10)
+    printer._simulate_feed([{"type": "text", "text": "a\nb\n"}, {"type": "feed", "lines": 3}])
+    sleep.assert_called_once_with(0.5)
@@ -1,9 +1,12 @@
 from collections.abc import Generator
-from unittest.mock import MagicMock, patch
+from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 from flask.testing import FlaskClient
 
+from tp import config
+from tp.print_queue import PrintJob
 from tp.web_app import app
 
 
@@ -15,15 +18,10 @@ def client() -> Generator[FlaskClient, None, None]:
 
 
 @pytest.fixture
-def mock_printer() -> Generator[MagicMock, None, None]:
-    with patch("tp.web_app.ThermalPrinter") as mock_printer_class:
-        yield mock_printer_class
-
-
-@pytest.fixture
-def mock_get_printer_ip() -> Generator[None, None, None]:
-    with patch("tp.web_app.get_printer_ip", return_value="192.168.1.100"):
-        yield
+def kitchen_printer(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    path = tmp_path / "tp_config.ini"
+    path.write_text("[Printer:kitchen]\naddress = 10.0.0.2\n", encoding="utf-8")
+    monkeypatch.setattr(config, "CONFIG_FILE", str(path))
 
 
 def test_index_route(client: FlaskClient) -> None:
@@ -41,24 +39,61 @@ def test_print_template_route_get(client: FlaskClient) -> None:
         assert b"Print" in response.data
 
 
-def test_print_template_route_post(client: FlaskClient, mock_printer: MagicMock, mock_get_printer_ip: None) -> None:
-    with patch("tp.web_app.template_manager") as mock_template_manager:
+def test_print_template_route_post(client: FlaskClient, kitchen_printer: None) -> None:
+    with patch("tp.web_app.template_manager") as mock_template_manager, patch("tp.web_app.print_queue") as mock_queue:
         mock_template_manager.get_template.return_value = {
             "name": "Sample",
             "variables": [{"name": "title", "description": "Title"}],
             "segments": [{"text": "{{ title }}", "styles": {}}],
         }
+        mock_queue.submit.return_value.id = "abc123"
         data = {"title": "Test Title"}
         response = client.post("/print/sample", data=data, follow_redirects=True)
         assert response.status_code == 200
-        assert mock_printer.return_value.__enter__.return_value.print_template.called
+        assert b"Queued print job abc123" in response.data
+        mock_queue.submit.assert_called_with(None, "sample", {"title": "Test Title"})
+
+        client.post("/print/sample", data={**data, "printer": "kitchen"})
+        mock_queue.submit.assert_called_with("kitchen", "sample", {"title": "Test Title"})
+
+
+def test_print_template_route_rejects_unconfigured_printers(client: FlaskClient, kitchen_printer: None) -> None:
+    with patch("tp.web_app.template_manager") as mock_template_manager, patch("tp.web_app.print_queue") as mock_queue:
+        mock_template_manager.get_template.return_value = {"name": "Sample", "variables": [], "segments": []}
+        response = client.post("/print/sample", data={"printer": "10.0.0.5:22"}, follow_redirects=True)
+        assert b"Unknown printer &#39;10.0.0.5:22&#39;. Use one of: kitchen" in response.data
+        assert not mock_queue.submit.called
+
+
+def test_job_status_route(client: FlaskClient) -> None:
+    job = PrintJob(printer="192.168.1.100", template_name="sample", context={"title": "Test Title"})
+    with patch("tp.web_app.print_queue") as mock_queue:
+        mock_queue.get.return_value = job
+        mock_queue.jobs.return_value = [job]
+        response = client.get(f"/jobs/{job.id}")
+        assert response.status_code == 200
+        assert response.json is not None
+        assert response.json["status"] == "queued"
+        assert response.json["template_name"] == "sample"
+        assert "context" not in response.json
+        response = client.get("/jobs")
+        assert response.json is not None
+        assert [item["id"] for item in response.json] == [job.id]
+
+
+def test_job_status_route_not_found(client: FlaskClient) -> None:
+    with patch("tp.web_app.print_queue") as mock_queue:
+        mock_queue.get.return_value = None
+        response = client.get("/jobs/missing")
+        assert response.status_code == 404
 
 
 def test_settings_route_get(client: FlaskClient) -> None:
-    with patch("tp.web_app.get_printer_ip", return_value="192.168.1.100"), patch(
-        "tp.web_app.get_chars_per_line", return_value=32
-    ), patch("tp.web_app.get_enable_special_letters", return_value=True), patch(
-        "tp.web_app.get_check_for_updates", return_value=True
+    with (
+        patch("tp.web_app.get_printer_ip", return_value="192.168.1.100"),
+        patch("tp.web_app.get_chars_per_line", return_value=32),
+        patch("tp.web_app.get_enable_special_letters", return_value=True),
+        patch("tp.web_app.get_check_for_updates", return_value=True),
     ):
         response = client.get("/settings")
         assert response.status_code == 200
@@ -74,15 +109,61 @@ def test_settings_route_post(client: FlaskClient) -> None:
         "enable_special_letters": "False",
         "check_for_updates": "True",
     }
-    with patch("tp.web_app.set_printer_ip") as mock_set_ip, patch(
-        "tp.web_app.set_chars_per_line"
-    ) as mock_set_chars, patch("tp.web_app.set_enable_special_letters") as mock_set_enable, patch(
-        "tp.web_app.set_check_for_updates"
-    ) as mock_set_check:
+    with patch("tp.config.update") as mock_update:
         response = client.post("/settings", data=data, follow_redirects=True)
         assert response.status_code == 200
         assert b"Settings saved." in response.data
-        mock_set_ip.assert_called_with("192.168.1.101")
-        mock_set_chars.assert_called_with(48)
-        mock_set_enable.assert_called_with(False)
-        mock_set_check.assert_called_with(True)
+        mock_update.assert_called_once_with(
+            printer_ip="192.168.1.101",
+            chars_per_line=48,
+            enable_special_letters=False,
+            check_for_updates=True,
+        )
+
+
+def test_settings_route_post_invalid_value_saves_nothing(client: FlaskClient) -> None:
+    data = {
+        "ip_address": "192.168.1.101",
+        "chars_per_line": "48",
+        "enable_special_letters": "maybe",
+        "check_for_updates": "True",
+    }
+    with patch("tp.config.update") as mock_update:
+        response = client.post("/settings", data=data, follow_redirects=True)
+        assert b"Invalid value for enable special letters" in response.data
+        assert not mock_update.called
+
+
+def test_metrics_route(client: FlaskClient) -> None:
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert b"# TYPE tp_jobs_total counter" in response.data
+    assert b"tp_queue_depth" in response.data
+
+
+def test_health_route(client: FlaskClient) -> None:
+    from tp.health import HealthMonitor
+
+    monitor = HealthMonitor(lambda: ["192.168.1.100"], failures_before_down=1)
+    with patch("tp.web_app.health_monitor", monitor):
+        response = client.get("/health")
+        assert response.json == {
+            "status": "ok",
+            "printers": [
+                {
+                    "address": "192.168.1.100",
+                    "state": "unknown",
+                    "checked_at": None,
+                    "latency": None,
+                    "paper": None,
+                    "error": None,
+                    "failures": 0,
+                }
+            ],
+        }
+        monitor.record("192.168.1.100", "timed out")
+        response = client.get("/health")
+        assert response.json is not None
+        assert response.json["status"] == "degraded"
+        assert response.json["printers"][0]["state"] == "down"
@@ -10,25 +10,40 @@ from tp import __version__
 from tp.config import (
     CONFIG_FILE,
     PRINT_TEMPLATE_FOLDER,
+    get_cache_dir,
     get_chars_per_line,
     get_check_for_updates,
+    get_codepage,
+    get_daemon_socket,
+    get_default_printer,
     get_enable_special_letters,
+    get_health_timeout,
     get_printer_ip,
+    get_spool_enabled,
+    get_spool_path,
+    get_virtual_printer_address,
+    get_virtual_printer_enabled,
+    get_virtual_printer_line_rate,
+    get_virtual_printer_log_file,
     set_chars_per_line,
     set_check_for_updates,
+    set_codepage,
+    set_default_printer,
     set_enable_special_letters,
     set_printer_ip,
+    set_spool_enabled,
+    set_virtual_printer_enabled,
 )
-from tp.printer import ThermalPrinter
-from tp.template_manager import TemplateManager
-from tp.utils import compute_agenda_variables, is_new_version_available
+
+# Heavy modules (tp.printer, tp.template_manager, tp.utils) are imported inside the commands
+# that need them, so that commands like `tp settings show` start quickly.
 
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
     handlers=[
         logging.StreamHandler(sys.stdout),
-        logging.FileHandler("app.log", encoding="utf-8"),
+        logging.FileHandler("app.log", encoding="utf-8", delay=True),
     ],
 )
 
@@ -38,15 +53,25 @@ app = typer.Typer(help="Thermal Printer Application")
 settings_app = typer.Typer(help="Settings commands")
 config_app = typer.Typer(help="Configuration commands")
 
+daemon_app = typer.Typer(help="Background print daemon commands")
+spool_app = typer.Typer(help="Offline print spool commands")
+
 app.add_typer(settings_app, name="settings")
+app.add_typer(daemon_app, name="daemon")
+app.add_typer(spool_app, name="spool")
 app.add_typer(config_app, name="config")
 
 missing_ip_message = "Printer IP address not set. Please set it using 'settings set-ip'."
+spooled_message = (
+    "Printer unreachable; the job was spooled and will be printed when it is back ('tp spool drain' retries now)."
+)
 
 
 def check_for_updates_on_startup() -> None:
+    from tp.update_check import is_update_available
+
     if get_check_for_updates():  # noqa: SIM102
-        if is_new_version_available(__version__):
+        if is_update_available(__version__):
             update = typer.confirm("A new version is available. Do you want to update?")
             if update:
                 perform_update()
@@ -76,25 +101,64 @@ def perform_update() -> None:
 
 
 @app.command()
-def print_template(template_name: str = typer.Argument(None)) -> None:
+def print_template(
+    template_name: str = typer.Argument(None),
+    printer: str = typer.Option(None, "--printer", "-p", help="Printer profile, group or address to print on"),
+    profile: bool = typer.Option(False, "--profile", help="Show how long each stage of the print took"),
+    no_daemon: bool = typer.Option(False, "--no-daemon", help="Print in-process even when a daemon is running"),
+) -> None:
     """
     Print using a specified template.
     """
-    template_manager = TemplateManager(PRINT_TEMPLATE_FOLDER)
+    from tp.daemon import DaemonClient
+    from tp.instrumentation import JobProfile, profile_job, report
+
+    if printer and not no_daemon:
+        from tp.printers import check_printer_name
+
+        try:
+            check_printer_name(printer)
+        except ValueError:
+            # The daemon only prints on configured printers; a bare address is printed on in-process.
+            no_daemon = True
+    # Forward to a running daemon when there is one; it already has templates and connections warm.
+    daemon = None if no_daemon else DaemonClient(get_daemon_socket())
+    try:
+        reply = daemon.request("templates") if daemon else None
+    except OSError as e:
+        logger.warning(f"The daemon did not answer, printing in-process: {e}")
+        reply = None
+    daemon_templates = reply["templates"] if reply and reply["ok"] else None
+
+    # Prompting for variables is left out of the profile; only loading and printing are measured.
+    job_profile = JobProfile(template_name or "print-template")
+    if daemon_templates is None:
+        from tp.template_manager import TemplateManager
+
+        with profile_job(job_profile.name, job_profile):
+            template_manager = TemplateManager(PRINT_TEMPLATE_FOLDER, cache_dir=get_cache_dir())
     if not template_name:
         typer.echo("Available templates:")
-        for name in template_manager.list_templates():
+        names = list(daemon_templates) if daemon_templates is not None else template_manager.list_templates()
+        for name in names:
             typer.echo(f"- {name}")
         template_name = typer.prompt("Enter the template name")
 
-    template = template_manager.get_template(template_name)
+    if daemon_templates is not None:
+        template = daemon_templates.get(template_name)
+    else:
+        template = template_manager.get_template(template_name)
     if not template:
         typer.echo(f"Template '{template_name}' not found.")
         sys.exit(1)
 
     context = {}
     if template_name == "agenda":
-        context = compute_agenda_variables()
+        # The daemon computes the agenda itself when it receives no context.
+        if daemon_templates is None:
+            from tp.utils import compute_agenda_variables
+
+            context = compute_agenda_variables()
     else:
         for var in template.get("variables", []):
             if var.get("markdown", False):
@@ -104,16 +168,86 @@ def print_template(template_name: str = typer.Argument(None)) -> None:
             context[var["name"]] = value
 
     try:
-        ip_address = get_printer_ip()
-        with ThermalPrinter(ip_address, template_manager) as printer:
-            printer.print_template(template_name, context)
-        typer.echo(f"Printed using template '{template_name}'.")
+        if daemon is not None and daemon_templates is not None:
+            response = daemon.request("print", template=template_name, context=context, printer=printer)
+            if response is None:
+                raise RuntimeError("The daemon stopped before the job was sent.")
+            if not response["ok"]:
+                raise RuntimeError(response["error"])
+            job_profile = JobProfile.from_dict(response["profile"])
+            printed = not response.get("spooled", False)
+        else:
+            from tp.printer import print_with_failover
+            from tp.printers import PrinterRouter
+            from tp.spool import open_spool
+
+            profiles = PrinterRouter().resolve(printer or template.get("printer"), template.get("requires", []))
+            spool = open_spool() if get_spool_enabled() else None
+            job_profile.name = template_name
+            with profile_job(template_name, job_profile):
+                _, printed = print_with_failover(profiles, template_name, context, template_manager, spool=spool)
+            report(job_profile)
+        if printed:
+            typer.echo(f"Printed using template '{template_name}'.")
+        else:
+            typer.echo(spooled_message)
+        if profile:
+            typer.echo(job_profile.format())
     except Exception as e:
         typer.echo(f"Failed to print: {e}")
         logger.error(f"Error printing template '{template_name}': {e}", exc_info=True)
         sys.exit(1)
 
 
+@app.command()
+def print_batch(
+    jobs_file: str = typer.Argument("-", help="JSONL or CSV file with one job per line, or '-' for stdin"),
+    template_name: str = typer.Option(None, "--template", "-t", help="Template for jobs that do not name one"),
+    fmt: str = typer.Option(None, "--format", "-f", help="Job format: jsonl or csv (default: from file extension)"),
+    printer_name: str = typer.Option(None, "--printer", "-p", help="Printer profile, group or address to print on"),
+) -> None:
+    """
+    Print many jobs over a single printer connection.
+    """
+    from tp.batch import detect_format, read_jobs
+    from tp.printer import connect_with_failover
+    from tp.printers import PrinterRouter
+    from tp.spool import open_spool
+    from tp.template_manager import TemplateManager
+
+    fmt = fmt or detect_format(jobs_file)
+    template_manager = TemplateManager(PRINT_TEMPLATE_FOLDER, cache_dir=get_cache_dir())
+    printed = failed = spooled = 0
+    try:
+        profiles = PrinterRouter().resolve(printer_name)
+        spool = open_spool() if get_spool_enabled() else None
+        # click.open_file treats "-" as stdin and leaves it open afterwards.
+        with (
+            click.open_file(jobs_file, encoding="utf-8") as lines,
+            connect_with_failover(profiles, template_manager, spool=spool) as printer,
+        ):
+            for result in printer.print_many(read_jobs(lines, fmt, template_name)):
+                if not result.ok:
+                    failed += 1
+                    typer.echo(f"Job {result.index}: failed: {result.error}")
+                elif result.spooled:
+                    spooled += 1
+                    typer.echo(f"Job {result.index}: spooled, the printer is unreachable.")
+                else:
+                    printed += 1
+                    typer.echo(f"Job {result.index}: printed using template '{result.template_name}'.")
+    except Exception as e:
+        typer.echo(f"Batch aborted after {printed + failed + spooled} jobs: {e}")
+        logger.error(f"Error printing batch from '{jobs_file}': {e}", exc_info=True)
+        sys.exit(1)
+
+    typer.echo(f"Printed {printed} of {printed + failed + spooled} jobs.")
+    if spooled:
+        typer.echo(f"{spooled} jobs were spooled and will be printed when the printer is back.")
+    if failed:
+        sys.exit(1)
+
+
 @settings_app.command("set-ip")
 def set_ip(ip_address: str = typer.Argument(..., help="Printer IP Address")) -> None:
     """
@@ -123,6 +257,27 @@ def set_ip(ip_address: str = typer.Argument(..., help="Printer IP Address")) ->
     typer.echo(f"Printer IP address set to {ip_address}")
 
 
+@settings_app.command("set-default-printer")
+def set_default_printer_command(
+    name: str = typer.Argument(..., help="Printer profile or group for jobs that do not name a printer"),
+) -> None:
+    """
+    Set the printer profile or group that jobs are sent to by default.
+    """
+    from tp.printers import load_printers
+
+    try:
+        registry = load_printers()
+    except ValueError as e:
+        typer.echo(f"Invalid printer configuration: {e}")
+        sys.exit(1)
+    if name not in registry.names():
+        typer.echo(f"Unknown printer '{name}'. Configured printers and groups: {', '.join(registry.names()) or 'none'}")
+        sys.exit(1)
+    set_default_printer(name)
+    typer.echo(f"Default printer set to {name}")
+
+
 @settings_app.command("set-chars-per-line")
 def set_chars_per_line_command(chars_per_line: int = typer.Argument(..., help="Characters Per Line")) -> None:
     """
@@ -143,6 +298,19 @@ def set_enable_special_letters_command(
     typer.echo(f"Enable special letters set to {enable}")
 
 
+@settings_app.command("set-codepage")
+def set_codepage_command(codepage: str = typer.Argument(..., help="Printer codepage, e.g. cp852")) -> None:
+    """
+    Set the printer codepage used for special letters.
+    """
+    try:
+        set_codepage(codepage)
+    except ValueError as e:
+        typer.echo(str(e))
+        sys.exit(1)
+    typer.echo(f"Codepage set to {get_codepage()}")
+
+
 @settings_app.command("set-check-for-updates")
 def set_check_for_updates_command(
     check: bool = typer.Argument(..., help="Enable or disable automatic updates (True/False)"),
@@ -154,6 +322,28 @@ def set_check_for_updates_command(
     typer.echo(f"Check for updates set to {check}")
 
 
+@settings_app.command("set-virtual-printer")
+def set_virtual_printer_command(
+    enable: bool = typer.Argument(..., help="Send print jobs to the virtual printer (True/False)"),
+) -> None:
+    """
+    Send print jobs to the virtual printer instead of the configured printer.
+    """
+    set_virtual_printer_enabled(enable)
+    typer.echo(f"Virtual printer set to {enable}")
+
+
+@settings_app.command("set-spool")
+def set_spool_command(
+    enable: bool = typer.Argument(..., help="Spool jobs for an unreachable printer (True/False)"),
+) -> None:
+    """
+    Keep jobs for an unreachable printer in the spool and retry them later.
+    """
+    set_spool_enabled(enable)
+    typer.echo(f"Spool set to {enable}")
+
+
 @settings_app.command()
 def show() -> None:
     """
@@ -165,11 +355,78 @@ def show() -> None:
         ip_address = "Not set"
     chars_per_line = get_chars_per_line()
     enable_special_letters = get_enable_special_letters()
+    codepage = get_codepage()
     check_for_updates = get_check_for_updates()
     typer.echo(f"Printer IP Address: {ip_address}")
+    default_printer = get_default_printer()
+    if default_printer:
+        typer.echo(f"Default Printer: {default_printer}")
     typer.echo(f"Characters Per Line: {chars_per_line}")
     typer.echo(f"Enable Special Letters: {enable_special_letters}")
+    typer.echo(f"Codepage: {codepage}")
     typer.echo(f"Check for Updates: {check_for_updates}")
+    if get_virtual_printer_enabled():
+        typer.echo(f"Virtual Printer: {get_virtual_printer_address()}")
+    if get_spool_enabled():
+        typer.echo(f"Spool: {get_spool_path()}")
+
+
+@app.command()
+def printers() -> None:
+    """
+    List the configured printer profiles and groups.
+    """
+    from tp.printers import load_printers
+
+    try:
+        registry = load_printers()
+    except ValueError as e:
+        typer.echo(f"Invalid printer configuration: {e}")
+        sys.exit(1)
+    if not registry.profiles:
+        typer.echo(missing_ip_message)
+        sys.exit(1)
+    for profile in registry.profiles.values():
+        default = " (default)" if profile.name == registry.default else ""
+        line = (
+            f"{profile.name}{default}: {profile.address}, {profile.chars_per_line} chars per line, {profile.codepage}"
+        )
+        if profile.capabilities:
+            line += f", {', '.join(sorted(profile.capabilities))}"
+        typer.echo(line)
+    for group in registry.groups.values():
+        default = " (default)" if group.name == registry.default else ""
+        typer.echo(f"{group.name}{default}: {group.strategy} over {', '.join(group.members)}")
+
+
+@app.command()
+def status() -> None:
+    """
+    Show whether the configured printers are reachable.
+    """
+    from tp.daemon import DaemonClient
+    from tp.health import PrinterHealth, configured_printers, probe
+
+    # A running daemon answers from its cached state; otherwise probe the printers now.
+    reply = DaemonClient(get_daemon_socket(), timeout=5).request("health")
+    if reply and reply["ok"]:
+        printers = [PrinterHealth(**printer) for printer in reply["printers"]]
+    else:
+        printers = [probe(address, get_health_timeout()) for address in configured_printers()]
+    if not printers:
+        typer.echo(missing_ip_message)
+        sys.exit(1)
+    for printer in printers:
+        line = f"{printer.address}: {printer.state}"
+        if printer.latency is not None:
+            line += f", connected in {printer.latency * 1000:.1f} ms"
+        if printer.paper:
+            line += f", paper {printer.paper.replace('_', ' ')}"
+        if printer.error and printer.state == "down":
+            line += f" ({printer.error})"
+        typer.echo(line)
+    if any(printer.state == "down" for printer in printers):
+        sys.exit(1)
 
 
 @app.command()
@@ -212,6 +469,152 @@ def web() -> None:
         sys.exit(1)
 
 
+@app.command()
+def virtual_printer(
+    address: str = typer.Option(None, help="Address to listen on (default from config, 127.0.0.1:9100)"),
+    line_rate: float = typer.Option(None, help="Simulated print speed in lines per second (0 to disable)"),
+    log_file: str = typer.Option(None, help="Append parsed print events to this JSON lines file"),
+) -> None:
+    """
+    Run a virtual ESC/POS printer that records print jobs instead of printing them.
+    """
+    from tp.virtual_printer import VirtualPrinter
+
+    printer = VirtualPrinter(
+        address or get_virtual_printer_address(),
+        line_rate=get_virtual_printer_line_rate() if line_rate is None else line_rate,
+        log_file=log_file or get_virtual_printer_log_file(),
+    )
+    try:
+        printer.bind()
+    except OSError as e:
+        typer.echo(f"Failed to start virtual printer: {e}")
+        sys.exit(1)
+    typer.echo(f"Virtual printer listening on {printer.address}. Press Ctrl+C to stop.")
+    try:
+        printer.serve_forever()
+    except KeyboardInterrupt:
+        printer.stop()
+    typer.echo(f"Received {printer.bytes_received} bytes, {printer.receipts} receipts.")
+
+
+@daemon_app.command("start")
+def daemon_start() -> None:
+    """
+    Run the print daemon in the foreground, keeping templates and printer connections warm.
+    """
+    from tp.daemon import PrintDaemon
+
+    daemon = PrintDaemon(get_daemon_socket())
+    try:
+        daemon.bind()
+    except (OSError, RuntimeError) as e:
+        typer.echo(f"Failed to start daemon: {e}")
+        sys.exit(1)
+    typer.echo(f"Daemon listening on {daemon.socket_path}. Press Ctrl+C to stop.")
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        typer.echo("Daemon stopped.")
+
+
+@daemon_app.command("stop")
+def daemon_stop() -> None:
+    """
+    Stop a running print daemon.
+    """
+    from tp.daemon import DaemonClient
+
+    if DaemonClient(get_daemon_socket()).request("shutdown") is None:
+        typer.echo("No daemon is running.")
+        sys.exit(1)
+    typer.echo("Daemon stopped.")
+
+
+@daemon_app.command("status")
+def daemon_status() -> None:
+    """
+    Show whether a print daemon is running.
+    """
+    from tp.daemon import DaemonClient
+
+    reply = DaemonClient(get_daemon_socket(), timeout=5).request("ping")
+    if reply is None:
+        typer.echo("No daemon is running.")
+        sys.exit(1)
+    typer.echo(f"Daemon running (pid {reply['pid']}) on {get_daemon_socket()}.")
+
+
+@spool_app.command("list")
+def spool_list() -> None:
+    """
+    List jobs waiting in the spool.
+    """
+    import datetime
+
+    from tp.spool import open_spool
+
+    jobs = open_spool().jobs()
+    if not jobs:
+        typer.echo("The spool is empty.")
+        return
+    for job in jobs:
+        created = datetime.datetime.fromtimestamp(job.created_at).strftime("%Y-%m-%d %H:%M:%S")
+        line = f"{job.id}: '{job.template_name}' for {job.printer}, {len(job.payload)} bytes, spooled {created}"
+        if job.attempts:
+            line += f", {job.attempts} attempts, last error: {job.last_error}"
+        typer.echo(line)
+
+
+@spool_app.command("drain")
+def spool_drain(
+    printer: str = typer.Option(None, "--printer", "-p", help="Only send jobs for this printer address"),
+) -> None:
+    """
+    Send spooled jobs now, without waiting for their next retry.
+    """
+    from tp.spool import drain, open_spool
+
+    result = drain(open_spool(), printer=printer, force=True)
+    typer.echo(f"Sent {result.sent} spooled jobs.")
+    if result.failed:
+        typer.echo(
+            f"{result.failed} jobs failed part-way through sending and were removed; they may have partly printed."
+        )
+    if result.remaining:
+        typer.echo(f"{result.remaining} jobs are still waiting for an unreachable printer.")
+    if result.failed or result.remaining:
+        sys.exit(1)
+
+
+@spool_app.command("remove")
+def spool_remove(job_id: int = typer.Argument(..., help="ID of the spooled job, as shown by 'tp spool list'")) -> None:
+    """
+    Remove a job from the spool without printing it.
+    """
+    from tp.spool import open_spool
+
+    if not open_spool().remove(job_id):
+        typer.echo(f"Spooled job {job_id} not found.")
+        sys.exit(1)
+    typer.echo(f"Removed spooled job {job_id}.")
+
+
+@spool_app.command("clear")
+def spool_clear(
+    printer: str = typer.Option(None, "--printer", "-p", help="Only remove jobs for this printer address"),
+) -> None:
+    """
+    Remove all jobs from the spool without printing them.
+    """
+    from tp.spool import open_spool
+
+    spool = open_spool()
+    removed = spool.clear(printer)
+    spool.compact()
+    typer.echo(f"Removed {removed} spooled jobs.")
+
+
 @config_app.command("edit")
 def config_edit() -> None:
     """
@@ -0,0 +1,56 @@
+import csv
+import json
+import os
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+FORMATS = ("jsonl", "csv")
+
+
+def detect_format(path: str) -> str:
+    """
+    Guess the job file format from its extension, defaulting to JSONL.
+    """
+    return "csv" if os.path.splitext(path)[1].lower() == ".csv" else "jsonl"
+
+
+def read_jobs(
+    lines: Iterable[str], fmt: str = "jsonl", template_name: str | None = None
+) -> Iterator[tuple[str, dict[str, Any]]]:
+    """
+    Lazily read print jobs as (template name, context) pairs from JSONL or CSV lines.
+
+    Each JSON object or CSV row is one job: its fields are the template variables, except for an
+    optional "template" field that overrides the default template name.
+    """
+    if fmt == "jsonl":
+        records: Iterable[tuple[int, Any]] = _read_jsonl(lines)
+    elif fmt == "csv":
+        records = _read_csv(lines)
+    else:
+        raise ValueError(f"Unknown job format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+
+    for line_number, record in records:
+        if not isinstance(record, dict):
+            raise ValueError(f"Line {line_number}: expected an object with template variables.")
+        context = dict(record)
+        name = context.pop("template", None) or template_name
+        if not name:
+            raise ValueError(f"Line {line_number}: no template given.")
+        yield name, context
+
+
+def _read_jsonl(lines: Iterable[str]) -> Iterator[tuple[int, Any]]:
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {line_number}: invalid JSON: {e}") from e
+
+
+def _read_csv(lines: Iterable[str]) -> Iterator[tuple[int, Any]]:
+    reader = csv.DictReader(lines)
+    for row in reader:
+        yield reader.line_num, row
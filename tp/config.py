@@ -1,14 +1,166 @@
 import configparser
 import os
+import stat
+import sys
+import tempfile
+import threading
+from collections.abc import Generator
+from contextlib import contextmanager
+from typing import Any
 
 CONFIG_FILE = "tp_config.ini"
 
 PRINT_TEMPLATE_FOLDER = os.path.join(os.path.dirname(os.path.realpath(__file__)), "print_templates")
 
 
+class ConfigSnapshot:
+    """
+    Read-only view of the configuration file as it was when it was parsed.
+    """
+
+    def __init__(self, parser: configparser.ConfigParser) -> None:
+        self._parser = parser
+
+    def get(self, section: str, option: str) -> str:
+        return self._parser.get(section, option)
+
+    def getint(self, section: str, option: str) -> int:
+        return self._parser.getint(section, option)
+
+    def getboolean(self, section: str, option: str) -> bool:
+        return self._parser.getboolean(section, option)
+
+    def getfloat(self, section: str, option: str) -> float:
+        return self._parser.getfloat(section, option)
+
+    def has_section(self, section: str) -> bool:
+        return self._parser.has_section(section)
+
+    def sections(self) -> list[str]:
+        return self._parser.sections()
+
+
+class _ConfigCache:
+    """
+    Process-wide cache of the parsed configuration file.
+    The file is re-parsed only when its path, inode, modification time or size changes.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entry: tuple[tuple[object, ...], ConfigSnapshot] | None = None
+
+    def snapshot(self) -> ConfigSnapshot:
+        key = self._file_key()
+        entry = self._entry
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        with self._lock:
+            parser = configparser.ConfigParser()
+            parser.read(CONFIG_FILE)
+            snapshot = ConfigSnapshot(parser)
+            self._entry = (key, snapshot)
+            return snapshot
+
+    def invalidate(self) -> None:
+        self._entry = None
+
+    @staticmethod
+    def _file_key() -> tuple[object, ...]:
+        path = os.path.abspath(CONFIG_FILE)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return (path,)
+        return path, stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+_cache = _ConfigCache()
+
+# Setting name -> (section, option) accepted by `update`.
+SETTINGS = {
+    "printer_ip": ("Printer", "ip_address"),
+    "chars_per_line": ("Printer", "chars_per_line"),
+    "enable_special_letters": ("Printer", "enable_special_letters"),
+    "codepage": ("Printer", "codepage"),
+    "default_printer": ("Printers", "default"),
+    "check_for_updates": ("Updates", "check_for_updates"),
+    "virtual_printer_enabled": ("VirtualPrinter", "enabled"),
+    "spool_enabled": ("Spool", "enabled"),
+    "flask_port": ("Flask", "port"),
+    "flask_secret_key": ("Flask", "secret_key"),
+}
+
+_write_lock = threading.Lock()
+
+
+def get_config() -> ConfigSnapshot:
+    """
+    Return the current configuration snapshot, re-reading the file only if it changed.
+    """
+    return _cache.snapshot()
+
+
+@contextmanager
+def _locked() -> Generator[None, None, None]:
+    """
+    Hold an exclusive lock on the configuration file across threads and processes.
+    """
+    with _write_lock, open(CONFIG_FILE + ".lock", "a") as lock_file:
+        if sys.platform == "win32":
+            import msvcrt
+
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def update(**changes: Any) -> None:
+    """
+    Apply several settings in one transaction: a single parse, a write to a temporary file
+    and an atomic replace of the configuration file.
+    """
+    unknown = set(changes) - set(SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown settings: {', '.join(sorted(unknown))}")
+
+    with _locked():
+        config = configparser.ConfigParser()
+        config.read(CONFIG_FILE)
+        for name, value in changes.items():
+            section, option = SETTINGS[name]
+            if not config.has_section(section):
+                config.add_section(section)
+            config.set(section, option, str(value))
+
+        path = os.path.abspath(CONFIG_FILE)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tp_config.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as configfile:
+                config.write(configfile)
+                configfile.flush()
+                os.fsync(configfile.fileno())
+            if os.path.exists(path):
+                os.chmod(temp_path, os.stat(path).st_mode)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    _cache.invalidate()
+
+
 def get_printer_ip() -> str:
-    config = configparser.ConfigParser()
-    config.read(CONFIG_FILE)
+    config = get_config()
     try:
         return config.get("Printer", "ip_address")
     except (configparser.NoSectionError, configparser.NoOptionError) as e:
@@ -16,18 +168,35 @@ def get_printer_ip() -> str:
 
 
 def set_printer_ip(ip_address: str) -> None:
-    config = configparser.ConfigParser()
-    config.read(CONFIG_FILE)
-    if not config.has_section("Printer"):
-        config.add_section("Printer")
-    config.set("Printer", "ip_address", ip_address)
-    with open(CONFIG_FILE, "w") as configfile:
-        config.write(configfile)
+    update(printer_ip=ip_address)
+
+
+def get_printer_address() -> str:
+    """
+    Address print jobs are sent to: the virtual printer when it is enabled, otherwise the printer IP.
+    """
+    if get_virtual_printer_enabled():
+        return get_virtual_printer_address()
+    return get_printer_ip()
+
+
+def get_default_printer() -> str | None:
+    """
+    Name of the printer profile or group that jobs without a printer of their own are sent to.
+    """
+    config = get_config()
+    try:
+        return config.get("Printers", "default") or None
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        return None
+
+
+def set_default_printer(name: str) -> None:
+    update(default_printer=name)
 
 
 def get_chars_per_line() -> int:
-    config = configparser.ConfigParser()
-    config.read(CONFIG_FILE)
+    config = get_config()
     try:
         return config.getint("Printer", "chars_per_line")
     except (configparser.NoSectionError, configparser.NoOptionError):
@@ -35,18 +204,11 @@ def get_chars_per_line() -> int:
 
 
 def set_chars_per_line(chars_per_line: int) -> None:
-    config = configparser.ConfigParser()
-    config.read(CONFIG_FILE)
-    if not config.has_section("Printer"):
-        config.add_section("Printer")
-    config.set("Printer", "chars_per_line", str(chars_per_line))
-    with open(CONFIG_FILE, "w") as configfile:
-        config.write(configfile)
+    update(chars_per_line=chars_per_line)
 
 
 def get_enable_special_letters() -> bool:
-    config = configparser.ConfigParser()
-    config.read(CONFIG_FILE)
+    config = get_config()
     try:
         return config.getboolean("Printer", "enable_special_letters")
     except (configparser.NoSectionError, configparser.NoOptionError):
@@ -54,18 +216,28 @@ def get_enable_special_letters() -> bool:
 
 
 def set_enable_special_letters(enable: bool) -> None:
-    config = configparser.ConfigParser()
-    config.read(CONFIG_FILE)
-    if not config.has_section("Printer"):
-        config.add_section("Printer")
-    config.set("Printer", "enable_special_letters", str(enable))
-    with open(CONFIG_FILE, "w") as configfile:
-        config.write(configfile)
+    update(enable_special_letters=enable)
+
+
+def get_codepage() -> str:
+    config = get_config()
+    try:
+        return config.get("Printer", "codepage")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        return "cp852"
+
+
+def set_codepage(codepage: str) -> None:
+    """
+    Save the printer codepage, rejecting one the encoder does not support with a ValueError.
+    """
+    from tp.encoding import check_codepage
+
+    update(codepage=check_codepage(codepage))
 
 
 def get_check_for_updates() -> bool:
-    config = configparser.ConfigParser()
-    config.read(CONFIG_FILE)
+    config = get_config()
     try:
         return config.getboolean("Updates", "check_for_updates")
     except (configparser.NoSectionError, configparser.NoOptionError):
@@ -73,18 +245,147 @@ def get_check_for_updates() -> bool:
 
 
 def set_check_for_updates(check: bool) -> None:
-    config = configparser.ConfigParser()
-    config.read(CONFIG_FILE)
-    if not config.has_section("Updates"):
-        config.add_section("Updates")
-    config.set("Updates", "check_for_updates", str(check))
-    with open(CONFIG_FILE, "w") as configfile:
-        config.write(configfile)
+    update(check_for_updates=check)
+
+
+def get_update_url() -> str:
+    config = get_config()
+    try:
+        return config.get("Updates", "releases_url")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        return "https://api.github.com/repos/AN0DA/tp/releases/latest"
+
+
+def get_cache_dir() -> str:
+    config = get_config()
+    try:
+        return config.get("Cache", "directory")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        # Per user rather than in the working directory, which may belong to someone else.
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        return os.path.join(base, "tp")
+
+
+def ensure_private_dir(path: str) -> None:
+    """
+    Create a cache directory that only the current user can use, or check that an existing one
+    is a directory owned by the current user that nobody else can write to.
+    Files read back from the cache are trusted, so a directory someone else controls is refused.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if not hasattr(os, "getuid"):
+        return
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o022:
+        raise PermissionError(f"Cache directory {path} must be a directory owned by you that only you can write to.")
+
+
+def get_template_bytecode_cache() -> bool:
+    config = get_config()
+    try:
+        return config.getboolean("Templates", "bytecode_cache")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        return False
+
+
+def get_daemon_socket() -> str:
+    config = get_config()
+    try:
+        return config.get("Daemon", "socket")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        return os.path.join(get_cache_dir(), "daemon.sock")
+
+
+def get_virtual_printer_enabled() -> bool:
+    config = get_config()
+    try:
+        return config.getboolean("VirtualPrinter", "enabled")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        return False
+
+
+def set_virtual_printer_enabled(enabled: bool) -> None:
+    update(virtual_printer_enabled=enabled)
+
+
+def get_virtual_printer_address() -> str:
+    config = get_config()
+    try:
+        return config.get("VirtualPrinter", "address")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        return "127.0.0.1:9100"
+
+
+def get_virtual_printer_line_rate() -> float:
+    config = get_config()
+    try:
+        return config.getfloat("VirtualPrinter", "line_rate")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        return 0.0
+
+
+def get_virtual_printer_log_file() -> str | None:
+    config = get_config()
+    try:
+        return config.get("VirtualPrinter", "log_file") or None
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        return None
+
+
+def get_spool_enabled() -> bool:
+    config = get_config()
+    try:
+        return config.getboolean("Spool", "enabled")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        return False
+
+
+def set_spool_enabled(enabled: bool) -> None:
+    update(spool_enabled=enabled)
+
+
+def get_spool_path() -> str:
+    config = get_config()
+    try:
+        return config.get("Spool", "path")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        return os.path.join(get_cache_dir(), "spool.sqlite3")
+
+
+def get_spool_retry_delay() -> float:
+    config = get_config()
+    try:
+        return config.getfloat("Spool", "retry_delay")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        return 1.0
+
+
+def get_spool_max_retry_delay() -> float:
+    config = get_config()
+    try:
+        return config.getfloat("Spool", "max_retry_delay")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        return 300.0
+
+
+def get_health_interval() -> float:
+    config = get_config()
+    try:
+        return config.getfloat("Health", "interval")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        return 10.0
+
+
+def get_health_timeout() -> float:
+    config = get_config()
+    try:
+        return config.getfloat("Health", "timeout")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        return 1.0
 
 
 def get_flask_port() -> int:
-    config = configparser.ConfigParser()
-    config.read(CONFIG_FILE)
+    config = get_config()
     try:
         return config.getint("Flask", "port")
     except (configparser.NoSectionError, configparser.NoOptionError):
@@ -92,8 +393,7 @@ def get_flask_port() -> int:
 
 
 def get_flask_secret_key() -> str:
-    config = configparser.ConfigParser()
-    config.read(CONFIG_FILE)
+    config = get_config()
     try:
         return config.get("Flask", "secret_key")
     except (configparser.NoSectionError, configparser.NoOptionError):
@@ -101,20 +401,8 @@ def get_flask_secret_key() -> str:
 
 
 def set_flask_port(port: int) -> None:
-    config = configparser.ConfigParser()
-    config.read(CONFIG_FILE)
-    if not config.has_section("Flask"):
-        config.add_section("Flask")
-    config.set("Flask", "port", str(port))
-    with open(CONFIG_FILE, "w") as configfile:
-        config.write(configfile)
+    update(flask_port=port)
 
 
 def set_flask_secret_key(secret_key: str) -> None:
-    config = configparser.ConfigParser()
-    config.read(CONFIG_FILE)
-    if not config.has_section("Flask"):
-        config.add_section("Flask")
-    config.set("Flask", "secret_key", secret_key)
-    with open(CONFIG_FILE, "w") as configfile:
-        config.write(configfile)
+    update(flask_secret_key=secret_key)
@@ -0,0 +1,142 @@
+import logging
+import select
+import socket
+import threading
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+
+from escpos.exceptions import DeviceNotFoundError
+from escpos.printer import Network
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 9100
+
+# Errors meaning the printer could not be reached, as opposed to a problem with the job itself.
+UNREACHABLE_ERRORS = (OSError, DeviceNotFoundError)
+
+
+def split_address(address: str) -> tuple[str, int]:
+    """
+    Split a printer address of the form "host" or "host:port" into host and port.
+    """
+    host, separator, port = address.rpartition(":")
+    if separator and port.isdigit() and ":" not in host:
+        return host, int(port)
+    return address, DEFAULT_PORT
+
+
+class PrinterConnectionPool:
+    """
+    A pool of open printer connections keyed by printer address.
+
+    Connections are handed out one borrower at a time, checked for liveness
+    before reuse, and closed once they have been idle for longer than `max_idle`.
+    """
+
+    def __init__(self, timeout: float = 10, max_idle: float = 60.0, max_per_address: int = 2) -> None:
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_per_address = max_per_address
+        self._idle: dict[str, list[tuple[Network, float]]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, address: str) -> Network:
+        """
+        Borrow a live connection to the printer, dialling a new one if none is idle.
+        """
+        while True:
+            with self._lock:
+                idle = self._idle.get(address)
+                if not idle:
+                    break
+                printer, released_at = idle.pop()
+            if time.monotonic() - released_at > self.max_idle or not self.is_alive(printer):
+                logger.debug(f"Dropping stale connection to {address}")
+                self._close(printer)
+                continue
+            logger.debug(f"Reusing pooled connection to {address}")
+            return printer
+        return self._dial(address)
+
+    def release(self, address: str, printer: Network, discard: bool = False) -> None:
+        """
+        Return a borrowed connection to the pool, or close it if `discard` is set.
+        """
+        if not discard:
+            with self._lock:
+                idle = self._idle.setdefault(address, [])
+                if len(idle) < self.max_per_address:
+                    idle.append((printer, time.monotonic()))
+                    return
+        self._close(printer)
+
+    def reconnect(self, address: str, printer: Network) -> Network:
+        """
+        Close a broken connection and dial a fresh one to the same printer.
+        """
+        logger.warning(f"Reconnecting to printer {address}")
+        self._close(printer)
+        return self._dial(address)
+
+    @contextmanager
+    def connection(self, address: str) -> Generator[Network, None, None]:
+        printer = self.acquire(address)
+        try:
+            yield printer
+        except BaseException:
+            self.release(address, printer, discard=True)
+            raise
+        self.release(address, printer)
+
+    def prune(self) -> None:
+        """
+        Close every idle connection that has outlived `max_idle`.
+        """
+        now = time.monotonic()
+        expired: list[Network] = []
+        with self._lock:
+            for idle in self._idle.values():
+                expired.extend(printer for printer, released_at in idle if now - released_at > self.max_idle)
+                idle[:] = [(printer, released_at) for printer, released_at in idle if printer not in expired]
+        for printer in expired:
+            self._close(printer)
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle = [printer for connections in self._idle.values() for printer, _ in connections]
+            self._idle.clear()
+        for printer in idle:
+            self._close(printer)
+
+    @staticmethod
+    def is_alive(printer: Network) -> bool:
+        """
+        Cheap liveness check: the socket must be open and must not have been shut down by the peer.
+        """
+        sock = getattr(printer, "_device", None)
+        if not isinstance(sock, socket.socket) or sock.fileno() == -1:
+            return False
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+            if readable:
+                # A readable socket with no pending data means the printer closed the connection.
+                return sock.recv(1, socket.MSG_PEEK) != b""
+        except OSError:
+            return False
+        return True
+
+    def _dial(self, address: str) -> Network:
+        host, port = split_address(address)
+        printer = Network(host, port=port, timeout=self.timeout)
+        printer.open()
+        logger.debug(f"Opened pooled connection to {address}")
+        return printer
+
+    @staticmethod
+    def _close(printer: Network) -> None:
+        try:
+            printer.close()
+        except Exception as e:
+            logger.error(f"Error closing printer connection: {e}")
@@ -0,0 +1,235 @@
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+from collections import Counter
+from collections.abc import Generator
+from contextlib import contextmanager
+from typing import Any
+
+# Only the server imports the printing stack, so the client side of this module stays cheap to import.
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+
+def _send_message(sock: socket.socket, message: dict[str, Any]) -> None:
+    sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+def _read_message(file: Any) -> dict[str, Any] | None:
+    line = file.readline(MAX_MESSAGE_SIZE)
+    if not line:
+        return None
+    message = json.loads(line)
+    if not isinstance(message, dict):
+        raise ValueError("Expected a JSON object.")
+    return message
+
+
+class DaemonClient:
+    """
+    Client for a running `tp daemon`, speaking one JSON object per line over its Unix socket.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 60.0) -> None:
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def request(self, command: str, **params: Any) -> dict[str, Any] | None:
+        """
+        Send a command and return the daemon's reply, or None when no daemon is listening.
+        """
+        if not hasattr(socket, "AF_UNIX"):
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            try:
+                sock.connect(self.socket_path)
+            except (FileNotFoundError, ConnectionRefusedError):
+                return None
+            _send_message(sock, {"command": command, **params})
+            with sock.makefile("rb") as reply:
+                response = _read_message(reply)
+        finally:
+            sock.close()
+        if response is None:
+            raise ConnectionError("The daemon closed the connection without replying.")
+        return response
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "_Server"
+
+    def handle(self) -> None:
+        try:
+            request = _read_message(self.rfile)
+            if request is None:
+                return
+            response = self.server.daemon.handle(request)
+        except Exception as e:
+            logger.error(f"Error handling daemon request: {e}", exc_info=True)
+            response = {"ok": False, "error": str(e)}
+        _send_message(self.request, response)
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    # Equivalent to ThreadingUnixStreamServer, which is missing on platforms without Unix sockets.
+    address_family = getattr(socket, "AF_UNIX", socket.AF_INET)
+    daemon_threads = True
+    daemon: "PrintDaemon"
+
+
+class PrintDaemon:
+    """
+    Long-running print server that keeps templates, compiled Jinja segments and printer
+    connections warm between CLI invocations.
+    """
+
+    def __init__(self, socket_path: str) -> None:
+        from tp.config import (
+            PRINT_TEMPLATE_FOLDER,
+            get_cache_dir,
+            get_health_interval,
+            get_health_timeout,
+            get_spool_enabled,
+        )
+        from tp.connection_pool import PrinterConnectionPool
+        from tp.health import HealthMonitor
+        from tp.printers import PrinterRouter
+        from tp.spool import SpoolWorker, open_spool
+        from tp.template_manager import TemplateManager
+        from tp.template_watcher import TemplateWatcher
+        from tp.utils import TemplateRenderer
+
+        self.socket_path = socket_path
+        self.template_manager = TemplateManager(PRINT_TEMPLATE_FOLDER, cache_dir=get_cache_dir())
+        self.template_renderer = TemplateRenderer(self.template_manager)
+        self.pool = PrinterConnectionPool()
+        self.template_watcher = TemplateWatcher(self.template_manager)
+        self.health = HealthMonitor(interval=get_health_interval(), timeout=get_health_timeout())
+        self.spool = open_spool() if get_spool_enabled() else None
+        self.spool_worker = SpoolWorker(self.spool, self.pool) if self.spool is not None else None
+        # Jobs printing or waiting to print, by printer address
+        self._pending: Counter[str] = Counter()
+        # Each printer's jobs take numbered turns: the next number to hand out and the number being served.
+        self._tickets: Counter[str] = Counter()
+        self._serving: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._turn_over = threading.Condition(self._lock)
+        self.router = PrinterRouter(is_down=self.health.is_down, depth=self._pending.__getitem__)
+        self._server: _Server | None = None
+
+    def bind(self) -> _Server:
+        """
+        Listen on the socket, replacing a stale socket file left by a daemon that is no longer running.
+        """
+        if self._server is not None:
+            return self._server
+        if not hasattr(socket, "AF_UNIX"):
+            raise RuntimeError("The daemon needs Unix domain sockets, which this platform does not support.")
+        if os.path.exists(self.socket_path):
+            if DaemonClient(self.socket_path, timeout=1).request("ping") is not None:
+                raise RuntimeError(f"A daemon is already listening on {self.socket_path}.")
+            os.unlink(self.socket_path)
+        directory = os.path.dirname(self.socket_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._server = _Server(self.socket_path, _Handler)  # type: ignore[arg-type]
+        self._server.daemon = self
+        os.chmod(self.socket_path, 0o600)
+        logger.info(f"Daemon listening on {self.socket_path}")
+        return self._server
+
+    def serve_forever(self) -> None:
+        server = self.bind()
+        self.template_watcher.start()
+        self.health.start()
+        if self.spool_worker:
+            self.spool_worker.start()
+        try:
+            server.serve_forever()
+        finally:
+            self.template_watcher.stop()
+            self.health.stop()
+            if self.spool_worker:
+                self.spool_worker.stop()
+            self.pool.close_all()
+            server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            self._server = None
+
+    def shutdown(self) -> None:
+        if self._server:
+            # shutdown() waits for serve_forever to return, so it cannot run on a request thread.
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+
+    def handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        match request.get("command"):
+            case "ping":
+                return {"ok": True, "pid": os.getpid()}
+            case "templates":
+                return {"ok": True, "templates": self.template_manager.templates}
+            case "health":
+                return {"ok": True, "printers": [printer.to_dict() for printer in self.health.snapshot()]}
+            case "print":
+                return self.print_template(request["template"], request.get("context") or {}, request.get("printer"))
+            case "shutdown":
+                self.shutdown()
+                return {"ok": True}
+            case command:
+                return {"ok": False, "error": f"Unknown command '{command}'."}
+
+    def print_template(self, template_name: str, context: dict[str, Any], printer: str | None) -> dict[str, Any]:
+        """
+        Print a job on `printer` (a configured printer profile or group), the template's printer
+        or the default printer, failing over to the next printer of a group that cannot be reached.
+        """
+        from tp.instrumentation import profile_job
+        from tp.printer import print_with_failover
+        from tp.printers import check_printer_name
+        from tp.utils import compute_agenda_variables
+
+        if template_name == "agenda" and not context:
+            context = compute_agenda_variables()
+        if printer:
+            check_printer_name(printer)
+        template = self.template_manager.get_template(template_name) or {}
+        profiles = self.router.resolve(printer or template.get("printer"), template.get("requires", []))
+        with profile_job(template_name) as profile:
+            printed_on, printed = print_with_failover(
+                profiles,
+                template_name,
+                context,
+                self.template_manager,
+                self.template_renderer,
+                pool=self.pool,
+                spool=self.spool,
+                health=self.health,
+                lock=self._printer_turn,
+            )
+        return {"ok": True, "printer": printed_on.name, "spooled": not printed, "profile": profile.to_dict()}
+
+    @contextmanager
+    def _printer_turn(self, address: str) -> Generator[None, None, None]:
+        """
+        Wait for the printer's earlier jobs: jobs for one printer are printed one at a time, in the order they arrive.
+        """
+        # A plain lock wakes its waiters in no particular order, so jobs wait for their ticket instead.
+        with self._turn_over:
+            ticket = self._tickets[address]
+            self._tickets[address] += 1
+            self._pending[address] += 1
+            self._turn_over.wait_for(lambda: self._serving[address] == ticket)
+        try:
+            yield
+        finally:
+            with self._turn_over:
+                self._serving[address] += 1
+                self._pending[address] -= 1
+                self._turn_over.notify_all()
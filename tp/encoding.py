@@ -0,0 +1,77 @@
+import codecs
+
+from unidecode import unidecode
+
+# ESC t selector numbers of the printer codepages that have a matching Python codec.
+CODEPAGES = {
+    "cp437": 0,
+    "cp850": 2,
+    "cp860": 3,
+    "cp863": 4,
+    "cp865": 5,
+    "cp1252": 16,
+    "cp866": 17,
+    "cp852": 18,
+    "cp858": 19,
+}
+
+TRANSLITERATE_ERRORS = "tp-transliterate"
+
+
+class _TransliterationTable(dict[int, str]):
+    """
+    `str.translate` table that transliterates each character the first time it is seen.
+    """
+
+    def __missing__(self, codepoint: int) -> str:
+        replacement = unidecode(chr(codepoint))
+        self[codepoint] = replacement
+        return replacement
+
+
+_transliterations = _TransliterationTable()
+
+
+def transliterate(text: str) -> str:
+    """
+    Replace non-ASCII characters with their closest ASCII spelling.
+    """
+    if text.isascii():
+        return text
+    return text.translate(_transliterations)
+
+
+def _transliterate_errors(error: UnicodeError) -> tuple[str, int]:
+    if not isinstance(error, UnicodeEncodeError):
+        raise error
+    return transliterate(error.object[error.start : error.end]), error.end
+
+
+codecs.register_error(TRANSLITERATE_ERRORS, _transliterate_errors)
+
+
+def check_codepage(codepage: str) -> str:
+    """
+    Return the codepage name in canonical form, or raise ValueError listing the supported codepages.
+    """
+    name = codepage.strip().lower()
+    if name not in CODEPAGES:
+        raise ValueError(f"Unsupported codepage '{codepage}'. Use one of: {', '.join(CODEPAGES)}")
+    return name
+
+
+class CodepageEncoder:
+    """
+    Encodes text for one printer codepage.
+
+    Characters the codepage can represent are looked up in Python's codec table; anything else
+    is transliterated through the shared memoized table.
+    """
+
+    def __init__(self, codepage: str):
+        codepage = check_codepage(codepage)
+        self.codepage = codepage
+        self.select_command = b"\x1bt" + bytes([CODEPAGES[codepage]])
+
+    def encode(self, text: str) -> bytes:
+        return text.encode(self.codepage, errors=TRANSLITERATE_ERRORS)
@@ -16,18 +16,17 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
+from tp import config
 from tp.config import (
     PRINT_TEMPLATE_FOLDER,
+    get_cache_dir,
     get_chars_per_line,
     get_check_for_updates,
     get_enable_special_letters,
     get_printer_ip,
-    set_chars_per_line,
-    set_check_for_updates,
-    set_enable_special_letters,
-    set_printer_ip,
 )
-from tp.printer import ThermalPrinter
+from tp.printer import print_with_failover
+from tp.printers import PrinterRouter
 from tp.template_manager import TemplateManager
 from tp.utils import compute_agenda_variables
 
@@ -37,7 +36,7 @@ logger = logging.getLogger(__name__)
 class MainWindow(QWidget):
     def __init__(self) -> None:
         super().__init__()
-        self.template_manager = TemplateManager(PRINT_TEMPLATE_FOLDER)
+        self.template_manager = TemplateManager(PRINT_TEMPLATE_FOLDER, cache_dir=get_cache_dir())
         self.setWindowTitle("Thermal Printer Application")
         self.init_ui()
 
@@ -118,9 +117,8 @@ class TemplateDialog(QDialog):
                 else:
                     context[var["name"]] = input_field.text()
         try:
-            ip_address = get_printer_ip()
-            with ThermalPrinter(ip_address, self.template_manager) as printer:
-                printer.print_template(self.template_name, context)
+            profiles = PrinterRouter().resolve(template.get("printer"), template.get("requires", []))
+            print_with_failover(profiles, self.template_name, context, self.template_manager)
             QMessageBox.information(self, "Success", f"Printed using template '{self.template_name}'.")
             self.accept()
         except Exception as e:
@@ -174,12 +172,10 @@ class SettingsDialog(QDialog):
 
     def save_settings(self) -> None:
         ip_address = self.ip_input.text()
-        set_printer_ip(ip_address)
 
         chars_per_line_value = self.chars_per_line_input.text()
         try:
             chars_per_line = int(chars_per_line_value)
-            set_chars_per_line(chars_per_line)
         except ValueError:
             QMessageBox.critical(self, "Error", "Invalid number for chars per line.")
             return
@@ -192,7 +188,6 @@ class SettingsDialog(QDialog):
         else:
             QMessageBox.critical(self, "Error", "Invalid value for enable special letters. Use True or False.")
             return
-        set_enable_special_letters(enable_special_letters)
 
         check_for_updates_value = self.check_for_updates_input.text()
         if check_for_updates_value.lower() in ("true", "yes", "1"):
@@ -202,7 +197,13 @@ class SettingsDialog(QDialog):
         else:
             QMessageBox.critical(self, "Error", "Invalid value for check for updates. Use True or False.")
             return
-        set_check_for_updates(check_for_updates)
+
+        config.update(
+            printer_ip=ip_address,
+            chars_per_line=chars_per_line,
+            enable_special_letters=enable_special_letters,
+            check_for_updates=check_for_updates,
+        )
 
         QMessageBox.information(self, "Success", "Settings saved.")
         self.accept()
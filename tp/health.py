@@ -0,0 +1,205 @@
+import logging
+import socket
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from enum import StrEnum
+from typing import Any
+
+from tp.connection_pool import split_address
+from tp.printers import load_printers
+
+logger = logging.getLogger(__name__)
+
+# DLE EOT 4: real-time transmission of the paper roll sensor status.
+PAPER_STATUS_QUERY = b"\x10\x04\x04"
+
+
+class PrinterDownError(ConnectionError):
+    """
+    Raised instead of connecting to a printer that is known to be down.
+    """
+
+
+class PrinterState(StrEnum):
+    UNKNOWN = "unknown"
+    UP = "up"
+    DOWN = "down"
+
+
+@dataclass
+class PrinterHealth:
+    address: str
+    state: PrinterState = PrinterState.UNKNOWN
+    checked_at: float | None = None
+    # Seconds the TCP connect took.
+    latency: float | None = None
+    # "ok", "near_end" or "out" when the printer answered the status query.
+    paper: str | None = None
+    error: str | None = None
+    failures: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def paper_status(status: int) -> str:
+    """
+    Decode the reply to a paper roll sensor status query.
+    """
+    if status & 0x60:
+        return "out"
+    if status & 0x0C:
+        return "near_end"
+    return "ok"
+
+
+def probe(address: str, timeout: float = 1.0, query_status: bool = True) -> PrinterHealth:
+    """
+    Check a printer with a TCP connect and, when it answers one, a paper status query.
+    A printer that accepts the connection but ignores the query is still reported up.
+    """
+    host, port = split_address(address)
+    started = time.perf_counter()
+    try:
+        with socket.create_connection((host, port), timeout=timeout) as sock:
+            latency = time.perf_counter() - started
+            paper = None
+            if query_status:
+                try:
+                    sock.sendall(PAPER_STATUS_QUERY)
+                    reply = sock.recv(1)
+                    paper = paper_status(reply[0]) if reply else None
+                except OSError:
+                    pass
+    except OSError as e:
+        return PrinterHealth(address, PrinterState.DOWN, checked_at=time.time(), error=str(e) or type(e).__name__)
+    return PrinterHealth(address, PrinterState.UP, checked_at=time.time(), latency=latency, paper=paper)
+
+
+def configured_printers() -> list[str]:
+    """
+    Addresses of the configured printer profiles.
+    """
+    try:
+        profiles = load_printers().profiles.values()
+    except ValueError as e:
+        logger.error(f"Invalid printer configuration: {e}")
+        return []
+    return list(dict.fromkeys(profile.address for profile in profiles))
+
+
+class HealthMonitor:
+    """
+    Cached up/down state of printers, refreshed by a background prober and by the outcome of print jobs,
+    so the print path can fail fast instead of waiting for a connection to a dead printer to time out.
+
+    A printer is considered down after `failures_before_down` consecutive failed probes or sends,
+    and up again after the first success.
+    """
+
+    def __init__(
+        self,
+        addresses: Callable[[], list[str]] = configured_printers,
+        interval: float = 10.0,
+        timeout: float = 1.0,
+        failures_before_down: int = 2,
+        query_status: bool = True,
+    ) -> None:
+        self.addresses = addresses
+        self.interval = interval
+        self.timeout = timeout
+        self.failures_before_down = failures_before_down
+        self.query_status = query_status
+        self._health: dict[str, PrinterHealth] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def status(self, address: str) -> PrinterHealth:
+        with self._lock:
+            health = self._health.get(address)
+        return health or PrinterHealth(address)
+
+    def snapshot(self) -> list[PrinterHealth]:
+        """
+        Health of the configured printers and of any other printer seen since startup.
+        """
+        return [self.status(address) for address in self._tracked()]
+
+    def is_down(self, address: str) -> bool:
+        return self.status(address).state == PrinterState.DOWN
+
+    def check(self, address: str) -> PrinterHealth:
+        """
+        Probe a printer now and record the result.
+        """
+        result = probe(address, self.timeout, self.query_status)
+        return self._update(result)
+
+    def record(self, address: str, error: str | None = None) -> None:
+        """
+        Record the outcome of talking to a printer outside the prober, e.g. sending a job.
+        """
+        state = PrinterState.DOWN if error else PrinterState.UP
+        self._update(PrinterHealth(address, state, checked_at=time.time(), error=error))
+
+    def ensure_up(self, address: str) -> None:
+        """
+        Fail fast with PrinterDownError when the printer is known to be down.
+        """
+        health = self.status(address)
+        if health.state == PrinterState.DOWN:
+            raise PrinterDownError(f"Printer {address} is down: {health.error}")
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _tracked(self) -> list[str]:
+        """
+        The configured printers followed by any other printer seen since startup.
+        """
+        addresses = dict.fromkeys(self.addresses())
+        with self._lock:
+            addresses.update(dict.fromkeys(self._health))
+        return list(addresses)
+
+    def _run(self) -> None:
+        while True:
+            # Printers that are not configured are probed too once a job has used them,
+            # so one marked down by a failed send is seen coming back.
+            for address in self._tracked():
+                try:
+                    self.check(address)
+                except Exception as e:
+                    logger.error(f"Error probing printer {address}: {e}", exc_info=True)
+            if self._stop.wait(self.interval):
+                return
+
+    def _update(self, result: PrinterHealth) -> PrinterHealth:
+        with self._lock:
+            previous = self._health.get(result.address) or PrinterHealth(result.address)
+            if result.state == PrinterState.DOWN:
+                result.failures = previous.failures + 1
+                if result.failures < self.failures_before_down:
+                    # Keep the last known state until the failures add up.
+                    result.state = previous.state
+                    result.latency, result.paper = previous.latency, previous.paper
+            elif result.latency is None:
+                # A successful send carries no probe details.
+                result.latency, result.paper = previous.latency, previous.paper
+            self._health[result.address] = result
+        if result.state != previous.state:
+            log = logger.warning if result.state == PrinterState.DOWN else logger.info
+            log(f"Printer {result.address} is {result.state}" + (f": {result.error}" if result.error else ""))
+        return result
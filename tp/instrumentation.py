@@ -0,0 +1,214 @@
+import bisect
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the default histogram buckets.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class StageTiming:
+    seconds: float = 0.0
+    bytes: int = 0
+    calls: int = 0
+
+
+class JobProfile:
+    """
+    Durations and byte counts of the pipeline stages of one print job.
+    A stage entered several times during the job (e.g. once per segment) is summed.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.stages: dict[str, StageTiming] = {}
+        self.seconds = 0.0
+        # Exception type name when the job failed.
+        self.error: str | None = None
+        # Set when the printer was unreachable and the job was left in the spool.
+        self.spooled = False
+
+    def record(self, stage: str, seconds: float, size: int = 0) -> None:
+        timing = self.stages.get(stage)
+        if timing is None:
+            timing = self.stages[stage] = StageTiming()
+        timing.seconds += seconds
+        timing.bytes += size
+        timing.calls += 1
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "job": self.name,
+            "seconds": self.seconds,
+            "error": self.error,
+            "spooled": self.spooled,
+            "stages": {stage: asdict(timing) for stage, timing in self.stages.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "JobProfile":
+        profile = cls(data["job"])
+        profile.seconds = data["seconds"]
+        profile.error = data.get("error")
+        profile.spooled = data.get("spooled", False)
+        profile.stages = {stage: StageTiming(**timing) for stage, timing in data["stages"].items()}
+        return profile
+
+    def format(self) -> str:
+        """
+        Render the breakdown as a plain text table.
+        """
+        lines = [f"{'Stage':<16}{'ms':>10}{'bytes':>10}{'calls':>8}"]
+        for stage, timing in self.stages.items():
+            lines.append(f"{stage:<16}{timing.seconds * 1000:>10.2f}{timing.bytes:>10}{timing.calls:>8}")
+        lines.append(f"{'total':<16}{self.seconds * 1000:>10.2f}")
+        return "\n".join(lines)
+
+
+_current_profile: ContextVar[JobProfile | None] = ContextVar("tp_job_profile", default=None)
+
+# Callables notified with every finished job profile, e.g. a HistogramStore.
+_observers: list[Callable[[JobProfile], None]] = []
+
+
+def add_observer(observer: Callable[[JobProfile], None]) -> None:
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def remove_observer(observer: Callable[[JobProfile], None]) -> None:
+    if observer in _observers:
+        _observers.remove(observer)
+
+
+@contextmanager
+def profile_job(name: str, profile: JobProfile | None = None) -> Iterator[JobProfile]:
+    """
+    Collect the stage timings recorded in this context into one job profile.
+    Nested calls share the outermost profile, so callers can widen the measured span.
+    Passing an existing profile adds another span to it; reporting it is then left to its owner.
+    """
+    current = _current_profile.get()
+    if current is not None:
+        yield current
+        return
+    owned = profile is None
+    profile = profile or JobProfile(name)
+    token = _current_profile.set(profile)
+    started = time.perf_counter()
+    try:
+        yield profile
+    except BaseException as e:
+        profile.error = type(e).__name__
+        raise
+    finally:
+        profile.seconds += time.perf_counter() - started
+        _current_profile.reset(token)
+        if owned:
+            report(profile)
+
+
+def report(profile: JobProfile) -> None:
+    """
+    Log a finished job profile and hand it to the observers.
+    """
+    summary = ", ".join(f"{stage}={timing.seconds * 1000:.2f}ms" for stage, timing in profile.stages.items())
+    logger.debug(
+        f"Job '{profile.name}' took {profile.seconds * 1000:.2f}ms: {summary}", extra={"profile": profile.to_dict()}
+    )
+    for observer in list(_observers):
+        observer(profile)
+
+
+class Stage:
+    """
+    Context manager timing one pipeline stage into the current job profile, if any.
+    Byte counts can be attached with `add_bytes`.
+    """
+
+    __slots__ = ("name", "size", "_started")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.size = 0
+
+    def __enter__(self) -> "Stage":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.record(self.name, time.perf_counter() - self._started, self.size)
+
+    def add_bytes(self, size: int) -> None:
+        self.size += size
+
+
+def stage(name: str) -> Stage:
+    return Stage(name)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram of observed values.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Bucket upper bounds mapped to cumulative counts, plus the sum and count.
+        """
+        with self._lock:
+            counts = list(self.counts)
+            total, count = self.sum, self.count
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip((*self.buckets, float("inf")), counts, strict=True):
+            cumulative += bucket_count
+            buckets[bound] = cumulative
+        return {"buckets": buckets, "sum": total, "count": count}
+
+
+class HistogramStore:
+    """
+    In-process store of stage duration histograms, fed with finished job profiles.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.histograms: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram(self.buckets))
+        return histogram
+
+    def __call__(self, profile: JobProfile) -> None:
+        self.histogram("job").observe(profile.seconds)
+        for name, timing in profile.stages.items():
+            self.histogram(name).observe(timing.seconds)
@@ -1,50 +1,51 @@
-from typing import Any
+from typing import Any, cast
 
-from mistune import BlockState
-from mistune.renderers.markdown import MarkdownRenderer
+from mistune import Markdown
 
+from tp.segments import DEFAULT_STYLE, Segment, Style
 
-class PrinterRenderer(MarkdownRenderer):
-    def __init__(self, chars_per_line: int):
-        super().__init__()
-        self.chars_per_line = chars_per_line
-        self.segments: list[dict[str, Any]] = []
-
-    def _join_children(self, token: dict) -> str:
-        return "".join(child["raw"] for child in token["children"])
-
-    def text(self, token: dict, state: BlockState) -> str:
-        text = token["raw"]
-
-        self.segments.append({"text": text, "styles": {}})
-        return text
-
-    def strong(self, token: dict, state: BlockState) -> str:
-        text = self._join_children(token)
-
-        self.segments.append({"text": text, "styles": {"bold": True}})
-        return text
+BOLD = Style(bold=True)
+ITALIC = Style(italic=True)
+CODE = Style(font="b")
 
-    def emphasis(self, token: dict, state: BlockState) -> str:
-        text = self._join_children(token)
 
-        self.segments.append({"text": text, "styles": {"italic": True}})
-        return text
+class PrinterRenderer:
+    """
+    Renders Markdown straight into printer segments in a single walk over mistune's token stream.
+    The parser is built once, so one renderer can be reused for any number of texts.
+    """
 
-    def codespan(self, token: dict, state: BlockState) -> str:
-        text = self._join_children(token)
-
-        self.segments.append({"text": text, "styles": {"font": "b"}})
-        return text
-
-    def linebreak(self, token: dict, state: BlockState) -> str:
-        text = "\n\n"
-
-        self.segments.append({"text": text, "styles": {}})
-        return text
-
-    def softbreak(self, token: dict, state: BlockState) -> str:
-        text = "\n"
-
-        self.segments.append({"text": text, "styles": {}})
-        return text
+    def __init__(self, chars_per_line: int):
+        self.chars_per_line = chars_per_line
+        self._markdown = Markdown()
+
+    def render(self, text: str) -> list[Segment]:
+        # Without a renderer, mistune returns the token list rather than rendered text.
+        tokens, _ = self._markdown.parse(text)
+        segments: list[Segment] = []
+        self._render_tokens(cast(list[dict[str, Any]], tokens), segments)
+        return segments
+
+    def _render_tokens(self, tokens: list[dict[str, Any]], segments: list[Segment]) -> None:
+        for token in tokens:
+            match token["type"]:
+                case "text":
+                    segments.append(Segment(token["raw"], DEFAULT_STYLE))
+                case "strong":
+                    segments.append(Segment(self._plain_text(token), BOLD))
+                case "emphasis":
+                    segments.append(Segment(self._plain_text(token), ITALIC))
+                case "codespan":
+                    segments.append(Segment(token["raw"], CODE))
+                case "linebreak":
+                    segments.append(Segment("\n\n", DEFAULT_STYLE))
+                case "softbreak":
+                    segments.append(Segment("\n", DEFAULT_STYLE))
+                case _:
+                    if "children" in token:
+                        self._render_tokens(token["children"], segments)
+
+    def _plain_text(self, token: dict[str, Any]) -> str:
+        if "children" in token:
+            return "".join(self._plain_text(child) for child in token["children"])
+        return token.get("raw", "")
@@ -0,0 +1,163 @@
+import threading
+from collections.abc import Callable
+
+from tp.instrumentation import DEFAULT_BUCKETS, Histogram, JobProfile
+
+LabelValues = tuple[str, ...]
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+    """
+    Monotonic counter, optionally split by label values.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._values: dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge:
+    """
+    Gauge whose value is read from a callback when the metrics are collected,
+    so nothing is updated on the hot path.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, callback: Callable[[], float]) -> None:
+        self.name = name
+        self.description = description
+        self.callback = callback
+
+    def samples(self) -> list[str]:
+        return [f"{self.name} {_format_value(self.callback())}"]
+
+
+class LabeledHistogram:
+    """
+    A Histogram per combination of label values.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, description: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> None:
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        self._histograms: dict[LabelValues, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        histogram = self._histograms.get(label_values)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(label_values, Histogram(self.buckets))
+        histogram.observe(value)
+
+    def samples(self) -> list[str]:
+        lines = []
+        for key, histogram in list(self._histograms.items()):
+            snapshot = histogram.snapshot()
+            for bound, count in snapshot["buckets"].items():
+                labels = _format_labels(self.labels, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(snapshot['sum'])}")
+            lines.append(f"{self.name}_count{labels} {snapshot['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Print job metrics in the Prometheus text exposition format.
+
+    Job metrics are fed from finished job profiles (register `observe_job` with
+    `tp.instrumentation.add_observer`), so they are aggregated off the request path.
+    """
+
+    def __init__(self) -> None:
+        self.jobs = Counter("tp_jobs_total", "Print jobs finished, by template and status.", ("template", "status"))
+        self.errors = Counter("tp_errors_total", "Failed print jobs, by error type.", ("error",))
+        self.bytes_sent = Counter("tp_bytes_sent_total", "Bytes sent to printers.")
+        self.job_duration = LabeledHistogram(
+            "tp_job_duration_seconds", "Print job duration, by template.", ("template",)
+        )
+        self.stage_duration = LabeledHistogram(
+            "tp_stage_duration_seconds",
+            "Time spent per job in each pipeline stage (render, connect, send, ...).",
+            ("stage",),
+        )
+        self.metrics: list[Counter | Gauge | LabeledHistogram] = [
+            self.jobs,
+            self.errors,
+            self.bytes_sent,
+            self.job_duration,
+            self.stage_duration,
+        ]
+
+    def gauge(self, name: str, description: str, callback: Callable[[], float]) -> Gauge:
+        gauge = Gauge(name, description, callback)
+        self.metrics.append(gauge)
+        return gauge
+
+    def observe_job(self, profile: JobProfile) -> None:
+        if profile.error:
+            status = "failed"
+        elif profile.spooled:
+            status = "spooled"
+        else:
+            status = "done"
+        self.jobs.inc(1, profile.name, status)
+        if profile.error:
+            self.errors.inc(1, profile.error)
+        self.job_duration.observe(profile.seconds, profile.name)
+        for stage, timing in profile.stages.items():
+            self.stage_duration.observe(timing.seconds, stage)
+        send = profile.stages.get("send")
+        if send and send.bytes:
+            self.bytes_sent.inc(send.bytes)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
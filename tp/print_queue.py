@@ -0,0 +1,208 @@
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from enum import StrEnum
+from typing import Any
+
+from tp.connection_pool import UNREACHABLE_ERRORS, PrinterConnectionPool
+from tp.health import HealthMonitor
+from tp.instrumentation import JobProfile, profile_job, report
+from tp.printer import ThermalPrinter
+from tp.printers import PrinterProfile, PrinterRouter
+from tp.spool import Spool
+from tp.template_manager import TemplateManager
+from tp.utils import TemplateRenderer
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(StrEnum):
+    QUEUED = "queued"
+    PRINTING = "printing"
+    # The printer was unreachable; the job waits in the spool for a retry.
+    SPOOLED = "spooled"
+    DONE = "done"
+    FAILED = "failed"
+
+
+@dataclass
+class PrintJob:
+    # Address of the printer the job is queued for.
+    printer: str
+    template_name: str
+    context: dict[str, Any]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: JobStatus = JobStatus.QUEUED
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    # Printer profile, group or address the job was submitted for.
+    target: str | None = None
+    # The printer the job is queued for, followed by its failover printers.
+    profiles: list[PrinterProfile] = field(default_factory=list)
+    # Stage timings of every attempt, reported once when the job finishes.
+    job_profile: JobProfile = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.job_profile = JobProfile(self.template_name)
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        del data["context"]
+        del data["job_profile"]
+        data["profiles"] = [profile.name for profile in self.profiles]
+        return data
+
+
+class PrintQueue:
+    """
+    Queues print jobs and prints them in the background, with one worker thread per printer
+    draining that printer's jobs in submission order.
+
+    Jobs submitted for a printer group go to the member picked by the group's strategy.
+    When that printer cannot be reached, the job moves to the back of the next member's queue.
+    """
+
+    def __init__(
+        self,
+        template_manager: TemplateManager,
+        template_renderer: TemplateRenderer | None = None,
+        pool: PrinterConnectionPool | None = None,
+        max_finished: int = 1000,
+        spool: Spool | None = None,
+        health: HealthMonitor | None = None,
+        router: PrinterRouter | None = None,
+    ) -> None:
+        self.template_manager = template_manager
+        self.template_renderer = template_renderer or TemplateRenderer(template_manager)
+        self.pool = pool or PrinterConnectionPool()
+        self.max_finished = max_finished
+        self.spool = spool
+        self.health = health
+        self.router = router or PrinterRouter(is_down=health.is_down if health else None, depth=self.depth)
+        self._queues: dict[str, queue.Queue[PrintJob]] = {}
+        self._jobs: OrderedDict[str, PrintJob] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, printer: str | None, template_name: str, context: dict[str, Any]) -> PrintJob:
+        """
+        Enqueue a job and return it immediately. `printer` names a printer profile or group, or is
+        a printer address; without one, the template's printer or else the default printer is used.
+        """
+        template = self.template_manager.templates.get(template_name) or {}
+        target = printer or template.get("printer")
+        profiles = self.router.resolve(target, template.get("requires", []))
+        job = PrintJob(
+            printer=profiles[0].address, template_name=template_name, context=context, target=target, profiles=profiles
+        )
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim()
+        self._enqueue(job)
+        logger.info(f"Queued job {job.id} for template '{template_name}' on {job.printer}")
+        return job
+
+    def get(self, job_id: str) -> PrintJob | None:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> list[PrintJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def depth(self, printer: str | None = None) -> int:
+        """
+        Number of jobs waiting to be printed, for one printer or across all of them.
+        """
+        if printer is not None:
+            jobs = self._queues.get(printer)
+            return jobs.qsize() if jobs else 0
+        return sum(jobs.qsize() for jobs in list(self._queues.values()))
+
+    def join(self) -> None:
+        """
+        Block until every queued job has been processed.
+        """
+        # A job that fails over is queued again for another printer, possibly one already joined.
+        while True:
+            for jobs in list(self._queues.values()):
+                jobs.join()
+            if not any(jobs.unfinished_tasks for jobs in list(self._queues.values())):
+                return
+
+    def _enqueue(self, job: PrintJob) -> None:
+        with self._lock:
+            jobs = self._queues.get(job.printer)
+            if jobs is None:
+                jobs = self._queues[job.printer] = queue.Queue()
+                worker = threading.Thread(
+                    target=self._work, args=(jobs,), name=f"print-worker-{job.printer}", daemon=True
+                )
+                worker.start()
+        jobs.put(job)
+
+    def _work(self, jobs: queue.Queue[PrintJob]) -> None:
+        while True:
+            job = jobs.get()
+            job.status = JobStatus.PRINTING
+            profile, *failover = job.profiles
+            # Once a job has moved to another printer's queue, that printer's worker finishes it.
+            moved = False
+            try:
+                with (
+                    profile_job(job.template_name, job.job_profile),
+                    ThermalPrinter(
+                        job.printer,
+                        self.template_manager,
+                        pool=self.pool,
+                        template_renderer=self.template_renderer.for_profile(profile),
+                        # With another printer to fail over to, the job is only spooled by the last one.
+                        spool=None if failover else self.spool,
+                        health=self.health,
+                    ) as printer,
+                ):
+                    printed = printer.print_template(job.template_name, job.context)
+                if printed:
+                    job.status = JobStatus.DONE
+                    logger.info(f"Printed job {job.id} using template '{job.template_name}'.")
+                else:
+                    job.status = JobStatus.SPOOLED
+                    logger.info(f"Spooled job {job.id} until {job.printer} can be reached.")
+            except UNREACHABLE_ERRORS as e:
+                if failover:
+                    logger.warning(
+                        f"Printer '{profile.name}' is unreachable, moving job {job.id} to '{failover[0].name}': {e}"
+                    )
+                    job.profiles = failover
+                    job.printer = failover[0].address
+                    # Failing over handled the error, so it does not count against the job.
+                    job.job_profile.error = None
+                    job.status = JobStatus.QUEUED
+                    moved = True
+                    self._enqueue(job)
+                else:
+                    self._fail(job, e)
+            except Exception as e:
+                self._fail(job, e)
+            finally:
+                if not moved:
+                    job.finished_at = time.time()
+                    report(job.job_profile)
+                jobs.task_done()
+
+    def _fail(self, job: PrintJob, error: Exception) -> None:
+        logger.error(f"Error printing job {job.id}: {error}", exc_info=True)
+        job.error = str(error)
+        job.status = JobStatus.FAILED
+
+    def _trim(self) -> None:
+        finished = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.status in (JobStatus.DONE, JobStatus.FAILED, JobStatus.SPOOLED)
+        ]
+        for job_id in finished[: max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
@@ -1,84 +1,397 @@
 import logging
+from collections.abc import Callable, Generator, Iterable, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass
+from functools import cache
 from typing import Any
 
-from escpos.printer import Network
+from escpos.escpos import Escpos
+from escpos.printer import Dummy, Network
 
+from tp.connection_pool import UNREACHABLE_ERRORS, PrinterConnectionPool, split_address
+from tp.encoding import CodepageEncoder
+from tp.health import HealthMonitor, PrinterDownError
+from tp.instrumentation import profile_job, stage
+from tp.printers import NoPrinterError, PrinterProfile
+from tp.segments import DEFAULT_STYLE, Segment, Style
+from tp.spool import Spool, send_jobs
 from tp.template_manager import TemplateManager
 from tp.utils import TemplateRenderer
 
 logger = logging.getLogger(__name__)
 
 
+@cache
+def printer_styles(style: Style) -> dict[str, Any]:
+    """
+    Resolve a segment's style into the complete set of printer text properties.
+    The result is shared between calls and must not be modified.
+    """
+    return {
+        "align": style.align,
+        "font": style.font,
+        "bold": style.bold,
+        "underline": style.underline,
+        "invert": style.italic,
+        "double_width": style.double_width,
+        "double_height": style.double_height,
+    }
+
+
+DEFAULT_STYLES: dict[str, Any] = dict(printer_styles(DEFAULT_STYLE))
+
+
+@cache
+def style_changes(current: Style | None, target: Style) -> dict[str, Any]:
+    """
+    Return only the printer properties that differ between the current and target style.
+    An unknown current state (None) yields every property.
+    Styles are interned, so each transition is computed once; the result must not be modified.
+    """
+    target_properties = printer_styles(target)
+    if current is None:
+        changes = dict(target_properties)
+    else:
+        current_properties = printer_styles(current)
+        changes = {key: value for key, value in target_properties.items() if current_properties[key] != value}
+    if "double_width" in changes or "double_height" in changes:
+        # Text size is a single printer setting, so both halves are always sent together.
+        changes["double_width"] = target.double_width
+        changes["double_height"] = target.double_height
+        changes["normal_textsize"] = not (target.double_width or target.double_height)
+        # The size is set with ESC !, which also resets bold, underline and the font; python-escpos
+        # sends those after the size, so they are restored.
+        changes["bold"] = target.bold
+        changes["underline"] = target.underline
+        changes["font"] = target.font
+    return changes
+
+
+def coalesce_segments(
+    segments: list[Segment], encoder: CodepageEncoder | None = None
+) -> list[tuple[Style, str | bytes]]:
+    """
+    Merge adjacent segments that print in the same style. Empty segments are dropped.
+    With an encoder, each run is returned as encoded bytes, reusing the pre-encoded `data`
+    of segments that carry it.
+    """
+    runs: list[tuple[Style, list[Any]]] = []
+    for segment in segments:
+        text: str | bytes = segment.text
+        if not text:
+            continue
+        if encoder:
+            text = segment.data or encoder.encode(segment.text)
+        style = segment.style
+        # Interned styles compare by identity.
+        if runs and runs[-1][0] is style:
+            runs[-1][1].append(text)
+        else:
+            runs.append((style, [text]))
+    joiner = b"" if encoder else ""
+    return [(style, joiner.join(texts)) for style, texts in runs]
+
+
+def write_segments(printer: Escpos, segments: list[Segment], encoder: CodepageEncoder | None = None) -> None:
+    """
+    Emit the style and text commands for each segment to the given printer, then reset the styles.
+    Only style properties that change between segments are sent.
+    With an encoder, the codepage is selected once and text is sent pre-encoded; otherwise
+    python-escpos' magic encoder picks codepages as it goes.
+    """
+    if encoder:
+        printer._raw(encoder.select_command)
+    current: Style | None = None
+    for style, text in coalesce_segments(segments, encoder):
+        logger.debug("Printing segment: %s with style: %s", text, style)
+        changes = style_changes(current, style)
+        if changes:
+            printer.set(**changes)
+        current = style
+        if isinstance(text, bytes):
+            printer._raw(text)
+        else:
+            printer.text(text)
+    # Reset styles
+    changes = style_changes(current, DEFAULT_STYLE)
+    if changes:
+        printer.set(**changes)
+
+
+def encode_segments(segments: list[Segment], cut: bool = True, encoder: CodepageEncoder | None = None) -> bytes:
+    """
+    Compile segments into a single ESC/POS payload, optionally followed by a paper cut.
+    """
+    with stage("encode") as timing:
+        buffer = Dummy()
+        write_segments(buffer, segments, encoder)
+        if cut:
+            buffer.cut()
+        payload = buffer.output
+        timing.add_bytes(len(payload))
+    return payload
+
+
+@dataclass
+class JobResult:
+    index: int
+    template_name: str
+    error: str | None = None
+    # Set when the printer was unreachable and the job was left in the spool.
+    spooled: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
 class ThermalPrinter:
     """
     A class to interface with a thermal printer over the network.
     """
 
-    def __init__(self, ip_address: str, template_manager: TemplateManager):
+    def __init__(
+        self,
+        ip_address: str,
+        template_manager: TemplateManager,
+        pool: PrinterConnectionPool | None = None,
+        buffered: bool = True,
+        template_renderer: TemplateRenderer | None = None,
+        spool: Spool | None = None,
+        health: HealthMonitor | None = None,
+    ):
         """
-        Initialize the ThermalPrinter with the given IP address and TemplateManager.
+        Initialize the ThermalPrinter with the given IP address (optionally "host:port") and TemplateManager.
+        When a connection pool is given, the connection is borrowed from it instead of dialled.
+        When `buffered` is set, each job is compiled to one payload and sent with a single write;
+        otherwise every style and text command is written to the printer as it is emitted.
+        A long-lived TemplateRenderer can be shared to keep its compiled templates warm.
+        With a spool, every job is journaled before it is sent and kept for a later retry
+        when the printer cannot be reached.
+        With a health monitor, a printer known to be down is not dialled at all: the job fails
+        (or is spooled) at once, and the outcome of every send is reported back to the monitor.
         """
         self.ip_address = ip_address
         self.template_manager = template_manager
-        self.template_renderer = TemplateRenderer(template_manager)
+        self.pool = pool
+        self.buffered = buffered
+        self.template_renderer = template_renderer or TemplateRenderer(template_manager)
+        self.spool = spool
+        self.health = health
         logging.debug(f"Initialized ThermalPrinter with IP {ip_address}")
         self.printer: Network = None
 
     def __enter__(self) -> "ThermalPrinter":
-        self.printer = Network(self.ip_address, timeout=10)
+        with stage("connect"):
+            try:
+                if self.health is not None:
+                    self.health.ensure_up(self.ip_address)
+                if self.pool:
+                    self.printer = self.pool.acquire(self.ip_address)
+                else:
+                    host, port = split_address(self.ip_address)
+                    printer = Network(host, port=port, timeout=10)
+                    # python-escpos only connects on the first write; dial now so an unreachable
+                    # printer is detected here, where it can be spooled and reported to the health monitor.
+                    printer.open()
+                    self.printer = printer
+            except UNREACHABLE_ERRORS as e:
+                if self.health is not None and not isinstance(e, PrinterDownError):
+                    self.health.record(self.ip_address, str(e))
+                if self.spool is None:
+                    raise
+                logger.warning(f"Printer {self.ip_address} is unreachable, jobs will be spooled: {e}")
+                return self
         logging.debug("Opened printer connection.")
         return self
 
     def __exit__(
         self, exc_type: type[BaseException] | None, exc_val: BaseException | None, exc_tb: object | None
     ) -> None:
-        if self.printer:
+        if self.printer and self.pool:
+            self.pool.release(self.ip_address, self.printer, discard=exc_type is not None)
+        elif self.printer:
             try:
                 self.printer.close()
                 logging.debug("Closed printer connection.")
             except Exception as e:
                 logger.error(f"Error closing printer connection: {e}")
 
-    def print_segments(self, segments: list[dict[str, Any]]) -> None:
+    def print_segments(self, segments: list[Segment]) -> None:
         """
-        Given a list of segments, each a dict with 'text' and 'styles', print them accordingly.
+        Print the given segments, each in its own style.
         """
         try:
-            for segment in segments:
-                text = segment["text"]
-                styles = segment.get("styles", {})
-                logger.debug("Printing segment: %s with styles: %s", text, styles)
-                self.printer.set(
-                    align=styles.get("align", "left"),
-                    font=styles.get("font", "a"),
-                    bold=styles.get("bold", False),
-                    underline=styles.get("underline", False),
-                    invert=styles.get("italic", False),
-                    double_width=styles.get("double_width", False),
-                    double_height=styles.get("double_height", False),
-                )
-                self.printer.text(text)
-            # Reset styles
-            self.printer.set(
-                align="left",
-                font="a",
-                bold=False,
-                underline=False,
-                invert=False,
-                double_width=False,
-                double_height=False,
-            )
+            with stage("send"):
+                write_segments(self.printer, segments, self.template_renderer.encoder)
             logger.info("Printed segments successfully.")
         except Exception as e:
             logger.error(f"Error printing segments: {e}", exc_info=True)
             raise
 
-    def print_template(self, template_name: str, context: dict[str, Any]) -> None:
+    def send(self, payload: bytes) -> None:
+        """
+        Send a compiled ESC/POS payload to the printer in one write.
+        """
+        try:
+            with stage("send") as timing:
+                self.printer._raw(payload)
+                timing.add_bytes(len(payload))
+            logger.info(f"Sent {len(payload)} bytes to the printer.")
+            if self.health is not None:
+                self.health.record(self.ip_address)
+        except UNREACHABLE_ERRORS as e:
+            logger.error(f"Error sending payload: {e}")
+            if self.health is not None:
+                self.health.record(self.ip_address, str(e))
+            raise
+        except Exception as e:
+            logger.error(f"Error sending payload: {e}", exc_info=True)
+            raise
+
+    def print_template(self, template_name: str, context: dict[str, Any]) -> bool:
         """
         Render and print a template by name with the given context.
+        Returns False when the printer was unreachable and the job was left in the spool.
         """
-        if not self.printer:
+        if not self.printer and self.spool is None:
+            raise RuntimeError("Printer connection is not open.")
+        with profile_job(template_name) as profile:
+            segments = self.template_renderer.render_from_template(template_name, context)
+            printed = self._print_with_retry(segments, template_name)
+            profile.spooled = not printed
+            return printed
+
+    def print_many(self, jobs: Iterable[tuple[str, dict[str, Any]]]) -> Iterator[JobResult]:
+        """
+        Render and print (template name, context) jobs back-to-back over the open connection,
+        yielding one result per job. Jobs are consumed lazily, so only one is held at a time.
+        A job that fails to render is reported and skipped; connection errors end the batch.
+        """
+        if not self.printer and self.spool is None:
             raise RuntimeError("Printer connection is not open.")
-        segments = self.template_renderer.render_from_template(template_name, context)
-        self.print_segments(segments)
-        self.printer.cut()
+        for index, (template_name, context) in enumerate(jobs, start=1):
+            with profile_job(template_name) as profile:
+                try:
+                    segments = self.template_renderer.render_from_template(template_name, context)
+                except Exception as e:
+                    logger.error(f"Error rendering batch job {index} with template '{template_name}': {e}")
+                    profile.error = type(e).__name__
+                    result = JobResult(index, template_name, str(e))
+                else:
+                    printed = self._print_with_retry(segments, template_name)
+                    profile.spooled = not printed
+                    result = JobResult(index, template_name, spooled=not printed)
+            yield result
+
+    def _print_with_retry(self, segments: list[Segment], template_name: str) -> bool:
+        if self.spool is not None:
+            return self._print_spooled(segments, template_name)
+        self._reconnect_if_dropped()
+        self._print(segments)
+        return True
+
+    def _print_spooled(self, segments: list[Segment], template_name: str) -> bool:
+        assert self.spool is not None  # nosec B101
+        payload = encode_segments(segments, encoder=self.template_renderer.encoder)
+        job = self.spool.append(self.ip_address, template_name, payload)
+        if not self.printer:
+            self.spool.retry_later(job.id, f"Printer {self.ip_address} is unreachable")
+            return False
+        # Older jobs still waiting for this printer are sent first.
+        jobs = self.spool.claim(self.ip_address, due_only=False)
+        sent = send_jobs(self.spool, jobs, self.send, self._reconnect_if_dropped)
+        return any(spooled.id == job.id for spooled in jobs[:sent])
+
+    def _reconnect_if_dropped(self) -> None:
+        """
+        Replace a pooled connection the printer has dropped, e.g. while it sat idle, before a job is written.
+        A send that fails part-way is not retried: the printer may already have printed part of the job,
+        and sending it again would print it twice.
+        """
+        if self.pool and not self.pool.is_alive(self.printer):
+            self.printer = self.pool.reconnect(self.ip_address, self.printer)
+
+    def _print(self, segments: list[Segment]) -> None:
+        if self.buffered:
+            self.send(encode_segments(segments, encoder=self.template_renderer.encoder))
+        else:
+            self.print_segments(segments)
+            self.printer.cut()
+
+
+def print_with_failover(
+    profiles: list[PrinterProfile],
+    template_name: str,
+    context: dict[str, Any],
+    template_manager: TemplateManager,
+    template_renderer: TemplateRenderer | None = None,
+    pool: PrinterConnectionPool | None = None,
+    spool: Spool | None = None,
+    health: HealthMonitor | None = None,
+    lock: Callable[[str], AbstractContextManager[Any]] = nullcontext,
+) -> tuple[PrinterProfile, bool]:
+    """
+    Print a job on the first of the given printers that can be reached, rendered for that printer.
+    Only the last printer spools the job, so it waits in the spool only when none of them can be reached.
+    `lock` is entered with each printer's address around its attempt.
+    Returns the printer that took the job and whether it was printed rather than spooled.
+    """
+    renderer = template_renderer or TemplateRenderer(template_manager)
+    for attempt, profile in enumerate(profiles, start=1):
+        last = attempt == len(profiles)
+        try:
+            with (
+                lock(profile.address),
+                ThermalPrinter(
+                    profile.address,
+                    template_manager,
+                    pool=pool,
+                    template_renderer=renderer.for_profile(profile),
+                    spool=spool if last else None,
+                    health=health,
+                ) as printer,
+            ):
+                return profile, printer.print_template(template_name, context)
+        except UNREACHABLE_ERRORS as e:
+            if last:
+                raise
+            logger.warning(f"Printer '{profile.name}' is unreachable, failing over to '{profiles[attempt].name}': {e}")
+    raise NoPrinterError("No printer to print on.")
+
+
+@contextmanager
+def connect_with_failover(
+    profiles: list[PrinterProfile],
+    template_manager: TemplateManager,
+    template_renderer: TemplateRenderer | None = None,
+    spool: Spool | None = None,
+) -> Generator[ThermalPrinter, None, None]:
+    """
+    Open a connection to the first of the given printers that can be reached.
+    Only the last printer spools jobs when it cannot be reached.
+    """
+    renderer = template_renderer or TemplateRenderer(template_manager)
+    for attempt, profile in enumerate(profiles, start=1):
+        last = attempt == len(profiles)
+        printer = ThermalPrinter(
+            profile.address,
+            template_manager,
+            template_renderer=renderer.for_profile(profile),
+            spool=spool if last else None,
+        )
+        try:
+            connected = printer.__enter__()
+        except UNREACHABLE_ERRORS as e:
+            if last:
+                raise
+            logger.warning(f"Printer '{profile.name}' is unreachable, failing over to '{profiles[attempt].name}': {e}")
+            continue
+        try:
+            yield connected
+        except BaseException as e:
+            printer.__exit__(type(e), e, e.__traceback__)
+            raise
+        printer.__exit__(None, None, None)
+        return
+    raise NoPrinterError("No printer to print on.")
@@ -0,0 +1,249 @@
+import configparser
+import logging
+import threading
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import Any
+
+from tp.config import (
+    ConfigSnapshot,
+    get_chars_per_line,
+    get_codepage,
+    get_config,
+    get_default_printer,
+    get_enable_special_letters,
+    get_printer_address,
+)
+from tp.encoding import check_codepage
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SECTION_PREFIX = "Printer:"
+GROUP_SECTION_PREFIX = "Group:"
+# Name of the profile made from the `[Printer]` section.
+DEFAULT_PROFILE = "default"
+
+
+class Strategy(StrEnum):
+    ROUND_ROBIN = "round_robin"
+    # The member with the fewest jobs waiting, taking turns between members that are equally busy.
+    LEAST_QUEUED = "least_queued"
+
+
+class NoPrinterError(ValueError):
+    """
+    Raised when no configured printer can take a job.
+    """
+
+
+@dataclass(frozen=True)
+class PrinterProfile:
+    name: str
+    address: str
+    chars_per_line: int = 32
+    codepage: str = "cp852"
+    enable_special_letters: bool = False
+    # Free-form features of the printer, e.g. "cutter", that templates can require.
+    capabilities: frozenset[str] = frozenset()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "address": self.address,
+            "chars_per_line": self.chars_per_line,
+            "codepage": self.codepage,
+            "enable_special_letters": self.enable_special_letters,
+            "capabilities": sorted(self.capabilities),
+        }
+
+
+@dataclass(frozen=True)
+class PrinterGroup:
+    name: str
+    members: tuple[str, ...]
+    strategy: Strategy = Strategy.ROUND_ROBIN
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"name": self.name, "members": list(self.members), "strategy": self.strategy}
+
+
+@dataclass(frozen=True)
+class PrinterRegistry:
+    profiles: dict[str, PrinterProfile]
+    groups: dict[str, PrinterGroup]
+    # Profile or group for jobs that do not name a printer.
+    default: str
+
+    def names(self) -> list[str]:
+        return [*self.profiles, *self.groups]
+
+
+def _split(value: str) -> list[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _load_profile(config: ConfigSnapshot, section: str, name: str, address: str) -> PrinterProfile:
+    """
+    Build a profile from a config section, taking the options it leaves out from `[Printer]`.
+    """
+
+    def option(getter: Callable[[str, str], Any], key: str, fallback: Callable[[], Any]) -> Any:
+        try:
+            return getter(section, key)
+        except (configparser.NoSectionError, configparser.NoOptionError):
+            return fallback()
+
+    try:
+        codepage = check_codepage(option(config.get, "codepage", get_codepage))
+    except ValueError as e:
+        raise ValueError(f"Printer '{name}': {e}") from e
+    return PrinterProfile(
+        name=name,
+        address=address,
+        chars_per_line=option(config.getint, "chars_per_line", get_chars_per_line),
+        codepage=codepage,
+        enable_special_letters=option(config.getboolean, "enable_special_letters", get_enable_special_letters),
+        capabilities=frozenset(_split(option(config.get, "capabilities", str))),
+    )
+
+
+def _load_registry(config: ConfigSnapshot) -> PrinterRegistry:
+    profiles: dict[str, PrinterProfile] = {}
+    groups: dict[str, PrinterGroup] = {}
+    try:
+        address = get_printer_address()
+    except ValueError:
+        # No printer IP is set; only named profiles are available.
+        address = None
+    if address is not None:
+        profiles[DEFAULT_PROFILE] = _load_profile(config, "Printer", DEFAULT_PROFILE, address)
+
+    for section in config.sections():
+        if section.startswith(PROFILE_SECTION_PREFIX):
+            name = section.removeprefix(PROFILE_SECTION_PREFIX).strip()
+            try:
+                address = config.get(section, "address")
+            except configparser.NoOptionError as e:
+                raise ValueError(f"Printer '{name}' has no address.") from e
+            profiles[name] = _load_profile(config, section, name, address)
+
+    for section in config.sections():
+        if section.startswith(GROUP_SECTION_PREFIX):
+            name = section.removeprefix(GROUP_SECTION_PREFIX).strip()
+            if name in profiles:
+                raise ValueError(f"Group '{name}' has the same name as a printer.")
+            try:
+                members = tuple(_split(config.get(section, "members")))
+            except configparser.NoOptionError:
+                members = ()
+            if not members:
+                raise ValueError(f"Group '{name}' has no members.")
+            unknown = [member for member in members if member not in profiles]
+            if unknown:
+                raise ValueError(f"Group '{name}' has unknown members: {', '.join(unknown)}")
+            try:
+                strategy = Strategy(config.get(section, "strategy"))
+            except configparser.NoOptionError:
+                strategy = Strategy.ROUND_ROBIN
+            except ValueError as e:
+                raise ValueError(f"Group '{name}' has an unknown strategy. Use one of: {', '.join(Strategy)}") from e
+            groups[name] = PrinterGroup(name, members, strategy)
+
+    default = get_default_printer()
+    if default is not None and default not in profiles and default not in groups:
+        raise ValueError(f"The default printer '{default}' is not a configured printer or group.")
+    return PrinterRegistry(profiles, groups, default or DEFAULT_PROFILE)
+
+
+_registry_lock = threading.Lock()
+_registry: tuple[ConfigSnapshot, PrinterRegistry] | None = None
+
+
+def load_printers() -> PrinterRegistry:
+    """
+    Printer profiles from the `[Printer:<name>]` sections and groups from the `[Group:<name>]` sections
+    of the configuration. When a printer IP is set, `[Printer]` is the profile named "default".
+    The result is parsed once per configuration snapshot.
+    """
+    global _registry
+    config = get_config()
+    entry = _registry
+    if entry is not None and entry[0] is config:
+        return entry[1]
+    with _registry_lock:
+        registry = _load_registry(config)
+        _registry = (config, registry)
+    return registry
+
+
+def check_printer_name(name: str) -> str:
+    """
+    Return `name` when it is a configured printer profile or group, so that a printer picked by
+    a client cannot point the server at an arbitrary host.
+    """
+    names = load_printers().names()
+    if name not in names:
+        raise NoPrinterError(f"Unknown printer '{name}'. Use one of: {', '.join(names)}")
+    return name
+
+
+class PrinterRouter:
+    """
+    Picks the printers a job is sent to: a named profile, the members of a group, or a bare address.
+
+    A group's members are ordered by its strategy, with members known to be down moved to the back.
+    The first printer takes the job and the others are its failover targets, in order.
+    """
+
+    def __init__(self, is_down: Callable[[str], bool] | None = None, depth: Callable[[str], int] | None = None) -> None:
+        """
+        `is_down` tells whether the printer at an address is known to be unreachable, and `depth`
+        how many jobs are waiting for it; without them every member counts as up and idle.
+        """
+        self.is_down = is_down
+        self.depth = depth
+        self._turns: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, target: str | None = None, requires: Iterable[str] = ()) -> list[PrinterProfile]:
+        """
+        Printers to try for a job, in order. `target` names a profile or group, or is a printer address;
+        without one, the default printer is used.
+        Printers lacking any of the `requires` capabilities are left out.
+        """
+        registry = load_printers()
+        name = target or registry.default
+        required = frozenset(requires)
+        group = registry.groups.get(name)
+        if group is not None:
+            members = [registry.profiles[member] for member in group.members]
+            members = [profile for profile in members if required <= profile.capabilities]
+            if not members:
+                raise NoPrinterError(f"No printer in group '{name}' has {', '.join(sorted(required))}.")
+            return self._order(group, members)
+        profile = registry.profiles.get(name)
+        if profile is None:
+            if target is None:
+                raise NoPrinterError("Printer IP address not set")
+            # An address rather than a name, printed on with the [Printer] settings.
+            return [_load_profile(get_config(), "Printer", target, target)]
+        missing = required - profile.capabilities
+        if missing:
+            raise NoPrinterError(f"Printer '{name}' does not have {', '.join(sorted(missing))}.")
+        return [profile]
+
+    def _order(self, group: PrinterGroup, members: list[PrinterProfile]) -> list[PrinterProfile]:
+        with self._lock:
+            turn = self._turns.get(group.name, 0)
+            self._turns[group.name] = turn + 1
+        start = turn % len(members)
+        members = members[start:] + members[:start]
+        # Sorting is stable, so members that compare equal keep taking turns.
+        depth = self.depth
+        if group.strategy == Strategy.LEAST_QUEUED and depth is not None:
+            members.sort(key=lambda profile: depth(profile.address))
+        is_down = self.is_down
+        if is_down is not None:
+            members.sort(key=lambda profile: is_down(profile.address))
+        return members
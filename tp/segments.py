@@ -0,0 +1,107 @@
+import threading
+from typing import Any
+
+
+class Style:
+    """
+    Immutable text style of a segment.
+
+    Styles are interned: constructing a style with the same properties returns the same object,
+    so every distinct combination exists once and styles can be compared by identity.
+    """
+
+    __slots__ = ("align", "font", "bold", "underline", "italic", "double_width", "double_height")
+
+    align: str
+    font: str
+    bold: bool
+    underline: bool
+    italic: bool
+    double_width: bool
+    double_height: bool
+
+    _interned: dict[tuple[Any, ...], "Style"] = {}
+    _lock = threading.Lock()
+
+    def __new__(
+        cls,
+        align: str = "left",
+        font: str = "a",
+        bold: bool = False,
+        underline: bool = False,
+        italic: bool = False,
+        double_width: bool = False,
+        double_height: bool = False,
+    ) -> "Style":
+        key = (align, font, bool(bold), bool(underline), bool(italic), bool(double_width), bool(double_height))
+        style = cls._interned.get(key)
+        if style is None:
+            style = object.__new__(cls)
+            for name, value in zip(cls.__slots__, key, strict=True):
+                object.__setattr__(style, name, value)
+            with cls._lock:
+                style = cls._interned.setdefault(key, style)
+        return style
+
+    @classmethod
+    def from_dict(cls, styles: dict[str, Any]) -> "Style":
+        """
+        Build a style from a template's `styles` mapping, ignoring properties it does not know.
+        """
+        return cls(**{name: value for name, value in styles.items() if name in cls.__slots__})
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        The properties that differ from the default style.
+        """
+        return {
+            name: getattr(self, name) for name in self.__slots__ if getattr(self, name) != getattr(DEFAULT_STYLE, name)
+        }
+
+    def replace(self, **changes: Any) -> "Style":
+        return Style(**{**{name: getattr(self, name) for name in self.__slots__}, **changes})
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Style is immutable")
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # Unpickled styles go through __new__ so they are interned too.
+        return Style, tuple(getattr(self, name) for name in self.__slots__)
+
+    def __copy__(self) -> "Style":
+        return self
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "Style":
+        return self
+
+    def __repr__(self) -> str:
+        properties = ", ".join(f"{name}={value!r}" for name, value in self.to_dict().items())
+        return f"Style({properties})"
+
+
+DEFAULT_STYLE = Style()
+
+
+class Segment:
+    """
+    A run of text printed in one style.
+    `data` optionally holds the text already encoded for the printer, which is then sent as is.
+    """
+
+    __slots__ = ("text", "style", "data")
+
+    def __init__(self, text: str, style: Style = DEFAULT_STYLE, data: bytes | None = None) -> None:
+        self.text = text
+        self.style = style
+        self.data = data
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Segment):
+            return NotImplemented
+        return self.text == other.text and self.style is other.style and self.data == other.data
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        data = f", data={self.data!r}" if self.data is not None else ""
+        return f"Segment({self.text!r}, {self.style!r}{data})"
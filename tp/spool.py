@@ -0,0 +1,369 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from escpos.printer import Network
+
+from tp.config import get_spool_max_retry_delay, get_spool_path, get_spool_retry_delay
+from tp.connection_pool import UNREACHABLE_ERRORS, PrinterConnectionPool
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    printer TEXT NOT NULL,
+    template_name TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    claimed_until REAL NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_by_printer ON jobs (printer, id);
+"""
+
+_COLUMNS = "id, printer, template_name, payload, created_at, attempts, next_attempt_at, last_error"
+
+
+@dataclass
+class SpooledJob:
+    id: int
+    printer: str
+    template_name: str
+    payload: bytes
+    created_at: float
+    attempts: int = 0
+    next_attempt_at: float = 0.0
+    last_error: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "printer": self.printer,
+            "template_name": self.template_name,
+            "size": len(self.payload),
+            "created_at": self.created_at,
+            "attempts": self.attempts,
+            "next_attempt_at": self.next_attempt_at,
+            "last_error": self.last_error,
+        }
+
+
+@dataclass
+class DrainResult:
+    sent: int = 0
+    # Jobs left in the spool because their printer was unreachable.
+    remaining: int = 0
+    # Jobs dropped because the connection failed part-way through sending them; they may have partly printed.
+    failed: int = 0
+
+
+class Spool:
+    """
+    Durable journal of encoded print jobs, kept in an SQLite database in WAL mode.
+
+    A job is appended before it is sent and deleted once the printer has accepted it,
+    so jobs for a printer that is off or unreachable survive restarts and are retried
+    with exponential backoff. Senders claim jobs for a while, so two processes sharing
+    the spool do not print the same job twice.
+    """
+
+    def __init__(
+        self, path: str, retry_delay: float = 1.0, max_retry_delay: float = 300.0, claim_timeout: float = 60.0
+    ) -> None:
+        self.path = path
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.claim_timeout = claim_timeout
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        with self._lock:
+            # Must be set before the first table is created to take effect.
+            self._db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            self._db.execute("PRAGMA journal_mode = WAL")
+            # A job must be on disk before it is sent, not just in the WAL's OS buffers.
+            self._db.execute("PRAGMA synchronous = FULL")
+            self._db.executescript(_SCHEMA)
+
+    def append(self, printer: str, template_name: str, payload: bytes) -> SpooledJob:
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO jobs (printer, template_name, payload, created_at, next_attempt_at) VALUES (?, ?, ?, ?, ?)",
+                (printer, template_name, payload, now, now),
+            )
+        job_id = cursor.lastrowid
+        assert job_id is not None  # nosec B101
+        logger.debug(f"Spooled job {job_id} ({len(payload)} bytes) for {printer}")
+        return SpooledJob(job_id, printer, template_name, payload, now, next_attempt_at=now)
+
+    def get(self, job_id: int) -> SpooledJob | None:
+        with self._lock:
+            row = self._db.execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()  # nosec B608
+        return SpooledJob(*row) if row else None
+
+    def jobs(self, printer: str | None = None) -> list[SpooledJob]:
+        """
+        Spooled jobs in the order they will be printed, for one printer or for all of them.
+        """
+        query = f"SELECT {_COLUMNS} FROM jobs"  # nosec B608
+        params: tuple[Any, ...] = ()
+        if printer is not None:
+            query += " WHERE printer = ?"
+            params = (printer,)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY id", params).fetchall()
+        return [SpooledJob(*row) for row in rows]
+
+    def printers(self, due_only: bool = True, now: float | None = None) -> list[str]:
+        """
+        Printers with spooled jobs, optionally only those whose next retry is due.
+        """
+        now = time.time() if now is None else now
+        query = "SELECT DISTINCT printer FROM jobs"
+        params: tuple[Any, ...] = ()
+        if due_only:
+            query += " WHERE next_attempt_at <= ?"
+            params = (now,)
+        with self._lock:
+            return [row[0] for row in self._db.execute(query, params).fetchall()]
+
+    def claim(self, printer: str, due_only: bool = True, now: float | None = None) -> list[SpooledJob]:
+        """
+        Claim all of a printer's jobs for sending, oldest first.
+        Nothing is claimed while another sender holds a claim on the printer's jobs or, with
+        `due_only`, until the printer's oldest job is due for a retry, so jobs are never
+        printed out of order.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                claimed = self._db.execute(
+                    "SELECT 1 FROM jobs WHERE printer = ? AND claimed_until > ? LIMIT 1", (printer, now)
+                ).fetchone()
+                rows = []
+                if not claimed:
+                    rows = self._db.execute(
+                        f"SELECT {_COLUMNS} FROM jobs WHERE printer = ? ORDER BY id",
+                        (printer,),  # nosec B608
+                    ).fetchall()
+                if due_only and rows and rows[0][6] > now:
+                    rows = []
+                self._db.executemany(
+                    "UPDATE jobs SET claimed_until = ? WHERE id = ?",
+                    [(now + self.claim_timeout, row[0]) for row in rows],
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return [SpooledJob(*row) for row in rows]
+
+    def release(self, jobs: list[SpooledJob]) -> None:
+        """
+        Give up the claim on jobs that were not attempted.
+        """
+        with self._lock:
+            self._db.executemany("UPDATE jobs SET claimed_until = 0 WHERE id = ?", [(job.id,) for job in jobs])
+
+    def ack(self, job_id: int) -> None:
+        """
+        Remove a job the printer has accepted.
+        """
+        with self._lock:
+            self._db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def retry_later(self, job_id: int, error: str, now: float | None = None) -> float:
+        """
+        Record a failed attempt and schedule the next one with exponential backoff.
+        Returns the time of the next attempt.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._db.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            attempts = (row[0] if row else 0) + 1
+            next_attempt_at = now + min(self.max_retry_delay, self.retry_delay * 2 ** (attempts - 1))
+            self._db.execute(
+                "UPDATE jobs SET attempts = ?, next_attempt_at = ?, claimed_until = 0, last_error = ? WHERE id = ?",
+                (attempts, next_attempt_at, error, job_id),
+            )
+        return next_attempt_at
+
+    def remove(self, job_id: int) -> bool:
+        with self._lock:
+            return self._db.execute("DELETE FROM jobs WHERE id = ?", (job_id,)).rowcount > 0
+
+    def clear(self, printer: str | None = None) -> int:
+        with self._lock:
+            if printer is None:
+                return self._db.execute("DELETE FROM jobs").rowcount
+            return self._db.execute("DELETE FROM jobs WHERE printer = ?", (printer,)).rowcount
+
+    def compact(self) -> None:
+        """
+        Return the space of acknowledged jobs to the file system and truncate the WAL.
+        """
+        with self._lock:
+            self._db.execute("PRAGMA incremental_vacuum")
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def open_spool() -> Spool:
+    """
+    Open the spool at the configured path with the configured retry delays.
+    """
+    return Spool(get_spool_path(), get_spool_retry_delay(), get_spool_max_retry_delay())
+
+
+def drain(
+    spool: Spool, pool: PrinterConnectionPool | None = None, printer: str | None = None, force: bool = False
+) -> DrainResult:
+    """
+    Send spooled jobs to their printers, oldest first.
+    Only printers whose next retry is due are contacted, unless `force` is set.
+    A printer that is still unreachable keeps its jobs for the next attempt.
+    """
+    result = DrainResult()
+    connections = pool or PrinterConnectionPool()
+    try:
+        for address in [printer] if printer else spool.printers(due_only=not force):
+            jobs = spool.claim(address, due_only=not force)
+            if not jobs:
+                continue
+            sent, failed = _send_claimed(spool, connections, address, jobs)
+            result.sent += sent
+            result.failed += failed
+            result.remaining += len(jobs) - sent - failed
+    finally:
+        if pool is None:
+            connections.close_all()
+    if result.sent and not len(spool):
+        spool.compact()
+    return result
+
+
+def _send_claimed(
+    spool: Spool, connections: PrinterConnectionPool, address: str, jobs: list[SpooledJob]
+) -> tuple[int, int]:
+    """
+    Send a printer's claimed jobs over a pooled connection.
+    Returns the number of jobs sent and the number dropped because their send failed part-way.
+    """
+    connection: Network | None = None
+    written = 0
+
+    def connect() -> None:
+        nonlocal connection
+        if connection is None:
+            connection = connections.acquire(address)
+        elif not connections.is_alive(connection):
+            connection = connections.reconnect(address, connection)
+
+    def send(payload: bytes) -> None:
+        nonlocal written
+        assert connection is not None  # nosec B101
+        connection._raw(payload)
+        written += 1
+
+    failed = 0
+    try:
+        sent = send_jobs(spool, jobs, send, connect)
+    except UNREACHABLE_ERRORS:
+        # The job the connection failed on was dropped; the printer's later jobs wait for the next drain.
+        sent = written
+        failed = 1
+    if connection is not None:
+        connections.release(address, connection, discard=sent < len(jobs))
+    return sent, failed
+
+
+def send_jobs(spool: Spool, jobs: list[SpooledJob], send: Callable[[bytes], None], connect: Callable[[], None]) -> int:
+    """
+    Send claimed jobs in order, acknowledging each once the printer has accepted it.
+    `connect` is called before each job is written and opens the connection, or replaces one the
+    printer has dropped. If the printer cannot be reached, nothing of the job has been written, so
+    it is scheduled for a retry and the rest are released.
+    A write that fails part-way may already have printed part of the job, so that job is removed
+    rather than printed again, the rest are released and the error is raised.
+    Returns the number of jobs sent.
+    """
+    sent = 0
+    try:
+        for job in jobs:
+            try:
+                connect()
+            except UNREACHABLE_ERRORS as e:
+                delay = spool.retry_later(job.id, str(e)) - time.time()
+                logger.warning(
+                    f"Printer {job.printer} is unreachable, {len(jobs) - sent} jobs stay spooled; "
+                    f"retrying in {delay:.0f}s: {e}"
+                )
+                spool.release(jobs[sent + 1 :])
+                return sent
+            try:
+                send(job.payload)
+            except UNREACHABLE_ERRORS as e:
+                logger.error(
+                    f"Sending spooled job {job.id} ('{job.template_name}') to {job.printer} failed part-way; "
+                    f"it is not sent again: {e}"
+                )
+                spool.ack(job.id)
+                raise
+            spool.ack(job.id)
+            sent += 1
+            logger.debug(f"Sent spooled job {job.id} to {job.printer}")
+    except BaseException:
+        spool.release(jobs[sent:])
+        raise
+    return sent
+
+
+class SpoolWorker:
+    """
+    Background thread that retries spooled jobs as their backoff expires.
+    """
+
+    def __init__(self, spool: Spool, pool: PrinterConnectionPool | None = None, interval: float = 5.0) -> None:
+        self.spool = spool
+        self.pool = pool
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="spool-worker", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                drain(self.spool, self.pool)
+            except Exception as e:
+                logger.error(f"Error draining the spool: {e}", exc_info=True)
@@ -1,24 +1,88 @@
+import hashlib
+import json
+import logging
 import os
+import tempfile
+import threading
 from typing import Any
 
 import yaml
 
+from tp.config import ensure_private_dir
+from tp.instrumentation import stage
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+
+# Template file path -> (mtime_ns, size, parsed template)
+TemplateIndex = dict[str, tuple[int, int, dict[str, Any]]]
+
 
 class TemplateManager:
-    def __init__(self, template_dir: str):
+    def __init__(self, template_dir: str, cache_dir: str | None = None):
+        """
+        Load the templates in `template_dir`. When `cache_dir` is given, parsed templates are kept
+        in an on-disk index there and only files whose mtime or size changed are parsed again.
+        """
         self.template_dir = template_dir
+        self.cache_dir = cache_dir
+        self._index: TemplateIndex = {}
+        self._refresh_lock = threading.Lock()
         self.templates = self.load_templates()
 
+    @property
+    def index_path(self) -> str | None:
+        if not self.cache_dir:
+            return None
+        digest = hashlib.sha1(os.path.abspath(self.template_dir).encode(), usedforsecurity=False).hexdigest()
+        return os.path.join(self.cache_dir, f"templates-{digest[:16]}.json")
+
     def load_templates(self) -> dict[str, dict[str, Any]]:
-        templates = {}
-        for filename in os.listdir(self.template_dir):
-            if filename.endswith(".yaml"):
-                path = os.path.join(self.template_dir, filename)
-                with open(path, encoding="utf-8") as file:
-                    template = yaml.safe_load(file)
+        with stage("load_templates") as timing:
+            cached = self._index or self._read_index()
+            index: TemplateIndex = {}
+            templates = {}
+            parsed = False
+            for filename in os.listdir(self.template_dir):
+                if filename.endswith(".yaml"):
+                    path = os.path.join(self.template_dir, filename)
+                    stat = os.stat(path)
+                    entry = cached.get(path)
+                    if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                        template = entry[2]
+                    else:
+                        template = self._parse(path)
+                        timing.add_bytes(stat.st_size)
+                        parsed = True
+                    index[path] = (stat.st_mtime_ns, stat.st_size, template)
                     key = os.path.splitext(filename)[0]
                     templates[key] = template
-        return templates
+            if parsed or index.keys() != cached.keys():
+                self._write_index(index)
+            self._index = index
+            return templates
+
+    def refresh(self) -> set[str]:
+        """
+        Reload changed template files and atomically swap in the new templates.
+        Returns the names of templates that were added, changed or removed.
+        """
+        with self._refresh_lock:
+            previous = self.templates
+            templates = self.load_templates()
+            changed = {
+                name for name in previous.keys() | templates.keys() if previous.get(name) is not templates.get(name)
+            }
+            if changed:
+                self.templates = templates
+                logger.info(f"Reloaded templates: {', '.join(sorted(changed))}")
+            return changed
 
     def get_template(self, name: str) -> dict[str, Any]:
         template = self.templates.get(name)
@@ -29,3 +93,61 @@ class TemplateManager:
 
     def list_templates(self) -> list[str]:
         return list(self.templates.keys())
+
+    @staticmethod
+    def _parse(path: str) -> dict[str, Any]:
+        logger.debug(f"Parsing template file {path}")
+        with open(path, encoding="utf-8") as file:
+            return yaml.load(file, Loader=SafeLoader)  # nosec: B506
+
+    def _read_index(self) -> TemplateIndex:
+        path = self.index_path
+        if not path or not os.path.exists(path):
+            return {}
+        try:
+            ensure_private_dir(os.path.dirname(path))
+            with open(path, encoding="utf-8") as file:
+                data = json.load(file)
+            if data.get("version") == INDEX_VERSION:
+                return _index_from_json(data["files"])
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable template index {path}: {e}")
+        return {}
+
+    def _write_index(self, index: TemplateIndex) -> None:
+        path = self.index_path
+        if not path:
+            return
+        files = {}
+        for file_path, (mtime_ns, size, template) in index.items():
+            # Templates JSON cannot hold exactly, e.g. with dates or non-string keys, are parsed every time instead.
+            try:
+                if json.loads(json.dumps(template)) != template:
+                    continue
+            except (TypeError, ValueError):
+                continue
+            files[file_path] = [mtime_ns, size, template]
+        try:
+            ensure_private_dir(os.path.dirname(path))
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump({"version": INDEX_VERSION, "files": files}, file)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write template index {path}: {e}")
+
+
+def _index_from_json(files: Any) -> TemplateIndex:
+    """
+    Check the shape of an index read from disk, so a damaged file cannot hand out malformed templates.
+    """
+    if not isinstance(files, dict):
+        raise ValueError("Expected an object of template files.")
+    index: TemplateIndex = {}
+    for path, entry in files.items():
+        match entry:
+            case [int() as mtime_ns, int() as size, dict() as template]:
+                index[path] = (mtime_ns, size, template)
+            case _:
+                raise ValueError(f"Malformed entry for {path}.")
+    return index
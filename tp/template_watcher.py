@@ -0,0 +1,65 @@
+import logging
+import threading
+
+from tp.template_manager import TemplateManager
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+logger = logging.getLogger(__name__)
+
+
+class TemplateWatcher:
+    """
+    Watches a TemplateManager's directory in a background thread and refreshes it when template files change.
+    Uses inotify when `inotify_simple` is installed and falls back to polling file modification times.
+    """
+
+    def __init__(self, template_manager: TemplateManager, interval: float = 2.0) -> None:
+        self.template_manager = template_manager
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        target = self._watch_inotify if INotify is not None else self._watch_polling
+        self._thread = threading.Thread(target=target, name="template-watcher", daemon=True)
+        self._thread.start()
+        logger.debug(f"Watching {self.template_manager.template_dir} for template changes")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def check(self) -> set[str]:
+        """
+        Refresh the templates once, logging instead of raising if a file cannot be loaded.
+        """
+        try:
+            return self.template_manager.refresh()
+        except Exception as e:
+            logger.error(f"Error reloading templates: {e}")
+            return set()
+
+    def _watch_polling(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def _watch_inotify(self) -> None:
+        with INotify() as inotify:
+            inotify.add_watch(
+                self.template_manager.template_dir,
+                flags.CLOSE_WRITE | flags.CREATE | flags.DELETE | flags.MOVED_FROM | flags.MOVED_TO,
+            )
+            while not self._stop.is_set():
+                if inotify.read(timeout=int(self.interval * 1000)):
+                    # Let editors finish multi-step saves before reloading.
+                    inotify.read(timeout=50)
+                    self.check()
@@ -0,0 +1,106 @@
+import re
+
+from tp.segments import Segment, Style
+
+# Width in printer dots of one character of each font; line widths are expressed in font A columns.
+FONT_DOTS = {"a": 12, "b": 9}
+
+_CHUNKS = re.compile(r"\n|[^\S\n]+|\S+")
+_LAST_SPACE = re.compile(r"[^\S\n]+(?=\S*$)")
+
+
+class LineWrapper:
+    """
+    Wraps rendered segments to the printer's line width in one pass over the whole receipt.
+
+    Character widths follow each segment's style (font B fits more columns, double width fewer),
+    and a line can be broken at whitespace in an earlier segment when a word continues across
+    inline style changes such as bold or italic runs.
+    """
+
+    def __init__(self, chars_per_line: int):
+        self.chars_per_line = chars_per_line
+        self.line_dots = chars_per_line * FONT_DOTS["a"]
+
+    @staticmethod
+    def char_dots(style: Style) -> int:
+        dots = FONT_DOTS.get(style.font, FONT_DOTS["a"])
+        return dots * 2 if style.double_width else dots
+
+    def columns(self, style: Style) -> int:
+        """
+        Number of characters that fit on one line in the given style.
+        """
+        return max(1, self.line_dots // self.char_dots(style))
+
+    def wrap(self, segments: list[Segment]) -> list[Segment]:
+        """
+        Segments carrying pre-encoded `data` are already wrapped and end with a line break; when
+        they start at the beginning of a line they are passed through untouched.
+        """
+        line_dots = self.line_dots
+        column = 0
+        # Last whitespace on the current line: the chunk list holding it, its index and the column after it.
+        break_at: tuple[list[str], int, int] | None = None
+        wrapped: list[tuple[list[str], Style] | Segment] = []
+
+        for segment in segments:
+            if segment.data is not None and column == 0:
+                wrapped.append(segment)
+                break_at = None
+                continue
+            style = segment.style
+            width = self.char_dots(style)
+            text = segment.text
+            chunks: list[str] = []
+            wrapped.append((chunks, style))
+
+            if "\n" not in text and column + len(text) * width <= line_dots:
+                # Fast path: the segment fits on the current line, only its last whitespace matters.
+                space = _LAST_SPACE.search(text)
+                if space:
+                    chunks.extend((text[: space.start()], space.group(), text[space.end() :]))
+                    break_at = (chunks, 1, column + space.end() * width)
+                else:
+                    chunks.append(text)
+                column += len(text) * width
+                continue
+
+            for chunk in _CHUNKS.findall(text):
+                if chunk == "\n":
+                    chunks.append(chunk)
+                    column = 0
+                    break_at = None
+                    continue
+                dots = len(chunk) * width
+                if chunk[0].isspace():
+                    chunks.append(chunk)
+                    column += dots
+                    break_at = (chunks, len(chunks) - 1, column)
+                    continue
+                if column + dots <= line_dots:
+                    chunks.append(chunk)
+                    column += dots
+                    continue
+
+                if break_at is not None:
+                    break_chunks, index, break_column = break_at
+                    break_chunks[index] = "\n"
+                    column -= break_column
+                    break_at = None
+                # Words longer than the remaining line are split across lines.
+                while column + len(chunk) * width > line_dots:
+                    # Always place at least one character on an empty line.
+                    fit = max((line_dots - column) // width, 0 if column else 1)
+                    if fit >= len(chunk):
+                        break
+                    if fit > 0:
+                        chunks.append(chunk[:fit])
+                        chunk = chunk[fit:]
+                    chunks.append("\n")
+                    column = 0
+                chunks.append(chunk)
+                column += len(chunk) * width
+
+        # Chunks are joined last because a later word may move a line break into an earlier segment.
+        return [item if isinstance(item, Segment) else Segment("".join(item[0]), item[1]) for item in wrapped]
@@ -0,0 +1,86 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any
+
+from tp.config import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+# How long a cached answer is trusted before it is refreshed in the background.
+CHECK_INTERVAL = 24 * 60 * 60
+
+STATE_FILENAME = "update_check.json"
+
+
+def get_state_path() -> str:
+    return os.path.join(get_cache_dir(), STATE_FILENAME)
+
+
+def read_state() -> dict[str, Any]:
+    try:
+        with open(get_state_path(), encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_state(state: dict[str, Any]) -> None:
+    path = get_state_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(state, file)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        logger.warning(f"Could not write update check state {path}: {e}")
+
+
+def refresh(url: str | None = None) -> None:
+    """
+    Ask the releases endpoint for the latest version and store the answer.
+    A failed check is recorded too, so an offline machine retries only after CHECK_INTERVAL.
+    """
+    from tp.utils import get_latest_version
+
+    state = read_state()
+    try:
+        state["latest_version"] = get_latest_version(url)
+        state.pop("error", None)
+    except Exception as e:
+        logger.debug(f"Error checking for updates: {e}")
+        state["error"] = str(e)
+    state["checked_at"] = time.time()
+    write_state(state)
+
+
+def start_refresh(url: str | None = None) -> threading.Thread:
+    # Not a daemon thread: a CLI command usually finishes before the check does, and the interpreter
+    # must wait for it at exit (at most the request timeout, once per CHECK_INTERVAL) or it never lands.
+    thread = threading.Thread(target=refresh, args=(url,), name="update-check")
+    thread.start()
+    return thread
+
+
+def is_update_available(current_version: str, max_age: float = CHECK_INTERVAL) -> bool:
+    """
+    Answer from the cached state without touching the network.
+    When the cached answer is missing or older than `max_age`, a background refresh is started
+    and its result is used on a later run.
+    """
+    state = read_state()
+    if time.time() - state.get("checked_at", 0) > max_age:
+        start_refresh()
+
+    latest_version = state.get("latest_version")
+    if not latest_version:
+        return False
+
+    from packaging import version
+
+    try:
+        return version.parse(latest_version) > version.parse(current_version)
+    except version.InvalidVersion:
+        return False
@@ -1,85 +1,221 @@
 import datetime
 import logging
-import textwrap
+import os
+from collections.abc import Callable
 from typing import Any
 
 import requests
-from jinja2 import BaseLoader, Environment
-from mistune import Markdown
+from jinja2 import BaseLoader, Environment, FileSystemBytecodeCache, TemplateNotFound, meta
 from packaging import version
-from unidecode import unidecode
 
-from tp.config import get_chars_per_line, get_enable_special_letters
+from tp.config import (
+    ensure_private_dir,
+    get_cache_dir,
+    get_chars_per_line,
+    get_codepage,
+    get_config,
+    get_enable_special_letters,
+    get_template_bytecode_cache,
+    get_update_url,
+)
+from tp.encoding import CodepageEncoder, transliterate
+from tp.instrumentation import stage
 from tp.markdown_renderer import PrinterRenderer
+from tp.printers import PrinterProfile
+from tp.segments import Segment, Style
 from tp.template_manager import TemplateManager
+from tp.text_wrap import LineWrapper
 
 logger = logging.getLogger(__name__)
 
 
+class SegmentLoader(BaseLoader):
+    """
+    Jinja loader serving the text of single template segments, addressed as "<template name>/<segment index>".
+    A loaded segment stays up to date until the TemplateManager replaces its template.
+    """
+
+    def __init__(self, template_manager: TemplateManager) -> None:
+        self.template_manager = template_manager
+
+    def get_source(self, environment: Environment, template: str) -> tuple[str, str | None, Callable[[], bool]]:
+        template_name, _, index = template.rpartition("/")
+        definition = self.template_manager.templates.get(template_name)
+        try:
+            source = definition["segments"][int(index)]["text"]  # type: ignore[index]
+        except (TypeError, LookupError, ValueError) as e:
+            raise TemplateNotFound(template) from e
+        return source, None, lambda: self.template_manager.templates.get(template_name) is definition
+
+
 class TemplateRenderer:
     """
     Renders templates with context, handling Markdown formatting,
     text wrapping, and special character processing.
     """
 
-    def __init__(self, template_manager: TemplateManager) -> None:
+    def __init__(
+        self, template_manager: TemplateManager, profile: PrinterProfile | None = None, env: Environment | None = None
+    ) -> None:
+        """
+        With a printer profile, its paper width, codepage and special letter handling are used
+        instead of the `[Printer]` settings. An existing Jinja environment over the same templates
+        can be passed in to share its compiled templates.
+        """
         self.template_manager = template_manager
+        self.profile = profile
+        # Renderers for other printer profiles, by their render settings
+        self._variants: dict[tuple[int, str, bool], TemplateRenderer] = {}
         self.reload_settings()
+        if env is None:
+            bytecode_cache = None
+            if get_template_bytecode_cache():
+                cache_dir = os.path.join(get_cache_dir(), "jinja")
+                try:
+                    # Cached bytecode is executed, so it is only read from a directory nobody else can write to.
+                    ensure_private_dir(cache_dir)
+                    bytecode_cache = FileSystemBytecodeCache(cache_dir)
+                except OSError as e:
+                    logger.warning(f"Not caching template bytecode: {e}")
+            env = Environment(
+                loader=SegmentLoader(template_manager),
+                autoescape=True,
+                keep_trailing_newline=True,
+                cache_size=-1,
+                bytecode_cache=bytecode_cache,
+            )
+        self.env = env
         logging.debug("Initialized TemplateRenderer.")
 
     def reload_settings(self) -> None:
         """
         Reload settings from the configuration.
         """
-        self.chars_per_line = get_chars_per_line()
-        self.enable_special_letters = get_enable_special_letters()
+        self.config = get_config()
+        if self.profile is not None:
+            self.chars_per_line = self.profile.chars_per_line
+            self.enable_special_letters = self.profile.enable_special_letters
+            codepage = self.profile.codepage
+        else:
+            self.chars_per_line = get_chars_per_line()
+            self.enable_special_letters = get_enable_special_letters()
+            codepage = get_codepage()
+        self.markdown_renderer = PrinterRenderer(self.chars_per_line)
+        self.line_wrapper = LineWrapper(self.chars_per_line)
+        self.encoder = CodepageEncoder(codepage)
+        # Template name -> (template definition, pre-rendered static segments by index)
+        self._static_segments: dict[str, tuple[dict[str, Any], dict[int, Segment]]] = {}
+        # Template name -> (template definition, interned style of each segment)
+        self._segment_styles: dict[str, tuple[dict[str, Any], list[Style]]] = {}
         logging.debug("TemplateRenderer settings reloaded.")
 
-    def render_from_template(self, template_name: str, context: dict[str, Any]) -> list[dict[str, Any]]:
+    def for_profile(self, profile: PrinterProfile | None) -> "TemplateRenderer":
+        """
+        Renderer for a printer profile: this one when the profile renders the same way, otherwise
+        one that shares this renderer's compiled templates.
+        """
+        if profile is None:
+            return self
+        if get_config() is not self.config:
+            self.reload_settings()
+        key = (profile.chars_per_line, profile.codepage.lower(), profile.enable_special_letters)
+        if key == (self.chars_per_line, self.encoder.codepage, self.enable_special_letters):
+            return self
+        renderer = self._variants.get(key)
+        if renderer is None:
+            renderer = self._variants[key] = TemplateRenderer(self.template_manager, profile, self.env)
+        return renderer
+
+    def segment_styles(self, template_name: str, template: dict[str, Any]) -> list[Style]:
+        """
+        Resolve the styles of a template's segments once per template, rather than once per print.
+        """
+        cached = self._segment_styles.get(template_name)
+        if cached and cached[0] is template:
+            return cached[1]
+        styles = [Style.from_dict(segment.get("styles") or {}) for segment in template.get("segments", [])]
+        self._segment_styles[template_name] = (template, styles)
+        return styles
+
+    def static_segments(self, template_name: str, template: dict[str, Any]) -> dict[int, Segment]:
+        """
+        Pre-render the segments of a template that do not reference any variables.
+
+        Such segments are rendered, wrapped from the start of a line and encoded once per template
+        and settings generation; the encoded bytes are carried in the segment's `data`.
+        Only segments that end with a line break are kept, so no later text can wrap back into them.
+        """
+        cached = self._static_segments.get(template_name)
+        if cached and cached[0] is template:
+            return cached[1]
+        styles = self.segment_styles(template_name, template)
+        static = {}
+        for index, segment in enumerate(template.get("segments", [])):
+            if segment.get("markdown", False):
+                continue
+            source = segment.get("text", "")
+            if meta.find_undeclared_variables(self.env.parse(source)):
+                continue
+            text = self.env.get_template(f"{template_name}/{index}").render()
+            if not self.enable_special_letters:
+                text = transliterate(text)
+            (wrapped,) = self.line_wrapper.wrap([Segment(text, styles[index])])
+            if wrapped.text.endswith("\n"):
+                wrapped.data = self.encoder.encode(wrapped.text)
+                static[index] = wrapped
+        self._static_segments[template_name] = (template, static)
+        return static
+
+    def render_from_template(self, template_name: str, context: dict[str, Any]) -> list[Segment]:
         """
         Render the template with context, handling markdown formatting and special characters.
         """
+        if get_config() is not self.config:
+            self.reload_settings()
         template = self.template_manager.get_template(template_name)
         if not template:
             raise ValueError(f"Template '{template_name}' not found.")
 
         segments = template.get("segments", [])
-        rendered_segments = []
-        env = Environment(loader=BaseLoader(), autoescape=True, keep_trailing_newline=True)
-
-        for segment in segments:
-            template_text = segment["text"]
-            jinja_template = env.from_string(template_text)
-            try:
-                text = jinja_template.render(**context)
-            except Exception as e:
-                logger.error(f"Error rendering template '{template_name}': {e}")
-                raise
+        styles = self.segment_styles(template_name, template)
+        static = self.static_segments(template_name, template)
+        rendered_segments: list[Segment] = []
+        at_line_start = True
+
+        for index, segment in enumerate(segments):
+            if index in static and at_line_start:
+                # Pre-rendered segments were wrapped from column zero, so they only fit at a line start.
+                rendered_segments.append(static[index])
+                continue
+
+            with stage("render") as timing:
+                jinja_template = self.env.get_template(f"{template_name}/{index}")
+                try:
+                    text = jinja_template.render(**context)
+                except Exception as e:
+                    logger.error(f"Error rendering template '{template_name}': {e}")
+                    raise
+                timing.add_bytes(len(text))
 
             if not self.enable_special_letters:
                 logger.debug("Transliterating text to ASCII")
-                text = unidecode(text)
+                with stage("transliterate"):
+                    text = transliterate(text)
 
             if segment.get("markdown", False):
-                # Use Mistune to parse markdown and render segments
-                renderer = PrinterRenderer(self.chars_per_line)
-                markdown = Markdown(renderer=renderer)
-                markdown(text)
-
-                # Process the segments generated by the renderer
-                for seg in renderer.segments:
-                    wrapped_text = textwrap.fill(
-                        seg["text"], width=self.chars_per_line, replace_whitespace=False, drop_whitespace=False
-                    )
-                    styles = seg.get("styles", {})
-                    rendered_segments.append({"text": wrapped_text, "styles": styles})
+                # Render the markdown into printer segments
+                with stage("markdown"):
+                    new_segments = self.markdown_renderer.render(text)
             else:
-                wrapped_text = textwrap.fill(
-                    text, width=self.chars_per_line, replace_whitespace=False, drop_whitespace=False
-                )
-                rendered_segments.append({"text": wrapped_text, "styles": segment.get("styles", {})})
+                new_segments = [Segment(text, styles[index])]
+            rendered_segments.extend(new_segments)
+            for new_segment in new_segments:
+                if new_segment.text:
+                    at_line_start = new_segment.text.endswith("\n")
 
-        return rendered_segments
+        # Wrap the whole receipt at once so lines can break across inline style changes
+        with stage("wrap"):
+            return self.line_wrapper.wrap(rendered_segments)
 
 
 def compute_agenda_variables() -> dict[str, Any]:
@@ -101,8 +237,8 @@ def compute_agenda_variables() -> dict[str, Any]:
     }
 
 
-def get_latest_version() -> str:
-    url = "https://api.github.com/repos/AN0DA/tp/releases/latest"
+def get_latest_version(url: str | None = None) -> str:
+    url = url or get_update_url()
     response = requests.get(url, timeout=5)
     if response.status_code == 200:
         data = response.json()
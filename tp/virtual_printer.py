@@ -0,0 +1,266 @@
+import json
+import logging
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from typing import Any
+
+from tp.connection_pool import split_address
+from tp.encoding import CODEPAGES
+from tp.printer import DEFAULT_STYLES
+
+logger = logging.getLogger(__name__)
+
+DLE = 0x10
+ESC = 0x1B
+GS = 0x1D
+COMMAND_PREFIXES = (DLE, ESC, GS)
+
+# Number of parameter bytes of the ESC and GS commands the parser understands.
+# Unknown commands are assumed to take one parameter byte.
+ESC_PARAMS = {b"@": 0, b"!": 1, b"-": 1, b"2": 0, b"3": 1, b"E": 1, b"G": 1, b"J": 1, b"M": 1, b"a": 1, b"d": 1}
+ESC_PARAMS |= {b"t": 1, b"{": 1, b"V": 1, b"p": 3}
+GS_PARAMS = {b"!": 1, b"B": 1, b"V": 1, b"L": 2, b"W": 2, b"h": 1, b"w": 1, b"H": 1, b"f": 1}
+# Real-time commands: DLE EOT n (status query), DLE ENQ n and DLE DC4 fn m t.
+DLE_PARAMS = {b"\x04": 1, b"\x05": 1, b"\x14": 3}
+
+# Reply to status queries: only the fixed bits are set, i.e. online with paper loaded.
+STATUS_OK = 0x12
+
+CODEPAGE_NAMES = {number: name for name, number in CODEPAGES.items()}
+
+ALIGNMENTS = {0: "left", 1: "center", 2: "right", 48: "left", 49: "center", 50: "right"}
+
+
+class EscPosParser:
+    """
+    Incremental parser turning an ESC/POS byte stream into structured events.
+
+    Events are dicts with a "type" of "text" (with the text and the styles it was printed in),
+    "feed" (blank lines fed), "cut", "status" (a real-time status query) or "command" (any other
+    command, as hex). Bytes may be fed
+    in arbitrary chunks; a command split across chunks is completed by the next call.
+    """
+
+    def __init__(self) -> None:
+        self.styles = dict(DEFAULT_STYLES)
+        self.codepage = "cp437"
+        self._pending = b""
+        self._text = bytearray()
+
+    def feed(self, data: bytes) -> list[dict[str, Any]]:
+        events: list[dict[str, Any]] = []
+        buffer = self._pending + data
+        position = 0
+        while position < len(buffer):
+            byte = buffer[position]
+            if byte not in COMMAND_PREFIXES:
+                end = position + 1
+                while end < len(buffer) and buffer[end] not in COMMAND_PREFIXES:
+                    end += 1
+                self._text += buffer[position:end]
+                position = end
+                continue
+            command_end = self._command_end(buffer, position)
+            if command_end is None:
+                break
+            self._flush_text(events)
+            self._apply(buffer[position:command_end], events)
+            position = command_end
+        self._pending = buffer[position:]
+        return events
+
+    def close(self) -> list[dict[str, Any]]:
+        """
+        Flush any text still buffered at the end of the stream.
+        """
+        events: list[dict[str, Any]] = []
+        self._flush_text(events)
+        return events
+
+    @staticmethod
+    def _command_end(buffer: bytes, position: int) -> int | None:
+        if position + 1 >= len(buffer):
+            return None
+        command = buffer[position + 1 : position + 2]
+        if buffer[position] == ESC:
+            params = ESC_PARAMS.get(command, 1)
+        elif buffer[position] == DLE:
+            params = DLE_PARAMS.get(command, 0)
+        else:
+            params = GS_PARAMS.get(command, 1)
+            if command == b"V" and position + 2 < len(buffer) and buffer[position + 2] in (65, 66):
+                # Feed-and-cut variants carry an extra feed amount.
+                params = 2
+        end = position + 2 + params
+        return end if end <= len(buffer) else None
+
+    def _apply(self, command: bytes, events: list[dict[str, Any]]) -> None:
+        prefix, name, params = command[0], command[1:2], command[2:]
+        value = params[0] if params else 0
+        if prefix == DLE:
+            if name == b"\x04":
+                events.append({"type": "status", "query": value})
+            else:
+                events.append({"type": "command", "command": command.hex()})
+        elif prefix == ESC:
+            match name:
+                case b"@":
+                    self.styles = dict(DEFAULT_STYLES)
+                case b"!":
+                    self.styles.update(
+                        font="b" if value & 0x01 else "a",
+                        bold=bool(value & 0x08),
+                        double_height=bool(value & 0x10),
+                        double_width=bool(value & 0x20),
+                        underline=bool(value & 0x80),
+                    )
+                case b"E":
+                    self.styles["bold"] = bool(value & 0x01)
+                case b"-":
+                    self.styles["underline"] = value in (1, 2, 49, 50)
+                case b"M":
+                    self.styles["font"] = "b" if value in (1, 49) else "a"
+                case b"a":
+                    self.styles["align"] = ALIGNMENTS.get(value, "left")
+                case b"t":
+                    self.codepage = CODEPAGE_NAMES.get(value, self.codepage)
+                case b"d":
+                    events.append({"type": "feed", "lines": value})
+                case _:
+                    events.append({"type": "command", "command": command.hex()})
+        else:
+            match name:
+                case b"!":
+                    self.styles.update(double_width=bool(value & 0xF0), double_height=bool(value & 0x0F))
+                case b"B":
+                    self.styles["invert"] = bool(value & 0x01)
+                case b"V":
+                    events.append({"type": "cut", "partial": value in (1, 49, 66)})
+                case _:
+                    events.append({"type": "command", "command": command.hex()})
+
+    def _flush_text(self, events: list[dict[str, Any]]) -> None:
+        if self._text:
+            text = bytes(self._text).decode(self.codepage, errors="replace")
+            events.append({"type": "text", "text": text, "styles": dict(self.styles)})
+            self._text.clear()
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    server: "_Server"
+
+    def handle(self) -> None:
+        self.server.virtual_printer.receive(self.request, f"{self.client_address[0]}:{self.client_address[1]}")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+    virtual_printer: "VirtualPrinter"
+
+
+class VirtualPrinter:
+    """
+    A stand-in network printer for dry runs and load tests.
+
+    Listens for raw ESC/POS connections like a printer on port 9100 and records what would have been
+    printed as structured events, kept in memory and optionally appended to a JSON lines log.
+    With a `line_rate` (lines per second) it stops reading while the printed lines "feed",
+    and its small receive buffer pushes that backpressure back onto the sender, as a real printer does.
+    """
+
+    def __init__(
+        self,
+        address: str = "127.0.0.1:9100",
+        line_rate: float = 0.0,
+        buffer_size: int = 4096,
+        log_file: str | None = None,
+        max_events: int = 10000,
+    ) -> None:
+        self.host, self.port = split_address(address)
+        self.line_rate = line_rate
+        self.buffer_size = buffer_size
+        self.log_file = log_file
+        self.events: deque[dict[str, Any]] = deque(maxlen=max_events)
+        self.receipts = 0
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+        self._server: _Server | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def address(self) -> str:
+        """
+        The address to print to, with the port actually bound when listening on port 0.
+        """
+        if self._server:
+            host, port = self._server.socket.getsockname()[:2]
+            return f"{host}:{port}"
+        return f"{self.host}:{self.port}"
+
+    def bind(self) -> "_Server":
+        if self._server is None:
+            self._server = _Server((self.host, self.port), _Handler)
+            self._server.virtual_printer = self
+            logger.info(f"Virtual printer listening on {self.address}")
+        return self._server
+
+    def serve_forever(self) -> None:
+        self.bind().serve_forever()
+
+    def start(self) -> None:
+        """
+        Serve in a background thread.
+        """
+        self.bind()
+        self._thread = threading.Thread(target=self.serve_forever, name="virtual-printer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def receive(self, connection: socket.socket, peer: str) -> None:
+        """
+        Read and parse one client connection until it is closed.
+        """
+        connection.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.buffer_size)
+        parser = EscPosParser()
+        logger.debug(f"Virtual printer connection from {peer}")
+        while data := connection.recv(self.buffer_size):
+            events = parser.feed(data)
+            for event in events:
+                if event["type"] == "status":
+                    connection.sendall(bytes([STATUS_OK]))
+            self._record(peer, len(data), events)
+            self._simulate_feed(events)
+        self._record(peer, 0, parser.close())
+
+    def _record(self, peer: str, size: int, events: list[dict[str, Any]]) -> None:
+        now = time.time()
+        stamped = [{"time": now, "peer": peer, **event} for event in events]
+        with self._lock:
+            self.bytes_received += size
+            self.events.extend(stamped)
+            for event in stamped:
+                if event["type"] == "cut":
+                    self.receipts += 1
+                    logger.info(f"Virtual printer cut receipt {self.receipts} from {peer}")
+            if self.log_file and stamped:
+                with open(self.log_file, "a", encoding="utf-8") as log:
+                    log.writelines(json.dumps(event, ensure_ascii=False) + "\n" for event in stamped)
+
+    def _simulate_feed(self, events: list[dict[str, Any]]) -> None:
+        if self.line_rate <= 0:
+            return
+        lines = sum(event["text"].count("\n") if event["type"] == "text" else event.get("lines", 0) for event in events)
+        if lines:
+            time.sleep(lines / self.line_rate)
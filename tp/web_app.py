@@ -1,32 +1,56 @@
 import logging
 import os
 
-from flask import Flask, flash, redirect, render_template, request, url_for
+from flask import Flask, flash, jsonify, redirect, render_template, request, url_for
 from waitress import serve
 from werkzeug.wrappers import Response
 
+from tp import config
 from tp.config import (
     PRINT_TEMPLATE_FOLDER,
+    get_cache_dir,
     get_chars_per_line,
     get_check_for_updates,
     get_enable_special_letters,
     get_flask_secret_key,
+    get_health_interval,
+    get_health_timeout,
     get_printer_ip,
-    set_chars_per_line,
-    set_check_for_updates,
-    set_enable_special_letters,
-    set_printer_ip,
+    get_spool_enabled,
 )
-from tp.printer import ThermalPrinter
+from tp.connection_pool import PrinterConnectionPool
+from tp.health import HealthMonitor, PrinterState
+from tp.instrumentation import add_observer
+from tp.metrics import MetricsRegistry
+from tp.print_queue import PrintQueue
+from tp.printers import check_printer_name, load_printers
+from tp.spool import SpoolWorker, open_spool
 from tp.template_manager import TemplateManager
-from tp.utils import compute_agenda_variables
+from tp.template_watcher import TemplateWatcher
+from tp.utils import TemplateRenderer, compute_agenda_variables
 
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.secret_key = get_flask_secret_key()
 
-template_manager = TemplateManager(PRINT_TEMPLATE_FOLDER)
+template_manager = TemplateManager(PRINT_TEMPLATE_FOLDER, cache_dir=get_cache_dir())
+template_renderer = TemplateRenderer(template_manager)
+printer_pool = PrinterConnectionPool()
+template_watcher = TemplateWatcher(template_manager)
+spool = open_spool() if get_spool_enabled() else None
+health_monitor = HealthMonitor(interval=get_health_interval(), timeout=get_health_timeout())
+print_queue = PrintQueue(template_manager, template_renderer, printer_pool, spool=spool, health=health_monitor)
+metrics = MetricsRegistry()
+metrics.gauge("tp_queue_depth", "Print jobs waiting to be printed.", print_queue.depth)
+metrics.gauge(
+    "tp_printers_down",
+    "Printers currently known to be unreachable.",
+    lambda: sum(health.state == PrinterState.DOWN for health in health_monitor.snapshot()),
+)
+add_observer(metrics.observe_job)
+if spool is not None:
+    metrics.gauge("tp_spooled_jobs", "Print jobs waiting in the spool for an unreachable printer.", spool.__len__)
 
 
 @app.route("/")
@@ -57,23 +81,56 @@ def print_template(template_name: str) -> Response | str:
                             flash(f"Cancelled printing {template_name}.", "info")
                             return redirect(url_for("index"))
 
-            ip_address = get_printer_ip()
-            with ThermalPrinter(ip_address, template_manager) as printer:
-                printer.print_template(template_name, context)
-            flash(f"Printed using template '{template_name}'.", "success")
+            # A configured printer can be picked per request; otherwise the template's or the default printer is used.
+            printer = request.form.get("printer") or request.args.get("printer")
+            if printer:
+                check_printer_name(printer)
+            job = print_queue.submit(printer or None, template_name, context)
+            flash(f"Queued print job {job.id} using template '{template_name}'.", "success")
             return redirect(url_for("index"))
 
         except Exception as e:
             logger.error(f"Error printing template '{template_name}': {e}", exc_info=True)
             flash(f"Failed to print: {e}", "error")
+    try:
+        printers = load_printers().names()
+    except ValueError as e:
+        logger.error(f"Invalid printer configuration: {e}")
+        printers = []
     return render_template(
         "print_template.html",
         templates=templates,
         template=template,
+        printers=printers,
         markdown_vars=[var["name"] for var in template.get("variables", []) if var.get("markdown", False)],
     )
 
 
+@app.route("/jobs")
+def jobs() -> Response:
+    return jsonify([job.to_dict() for job in print_queue.jobs()])
+
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id: str) -> Response | tuple[Response, int]:
+    job = print_queue.get(job_id)
+    if not job:
+        return jsonify({"error": f"Job '{job_id}' not found."}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route("/health")
+def health() -> Response:
+    printers = health_monitor.snapshot()
+    status = "degraded" if any(printer.state == PrinterState.DOWN for printer in printers) else "ok"
+    return jsonify({"status": status, "printers": [printer.to_dict() for printer in printers]})
+
+
+@app.route("/metrics")
+def metrics_endpoint() -> Response:
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
 @app.route("/settings", methods=["GET", "POST"])
 def settings() -> Response | str:
     templates = template_manager.templates
@@ -84,11 +141,8 @@ def settings() -> Response | str:
         enable_special_letters_value = request.form.get("enable_special_letters")
         check_for_updates_value = request.form.get("check_for_updates")
 
-        set_printer_ip(ip_address or "")
-
         try:
             chars_per_line = int(chars_per_line_value or 0)
-            set_chars_per_line(chars_per_line)
         except ValueError:
             flash("Invalid number for chars per line.", "error")
             return redirect(url_for("settings"))
@@ -100,7 +154,6 @@ def settings() -> Response | str:
         else:
             flash("Invalid value for enable special letters. Use True or False.", "error")
             return redirect(url_for("settings"))
-        set_enable_special_letters(enable_special_letters)
 
         if (check_for_updates_value or "").lower() in ("true", "yes", "1"):
             check_for_updates = True
@@ -109,7 +162,13 @@ def settings() -> Response | str:
         else:
             flash("Invalid value for check for updates. Use True or False.", "error")
             return redirect(url_for("settings"))
-        set_check_for_updates(check_for_updates)
+
+        config.update(
+            printer_ip=ip_address or "",
+            chars_per_line=chars_per_line,
+            enable_special_letters=enable_special_letters,
+            check_for_updates=check_for_updates,
+        )
 
         flash("Settings saved.", "success")
         return redirect(url_for("index"))
@@ -137,6 +196,10 @@ def main() -> None:
     static_dir = os.path.join(dir_path, "static")
     app.template_folder = template_dir
     app.static_folder = static_dir
+    template_watcher.start()
+    health_monitor.start()
+    if spool is not None:
+        SpoolWorker(spool, printer_pool).start()
 
     serve(app, host="0.0.0.0", port=5555)  # nosec: B104
 